@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+World Brain Benchmarks
+Regression benchmarks for the simulation engine hot paths.
+
+Run from the repository root:
+    python -m backend.bench_world_brain
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from dataclasses import asdict, replace
+from datetime import datetime
+
+import numpy as np
+
+from . import simulation_serializer as serializer
+from . import world_snapshot
+from .relation_matrix import RelationMatrix
+from .simulation_history import MapStateHistory
+from .world_brain import Action, GeneratedNews, Outcome, WorldBrain
+
+logging.disable(logging.INFO)
+
+
+def _pad_world(brain: WorldBrain, world_state, countries: int):
+    """Grow a world to ``countries`` countries with copies of the loaded ones"""
+    templates = list(world_state.countries.values())
+    for index in range(len(templates), countries):
+        template = templates[index % len(templates)]
+        copy_id = f"{template.id}_{index}"
+        world_state.countries[copy_id] = replace(template, id=copy_id, alliances=list(template.alliances))
+        if template.id in world_state.doctrines:
+            world_state.doctrines[copy_id] = replace(world_state.doctrines[template.id], country_id=copy_id)
+    world_state.relations = RelationMatrix.from_countries(world_state.countries)
+    world_state.map_state = brain._create_map_state(world_state.countries, world_state.relations)
+    world_state.map_states.append(world_state.map_state)
+
+
+def _legacy_actions_and_outcomes(world_state, rng: random.Random):
+    """The previous per-country action and outcome loops, kept as a baseline"""
+    actions = []
+    for country_id, country in world_state.countries.items():
+        doctrine = world_state.doctrines.get(country_id)
+        if not doctrine or rng.random() >= doctrine.aggression_level / 100.0:
+            continue
+        action_type = rng.choice(["diplomatic", "military", "economic", "cyber"])
+        potential_targets = [c for c in world_state.countries.values() if c.id != country.id]
+        target = rng.choice(potential_targets)
+        intensity = max(0, min(100, doctrine.aggression_level + rng.randint(-20, 20)))
+        descriptions = {
+            "diplomatic": f"{country.name} engages in diplomatic {rng.choice(['pressure', 'negotiations', 'threats', 'overtures'])} with {target.name}",
+            "military": f"{country.name} conducts military {rng.choice(['exercises', 'deployments', 'threats', 'operations'])} near {target.name}",
+            "economic": f"{country.name} implements economic {rng.choice(['sanctions', 'trade restrictions', 'incentives', 'agreements'])} with {target.name}",
+            "cyber": f"{country.name} conducts cyber {rng.choice(['operations', 'espionage', 'attacks', 'defense'])} against {target.name}"
+        }
+        actions.append(Action(
+            id=f"action_{world_state.action_count}_{country.id}",
+            actor_id=country.id,
+            target_id=target.id,
+            action_type=action_type,
+            description=descriptions[action_type],
+            intensity=intensity,
+            timestamp=world_state.timestamp,
+            success_probability=0.7
+        ))
+    outcomes = []
+    for action in actions:
+        success = rng.random() < action.success_probability
+        impact_magnitude = action.intensity if success else action.intensity // 2
+        impact_magnitude = max(0, min(100, impact_magnitude + rng.randint(-10, 10)))
+        outcomes.append(Outcome(
+            action_id=action.id,
+            success=success,
+            impact_magnitude=impact_magnitude,
+            casualties=rng.randint(0, impact_magnitude * 100) if action.action_type == "military" else 0,
+            economic_damage=impact_magnitude * 1000000 if action.action_type == "economic" else 0.0,
+            diplomatic_impact=impact_magnitude if action.action_type == "diplomatic" else 0,
+            escalation_triggered=impact_magnitude > 70
+        ))
+    return actions, outcomes
+
+
+async def bench_action_generation(countries: int = 400, ticks: int = 50) -> bool:
+    """Batched action generation and resolution must clearly beat the per-country loops"""
+    print(f"\n🎲 Action generation and resolution with {countries} countries:")
+    brain = WorldBrain()
+    with contextlib.redirect_stdout(io.StringIO()):
+        world_state = await brain.initialize_world("bench-actions", seed=3)
+    _pad_world(brain, world_state, countries)
+    brain._target_index(world_state)  # Built once per world, then updated incrementally
+
+    rng = random.Random(3)
+    started = time.perf_counter()
+    for _ in range(ticks):
+        _legacy_actions_and_outcomes(world_state, rng)
+    legacy = (time.perf_counter() - started) / ticks
+
+    started = time.perf_counter()
+    for _ in range(ticks):
+        brain._process_actions(brain._generate_actions(world_state), world_state)
+    batched = (time.perf_counter() - started) / ticks
+
+    faster = batched * 5 < legacy
+    print(f"   per-country loops: {legacy * 1000:8.3f} ms/tick")
+    print(f"   batched NumPy:     {batched * 1000:8.3f} ms/tick ({legacy / batched:.1f}x)")
+    print(f"{'✅' if faster else '❌'} at least 5x faster")
+    return faster
+
+
+async def bench_target_selection(countries: int = 1000, ticks: int = 20) -> bool:
+    """Indexed weighted target draws must beat per-actor weight scans and stay in sync with trust"""
+    print(f"\n🎯 Weighted target selection with {countries} countries:")
+    brain = WorldBrain()
+    with contextlib.redirect_stdout(io.StringIO()):
+        world_state = await brain.initialize_world("bench-targets", seed=4)
+    _pad_world(brain, world_state, countries)
+    target_index, actor_rows = brain._target_index(world_state)
+    structure = target_index.structure
+    trust = world_state.relations.trust
+    rng = np.random.default_rng(4)
+
+    scanned = indexed = 0.0
+    for _ in range(ticks):
+        started = time.perf_counter()
+        for row in actor_rows.tolist():
+            weights = np.where(structure[row] > 0, structure[row] + np.maximum(0, -trust[row].astype(np.int32)), 0)
+            rng.choice(len(weights), p=weights / weights.sum())
+        scanned += time.perf_counter() - started
+
+        started = time.perf_counter()
+        target_index.sample(actor_rows, rng)
+        indexed += time.perf_counter() - started
+        brain._simulate_week(world_state)
+
+    in_sync = target_index.check(trust)
+    faster = indexed * 10 < scanned
+    print(f"   per-actor scans: {scanned / ticks * 1000:8.3f} ms/tick")
+    print(f"   Fenwick index:   {indexed / ticks * 1000:8.3f} ms/tick ({scanned / indexed:.1f}x)")
+    print(f"{'✅' if in_sync else '❌'} incremental index matches a rebuild after {ticks} ticks")
+    print(f"{'✅' if faster else '❌'} at least 10x faster")
+    return in_sync and faster
+
+
+async def bench_relation_aggregates(countries: int = 1000, ticks: int = 20) -> bool:
+    """Running tension and conflict aggregates must match, and beat, a full relation scan"""
+    print(f"\n🌡️  Relation aggregates with {countries} countries:")
+    brain = WorldBrain()
+    with contextlib.redirect_stdout(io.StringIO()):
+        world_state = await brain.initialize_world("bench-aggregates", seed=5)
+    _pad_world(brain, world_state, countries)
+    relations = world_state.relations
+
+    scanned = tracked = 0.0
+    consistent = True
+    for _ in range(ticks):
+        brain._simulate_week(world_state)
+        started = time.perf_counter()
+        full = relations.scan_aggregates()
+        scanned += time.perf_counter() - started
+
+        started = time.perf_counter()
+        running = relations.tension_stats()[0], relations.conflict_keys()
+        tracked += time.perf_counter() - started
+        consistent = consistent and running == (full[0], [relations.key_for(i, j) for i, j in sorted(full[1])])
+
+    faster = tracked * 10 < scanned
+    print(f"   full scan:        {scanned / ticks * 1000:8.3f} ms/tick")
+    print(f"   running totals:   {tracked / ticks * 1000:8.3f} ms/tick ({scanned / tracked:.1f}x)")
+    print(f"{'✅' if consistent else '❌'} running totals match the full scan every tick")
+    print(f"{'✅' if faster else '❌'} at least 10x faster")
+    return consistent and faster
+
+
+async def bench_map_history(countries: int = 1000, weeks: int = 104) -> bool:
+    """Retained map history must share unchanged entries instead of copying every country"""
+    print(f"\n🗺️  Map history for {countries} countries over {weeks} weeks:")
+    brain = WorldBrain()
+    with contextlib.redirect_stdout(io.StringIO()):
+        world_state = await brain.initialize_world("bench-map", seed=6)
+    _pad_world(brain, world_state, countries)
+    movers = list(world_state.countries.values())[:5]
+
+    def build(shared: bool) -> int:
+        tracemalloc.start()
+        previous, history = world_state.map_state, MapStateHistory(policy=brain.history_policy)
+        for week in range(weeks):
+            movers[week % len(movers)].stability += 1  # A handful of countries change each week
+            previous = brain._create_map_state(world_state.countries, world_state.relations, previous if shared else None)
+            history.append(previous)
+        del previous
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size
+
+    copied = build(shared=False)
+    shared = build(shared=True)
+    smaller = shared * 5 < copied
+    print(f"   copied snapshots: {copied / 1024:10.1f} KiB")
+    print(f"   shared snapshots: {shared / 1024:10.1f} KiB ({copied / shared:.1f}x smaller)")
+    print(f"{'✅' if smaller else '❌'} at least 5x smaller")
+    return smaller
+
+
+async def bench_tick_latency(ticks: int = 1000, window: int = 100) -> bool:
+    """Per-tick latency must stay flat as the simulation history grows"""
+    print(f"\n⏱️  Tick latency over {ticks} ticks:")
+    brain = WorldBrain()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await brain.initialize_world("bench", seed=42)
+
+    window_means = []
+    window_total = 0.0
+    for tick in range(1, ticks + 1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            await brain.tick("bench")
+            window_total += time.perf_counter() - started
+        if tick % window == 0:
+            window_means.append(window_total / window)
+            print(f"   ticks {tick - window + 1:>4}-{tick:<4} {window_means[-1] * 1000:8.3f} ms/tick")
+            window_total = 0.0
+
+    # Compare the last window against the first; quadratic growth shows up as a large ratio
+    ratio = window_means[-1] / window_means[0]
+    flat = ratio < 2.0
+    print(f"{'✅' if flat else '❌'} last/first window ratio: {ratio:.2f}")
+    return flat
+
+
+def _legacy_status_body(simulation_id, world_state) -> bytes:
+    """The status endpoint's previous path: rebuild dicts, validate with pydantic, JSON-encode"""
+    from .main import SimulationResponse
+    from fastapi.encoders import jsonable_encoder
+
+    formatted_news = [{
+        "title": news_item.headline,
+        "content": news_item.lede,
+        "country": news_item.country,
+        "category": news_item.category,
+        "severity": news_item.severity,
+        "reliability": news_item.reliability,
+        "source": news_item.source,
+        "timestamp": news_item.timestamp.isoformat()
+    } for news_item in world_state.news]
+    formatted_countries = {
+        country_id: {name: getattr(country, name) for name in serializer.COUNTRY_FIELDS}
+        for country_id, country in world_state.countries.items()
+    }
+    map_state = world_state.map_state
+    response = SimulationResponse(
+        id=simulation_id,
+        status="simulation_active",
+        current_date=world_state.current_date.strftime("%m/%d/%Y"),
+        countries=formatted_countries,
+        news=formatted_news,
+        map_state={
+            "global_tension": map_state.global_tension,
+            "bloc_distribution": map_state.bloc_distribution,
+            "active_conflicts": map_state.active_conflicts,
+            "country_states": map_state.country_states
+        },
+        global_indicators=world_state.global_indicators
+    )
+    return json.dumps(jsonable_encoder(response)).encode("utf-8")
+
+
+async def bench_status_serialization(countries: int = 200, news: int = 5000, requests: int = 20) -> bool:
+    """Cached-fragment status encoding must beat the pydantic path at realistic sizes"""
+    print(f"\n📦 Status serialization with {countries} countries and {news} news items:")
+    brain = WorldBrain()
+    with contextlib.redirect_stdout(io.StringIO()):
+        world_state = await brain.initialize_world("bench-serializer", seed=7)
+
+    # Pad the world out to the target size with copies of the loaded countries and articles
+    _pad_world(brain, world_state, countries)
+    world_state.news = [GeneratedNews(
+        headline=f"Headline {index}",
+        lede=f"Lede for article {index}",
+        content=f"Full content for article {index}. " * 20,
+        country="Global",
+        category="politics",
+        severity="medium",
+        reliability="likely",
+        source="Bench Wire",
+        timestamp=datetime(2025, 1, 1)
+    ) for index in range(news)]
+
+    def timed(render) -> float:
+        started = time.perf_counter()
+        for _ in range(requests):
+            render()
+        return (time.perf_counter() - started) / requests
+
+    legacy = timed(lambda: _legacy_status_body("bench-serializer", world_state))
+    serializer.render_simulation("bench-serializer", world_state, world_state.map_state, full_news=False)
+    cached = timed(lambda: serializer.render_simulation("bench-serializer", world_state, world_state.map_state, full_news=False))
+
+    legacy_body = json.loads(_legacy_status_body("bench-serializer", world_state))
+    cached_body = json.loads(serializer.render_simulation("bench-serializer", world_state, world_state.map_state, full_news=False))
+    identical = legacy_body == cached_body
+    faster = cached < legacy
+    print(f"   pydantic path: {legacy * 1000:8.3f} ms/request")
+    print(f"   cached path:   {cached * 1000:8.3f} ms/request ({legacy / cached:.1f}x, orjson={'yes' if serializer.orjson else 'no'})")
+    print(f"{'✅' if identical else '❌'} identical response bodies")
+    return faster and identical
+
+
+async def bench_fast_forward(weeks: int = 52, budget_seconds: float = 1.0) -> bool:
+    """A year of batched advance must fit in well under a second of CPU"""
+    print(f"\n⏩ Batched advance of {weeks} weeks:")
+    brain = WorldBrain()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await brain.initialize_world("bench-advance", seed=11)
+        started = time.process_time()
+        result = await brain.advance("bench-advance", weeks)
+        elapsed = time.process_time() - started
+    fast = elapsed < budget_seconds
+    print(f"   {elapsed * 1000:8.1f} ms CPU, {len(result['news'])} news articles")
+    print(f"{'✅' if fast else '❌'} under {budget_seconds:.1f}s CPU")
+    return fast
+
+
+def _json_snapshot(world_state) -> bytes:
+    """The nested dataclasses dumped to JSON, as a baseline for the snapshot format"""
+    relation_fields = ("country_a", "country_b", "trust_level", "trade_volume", "military_cooperation",
+                       "diplomatic_relations", "historical_conflicts", "cultural_affinity")
+    return json.dumps({
+        "countries": {country_id: asdict(country) for country_id, country in world_state.countries.items()},
+        "doctrines": {country_id: asdict(doctrine) for country_id, doctrine in world_state.doctrines.items()},
+        "relations": [{name: getattr(relation, name) for name in relation_fields}
+                      for relation in world_state.relations.values()],
+        "actions": [asdict(action) for action in world_state.actions],
+        "outcomes": [asdict(outcome) for outcome in world_state.outcomes],
+        "news": [{**asdict(news_item), "render_cache": {}} for news_item in world_state.news],
+        "map_states": [asdict(map_state) for map_state in world_state.map_states],
+        "global_indicators": world_state.global_indicators,
+    }, default=str).encode("utf-8")
+
+
+def _same_world(a, b) -> bool:
+    """Field-by-field comparison of two world states, including relation arrays and random streams"""
+    arrays = ("trust", "trade_volume", "military_cooperation", "diplomatic_relations", "cultural_affinity")
+    return (a.countries == b.countries and list(a.countries) == list(b.countries)
+            and a.doctrines == b.doctrines and a.news == b.news and a.actions == b.actions
+            and a.outcomes == b.outcomes and a.action_index == b.action_index
+            and list(a.map_states) == list(b.map_states) and a.global_indicators == b.global_indicators
+            and a.relations.country_ids == b.relations.country_ids
+            and all(np.array_equal(getattr(a.relations, name), getattr(b.relations, name)) for name in arrays)
+            and a.rng.getstate() == b.rng.getstate()
+            and a.np_rng.bit_generator.state == b.np_rng.bit_generator.state
+            and (a.seq, a.week_number, a.current_date, a.replay_path) == (b.seq, b.week_number, b.current_date, b.replay_path))
+
+
+async def bench_snapshot(countries: int = 200, weeks: int = 12, repeats: int = 10) -> bool:
+    """The binary snapshot format must round-trip exactly and beat JSON and compressed pickle on size"""
+    print(f"\n💾 World snapshots with {countries} countries after {weeks} weeks:")
+    brain = WorldBrain()
+    with contextlib.redirect_stdout(io.StringIO()):
+        world_state = await brain.initialize_world("bench-snapshot", seed=8)
+        _pad_world(brain, world_state, countries)
+        for _ in range(weeks):
+            world_state = await brain.tick("bench-snapshot")
+
+    def timed(run):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            result = run()
+        return result, (time.perf_counter() - started) / repeats
+
+    path = os.path.join(tempfile.mkdtemp(prefix="worldbrain_bench_"), "world.wbs")
+    json_data, json_dump = timed(lambda: _json_snapshot(world_state))
+    _, json_load = timed(lambda: json.loads(json_data))
+    pickle_data, pickle_dump = timed(lambda: pickle.dumps(world_state, protocol=pickle.HIGHEST_PROTOCOL))
+    _, pickle_load = timed(lambda: pickle.loads(pickle_data))
+    legacy_data, legacy_dump = timed(lambda: world_snapshot.LEGACY_SNAPSHOT_MAGIC + zlib.compress(pickle_data, 6))
+    _, legacy_load = timed(lambda: world_snapshot.loads_world_state(legacy_data))
+    data, dump = timed(lambda: world_snapshot.dumps_world_state(world_state))
+    loaded, load = timed(lambda: world_snapshot.loads_world_state(data))
+    _, save = timed(lambda: world_snapshot.save_world_state(world_state, path))
+    mapped, mapped_load = timed(lambda: world_snapshot.load_world_state(path))
+
+    print(f"   {'format':<22}{'bytes':>11}{'dump ms':>10}{'load ms':>10}")
+    for name, size, dumped, read in (
+        ("JSON (parse only)", len(json_data), json_dump, json_load),
+        ("pickle", len(pickle_data), pickle_dump, pickle_load),
+        ("pickle + zlib (v1)", len(legacy_data), legacy_dump, legacy_load),
+        ("binary v2", len(data), dump, load),
+        ("binary v2 file, mmap", os.path.getsize(path), save, mapped_load),
+    ):
+        print(f"   {name:<22}{size:>11}{dumped * 1000:>10.2f}{read * 1000:>10.2f}")
+
+    identical = _same_world(world_state, loaded) and _same_world(world_state, mapped)
+    zero_copy = mapped.relations.trust.base is not None and mapped.relations.trust.flags.writeable
+    smaller = len(data) < len(legacy_data) and len(data) * 10 < len(json_data)
+    print(f"{'✅' if identical else '❌'} identical round trip from bytes and from a memory-mapped file")
+    print(f"{'✅' if zero_copy else '❌'} memory-mapped relation arrays are writable views of the file")
+    print(f"{'✅' if smaller else '❌'} smaller than compressed pickle and 10x smaller than JSON")
+    return identical and zero_copy and smaller
+
+
+async def main():
+    results = [
+        await bench_tick_latency(),
+        await bench_status_serialization(),
+        await bench_fast_forward(),
+        await bench_action_generation(),
+        await bench_target_selection(),
+        await bench_relation_aggregates(),
+        await bench_map_history(),
+        await bench_snapshot(),
+    ]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
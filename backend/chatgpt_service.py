@@ -4,21 +4,30 @@ Simple ChatGPT Service for World Brain
 """
 
 import os
+import re
 import json
-import random
-import asyncio
-import aiohttp
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
 
+from http_pool import PooledSession
+from llm_cache import completion_cache_key, create_llm_cache_from_env
+from single_flight import SingleFlight
+
 load_dotenv()
 
 class ChatGPTService:
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY')
         print(f"ChatGPT Service Init - API Key exists: {bool(self.api_key)}")
-        self.base_url = "https://api.openai.com/v1"
+        self.base_url = os.getenv('OPENAI_BASE_URL', "https://api.openai.com/v1")
+        # One pooled session for every completion so requests reuse TCP+TLS connections
+        self.http = PooledSession(limit_per_host=int(os.getenv('OPENAI_MAX_CONNECTIONS', '10')))
+        self.model = "gpt-4"
+        self.temperature = 0.1  # Very low temperature to force consistent formatting
+        # Identical low-temperature prompts are served from cache instead of the API
+        self.cache = create_llm_cache_from_env()
+        # Concurrent identical requests share one API call
+        self.flight = SingleFlight()
         self.client = bool(self.api_key)  # Just use a flag to indicate if we have an API key
         if self.client:
             print("ChatGPT Service Init - Client created successfully")
@@ -31,50 +40,157 @@ class ChatGPTService:
                                            event_type: str,
                                            impact_level: int,
                                            system_message: Optional[str] = None,
-                                           prompt: Optional[str] = None) -> Dict[str, Any]:
+                                           prompt: Optional[str] = None,
+                                           bypass_cache: bool = False) -> Dict[str, Any]:
         """Generate psychohistorically accurate news using ChatGPT"""
         
         if not self.client:
             return self._generate_fallback_news(country, event_type, impact_level)
         
+        content = await self._chat_completion(
+            system_message if system_message else "You are a news archive. Output ONLY the requested articles in the exact format shown.",
+            prompt if prompt else "Generate a news article",
+            max_tokens=1000,
+            bypass_cache=bypass_cache
+        )
+        if content is None:
+            return self._generate_fallback_news(country, event_type, impact_level)
+        return {"content": content}
+    
+    async def generate_psychohistorical_news_batch(self,
+                                                   world_state: Dict[str, Any],
+                                                   events: List[Tuple[str, str, int]],
+                                                   bypass_cache: bool = False) -> List[Optional[Dict[str, Any]]]:
+        """Generate one article per (country, event_type, impact_level) event in a single completion
+        
+        Returns a list aligned with ``events``; entries are None where no article
+        could be parsed so callers can fall back per event.
+        """
+        if not events:
+            return []
+        if not self.client:
+            return [None] * len(events)
+        
+        event_lines = "\n".join(
+            f"Event {i}: {event_type} event involving {country} (impact {impact_level}/100)"
+            for i, (country, event_type, impact_level) in enumerate(events, start=1)
+        )
+        prompt = f"""Write {len(events)} separate news articles, one for each event below.
+
+{event_lines}
+
+World context:
+- Global tension: {world_state.get('global_tension', 0)}/100
+- Active conflicts: {world_state.get('active_conflicts', 0)}
+- Major powers: {', '.join(world_state.get('major_powers', [])[:10])}
+
+Output every article in this EXACT format, separated by one blank line:
+ARTICLE <event number>
+HEADLINE: Headline text
+SEVERITY: low, medium, high or critical
+RELIABILITY: confirmed, likely, uncertain or disputed
+SOURCE: News outlet name
+CONTENT: Two or three sentences of article text."""
+        
+        content = await self._chat_completion(
+            "You are a news wire. Output ONLY the requested articles in the exact format shown.",
+            prompt,
+            max_tokens=min(4000, 350 * len(events)),
+            bypass_cache=bypass_cache
+        )
+        if content is None:
+            return [None] * len(events)
+        return self._parse_article_batch(content, len(events))
+    
+    async def _chat_completion(self, system_message: str, prompt: str, max_tokens: int, bypass_cache: bool = False) -> Optional[str]:
+        """Run a chat completion and return the message text, or None on failure
+        
+        Successful responses are cached by request content; ``bypass_cache``
+        forces a fresh completion without reading or writing the cache.
+        """
+        if bypass_cache:
+            self.cache.record_bypass()
+            return await self._request_completion(system_message, prompt, max_tokens)
+        
+        cache_key = completion_cache_key(self.model, system_message, prompt, self.temperature, max_tokens)
+        cached = await self.cache.get_async(cache_key)
+        if cached is not None:
+            return cached
+        
+        async def fetch() -> Optional[str]:
+            content = await self._request_completion(system_message, prompt, max_tokens)
+            if content is not None:
+                await self.cache.set_async(cache_key, content)
+            return content
+        
+        return await self.flight.do(cache_key, fetch)
+    
+    async def _request_completion(self, system_message: str, prompt: str, max_tokens: int) -> Optional[str]:
+        """Send a chat completion request to the API"""
         try:
-            # Create SSL context that doesn't verify certificates (for development)
-            import ssl
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "gpt-4",
-                        "messages": [
-                            {"role": "system", "content": system_message if system_message else "You are a news archive. Output ONLY the requested articles in the exact format shown."},
-                            {"role": "user", "content": prompt if prompt else "Generate a news article"}
-                        ],
-                        "temperature": 0.1,  # Very low temperature to force consistent formatting
-                        "max_tokens": 1000
-                    }
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return {"content": result["choices"][0]["message"]["content"].strip()}
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ API Error: {response.status} - {error_text}")
-                        return self._generate_fallback_news(country, event_type, impact_level)
+            session = await self.http.get()
+            async with session.post(
+                f"{self.base_url}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_message},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": self.temperature,
+                    "max_tokens": max_tokens
+                }
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    return result["choices"][0]["message"]["content"].strip()
+                else:
+                    error_text = await response.text()
+                    print(f"❌ API Error: {response.status} - {error_text}")
+                    return None
             
         except Exception as e:
             print(f"ChatGPT API error: {e}")
             print(f"Error type: {type(e)}")
             print(f"Error details: {str(e)}")
-            return self._generate_fallback_news(country, event_type, impact_level)
+            return None
+    
+    def _parse_article_batch(self, content: str, expected: int) -> List[Optional[Dict[str, Any]]]:
+        """Split a multi-article completion back into per-event article dicts"""
+        articles: List[Optional[Dict[str, Any]]] = [None] * expected
+        blocks = re.split(r"^\s*ARTICLE\s+(\d+)\s*$", content, flags=re.MULTILINE)
+        # re.split yields [preamble, number, body, number, body, ...]
+        for number, body in zip(blocks[1::2], blocks[2::2]):
+            index = int(number) - 1
+            if not 0 <= index < expected:
+                continue
+            fields: Dict[str, str] = {}
+            current = None
+            for line in body.strip().splitlines():
+                match = re.match(r"^(HEADLINE|SEVERITY|RELIABILITY|SOURCE|CONTENT):\s*(.*)$", line.strip())
+                if match:
+                    current = match.group(1).lower()
+                    fields[current] = match.group(2).strip()
+                elif current == "content" and line.strip():
+                    fields["content"] += " " + line.strip()
+            if not fields.get("headline") or not fields.get("content"):
+                print(f"⚠️ Invalid article format in batch response for article {number}")
+                continue
+            severity = fields.get("severity", "").lower()
+            reliability = fields.get("reliability", "").lower()
+            articles[index] = {
+                "headline": fields["headline"],
+                "content": fields["content"],
+                "severity": severity if severity in ("low", "medium", "high", "critical") else "medium",
+                "reliability": reliability if reliability in ("confirmed", "likely", "uncertain", "disputed") else "likely",
+                "source": fields.get("source") or "Reuters",
+                "stat_changes": {}
+            }
+        return articles
     
     def _generate_fallback_news(self, country: str, event_type: str, impact_level: int) -> Dict[str, Any]:
         """Generate fallback news when ChatGPT is unavailable"""
@@ -94,4 +210,12 @@ async def get_chatgpt_service() -> ChatGPTService:
     global _chatgpt_service
     if _chatgpt_service is None:
         _chatgpt_service = ChatGPTService()
-    return _chatgpt_service
\ No newline at end of file
+        if _chatgpt_service.client:
+            # Open the pooled session inside the running event loop
+            await _chatgpt_service.http.get()
+    return _chatgpt_service
+
+async def close_chatgpt_service():
+    """Close the global service's pooled HTTP session"""
+    if _chatgpt_service is not None:
+        await _chatgpt_service.http.close()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Ensemble - Headless Monte Carlo runs of the World Brain engine
+Runs many seeded simulations without news generation across worker processes
+and aggregates per-week outcome distributions as results stream in.
+
+Run from the repository root:
+    python -m backend.ensemble --runs 1000 --weeks 52 --seed 1
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .simulation_history import HistoryPolicy, compact_world_state
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Headless runs only need the current map state; keep nothing else around
+HEADLESS_HISTORY = HistoryPolicy(full_snapshots=1, max_delta_weeks=0, recent_action_weeks=1, max_news=0)
+
+
+class WeeklyHistogram:
+    """Per-week counts of a non-negative integer metric; memory is O(weeks x distinct values)"""
+
+    def __init__(self, weeks: int, bins: int = 1):
+        self.counts = np.zeros((weeks, bins), dtype=np.int64)
+
+    def add_run(self, values: Sequence[int]):
+        values = np.asarray(values, dtype=np.int64)
+        self._grow(int(values.max()) + 1 if values.size else 1)
+        self.counts[np.arange(len(values)), values] += 1
+
+    def merge(self, other: "WeeklyHistogram"):
+        self._grow(other.counts.shape[1])
+        self.counts[:, :other.counts.shape[1]] += other.counts
+
+    def _grow(self, bins: int):
+        if bins > self.counts.shape[1]:
+            grown = np.zeros((self.counts.shape[0], bins), dtype=np.int64)
+            grown[:, :self.counts.shape[1]] = self.counts
+            self.counts = grown
+
+    def percentiles(self, percentiles: Sequence[float]) -> Dict[str, List[int]]:
+        """Nearest-rank percentiles for every week"""
+        cumulative = np.cumsum(self.counts, axis=1)
+        totals = cumulative[:, -1]
+        result = {}
+        for percentile in percentiles:
+            ranks = np.maximum(1, np.ceil(totals * percentile / 100.0)).astype(np.int64)
+            result[f"p{percentile:g}"] = [
+                int(np.searchsorted(row, rank)) for row, rank in zip(cumulative, ranks)
+            ]
+        return result
+
+    def means(self) -> List[float]:
+        totals = self.counts.sum(axis=1)
+        weighted = self.counts @ np.arange(self.counts.shape[1])
+        return [round(float(value), 3) for value in weighted / np.maximum(1, totals)]
+
+
+@dataclass
+class EnsembleResult:
+    """Streaming aggregate of ensemble runs"""
+    weeks: int
+    runs: int = 0
+    tension: Optional[WeeklyHistogram] = None
+    conflicts: Optional[WeeklyHistogram] = None
+    bloc_totals: Optional[Dict[str, List[int]]] = None  # Summed per-week country count per bloc
+
+    def __post_init__(self):
+        self.tension = self.tension or WeeklyHistogram(self.weeks, 101)
+        self.conflicts = self.conflicts or WeeklyHistogram(self.weeks)
+        self.bloc_totals = self.bloc_totals or {}
+
+    def merge(self, other: "EnsembleResult"):
+        self.runs += other.runs
+        self.tension.merge(other.tension)
+        self.conflicts.merge(other.conflicts)
+        for bloc, totals in other.bloc_totals.items():
+            mine = self.bloc_totals.setdefault(bloc, [0] * self.weeks)
+            for week, value in enumerate(totals):
+                mine[week] += value
+
+    def summary(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "weeks": self.weeks,
+            "global_tension": {"mean": self.tension.means(), **self.tension.percentiles(percentiles)},
+            "active_conflicts": {"mean": self.conflicts.means(), **self.conflicts.percentiles(percentiles)},
+            "bloc_distribution_mean": {
+                bloc: [round(value / max(1, self.runs), 3) for value in totals]
+                for bloc, totals in sorted(self.bloc_totals.items())
+            },
+        }
+
+
+def run_seeds(base_seed: int, runs: int) -> List[int]:
+    """Independent per-run seeds derived from one base seed"""
+    children = np.random.SeedSequence(base_seed).spawn(runs)
+    return [int(child.generate_state(1, dtype=np.uint64)[0]) for child in children]
+
+
+def _run_chunk(seeds: Sequence[int], weeks: int, start_month: Optional[int], start_year: Optional[int]) -> EnsembleResult:
+    """Worker entry point: simulate each seed headlessly and aggregate the chunk"""
+    from .world_brain import WorldBrain
+
+    logging.disable(logging.INFO)
+    brain = WorldBrain(history_policy=HEADLESS_HISTORY)
+    result = EnsembleResult(weeks=weeks)
+    for seed in seeds:
+        world_state = brain.create_world_state(start_month, start_year, seed=seed)
+        tension, conflicts = [], []
+        for week in range(weeks):
+            brain._simulate_week(world_state)
+            compact_world_state(world_state, brain.history_policy)
+            map_state = world_state.map_state
+            tension.append(max(0, min(100, map_state.global_tension)))
+            conflicts.append(len(map_state.active_conflicts))
+            for bloc, count in map_state.bloc_distribution.items():
+                result.bloc_totals.setdefault(bloc, [0] * weeks)[week] += count
+        result.tension.add_run(tension)
+        result.conflicts.add_run(conflicts)
+        result.runs += 1
+    return result
+
+
+def run_ensemble(runs: int, weeks: int, seed: int = 0, start_month: Optional[int] = None,
+                 start_year: Optional[int] = None, workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None, executor: Optional[Executor] = None) -> EnsembleResult:
+    """Run ``runs`` seeded simulations of ``weeks`` weeks and aggregate them as chunks complete
+
+    Chunks go to ``executor`` when one is given (sized for ``workers``), otherwise
+    to a process pool created for this call.
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = run_seeds(seed, runs)
+    chunk_size = chunk_size or max(1, math.ceil(runs / (workers * 4)))
+    chunks = [seeds[index:index + chunk_size] for index in range(0, runs, chunk_size)]
+
+    result = EnsembleResult(weeks=weeks)
+    if executor is not None:
+        _merge_chunks(executor, chunks, weeks, start_month, start_year, result)
+    elif workers == 1:
+        for chunk in chunks:
+            result.merge(_run_chunk(chunk, weeks, start_month, start_year))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            _merge_chunks(pool, chunks, weeks, start_month, start_year, result)
+    return result
+
+
+def _merge_chunks(executor: Executor, chunks: List[List[int]], weeks: int, start_month: Optional[int],
+                  start_year: Optional[int], result: EnsembleResult):
+    futures = [executor.submit(_run_chunk, chunk, weeks, start_month, start_year) for chunk in chunks]
+    try:
+        for future in as_completed(futures):
+            result.merge(future.result())
+    finally:
+        # On failure, don't leave the rest of this ensemble queued in a shared pool
+        for future in futures:
+            future.cancel()
+
+
+class EnsembleRunner:
+    """Ensembles requested through the API, on one process pool kept for the app's lifetime
+
+    At most ``max_concurrent`` ensembles use the pool at once; later requests
+    wait their turn, so ensembles never take more than ``workers`` processes.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_concurrent: int = 1):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_concurrent = max(1, max_concurrent)
+        self._executor: Optional[ProcessPoolExecutor] = None  # Started on first use
+        self._slots: Optional[asyncio.Semaphore] = None  # Created on first use, inside the running loop
+        self.running = 0
+        self.waiting = 0
+        self.metrics: Dict[str, float] = {
+            "ensembles": 0,
+            "runs": 0,
+            "failures": 0,
+            "wait_ms_max": 0.0,
+            "run_ms_max": 0.0,
+        }
+
+    async def run(self, runs: int, weeks: int, seed: int = 0, start_month: Optional[int] = None,
+                  start_year: Optional[int] = None) -> EnsembleResult:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.metrics["wait_ms_max"] = max(self.metrics["wait_ms_max"], (started - queued_at) * 1000)
+        self.running += 1
+        try:
+            if self._executor is None and self.workers > 1:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            # The pool blocks while it collects results, so keep it off the event loop
+            result = await asyncio.to_thread(run_ensemble, runs, weeks, seed, start_month, start_year,
+                                             self.workers, executor=self._executor)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next ensemble
+            self.metrics["failures"] += 1
+            self._executor = None
+            raise
+        except Exception:
+            self.metrics["failures"] += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+        self.metrics["ensembles"] += 1
+        self.metrics["runs"] += runs
+        self.metrics["run_ms_max"] = max(self.metrics["run_ms_max"], (time.perf_counter() - started) * 1000)
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {**self.metrics, "workers": self.workers, "running": self.running, "waiting": self.waiting}
+
+
+def create_ensemble_runner_from_env() -> EnsembleRunner:
+    """Build the runner from ENSEMBLE_WORKERS (empty: one per CPU) and ENSEMBLE_MAX_CONCURRENT"""
+    workers = int(os.getenv("ENSEMBLE_WORKERS", "0") or 0)
+    return EnsembleRunner(workers=workers if workers > 0 else None,
+                          max_concurrent=int(os.getenv("ENSEMBLE_MAX_CONCURRENT", "1") or 1))
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Run a headless World Brain Monte Carlo ensemble")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-month", type=int)
+    parser.add_argument("--start-year", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--percentiles", type=float, nargs="+", default=list(DEFAULT_PERCENTILES))
+    args = parser.parse_args(argv)
+
+    result = run_ensemble(args.runs, args.weeks, args.seed, args.start_month, args.start_year, args.workers)
+    json.dump(result.summary(args.percentiles), sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
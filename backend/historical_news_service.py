@@ -19,7 +19,7 @@ class HistoricalNewsService:
         self.api_key = os.getenv('NEWS_API_KEY')
         self.base_url = "https://newsapi.org/v2"  # Changed from api.newsapi.org to newsapi.org
         
-    async def get_historical_news(self, year: int, month: int) -> List[Dict[str, Any]]:
+    async def get_historical_news(self, year: int, month: int, bypass_cache: bool = False) -> List[Dict[str, Any]]:
         """Get historical news for a specific month and year using ChatGPT"""
         from chatgpt_service import get_chatgpt_service
         
@@ -91,7 +91,8 @@ SOURCE: The New York Times"""
                 country="Global",
                 event_type="historical",
                 impact_level=90,  # High impact for verified historical events
-                system_message=system_message
+                system_message=system_message,
+                bypass_cache=bypass_cache
             )
             
             # Parse the response and verify historical accuracy
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+HTTP Pool - Shared, long-lived aiohttp sessions for outbound API calls
+Keeps TCP+TLS connections alive between requests and counts connection reuse
+"""
+
+import ssl
+from typing import Dict, Optional
+
+import aiohttp
+
+
+class PooledSession:
+    """Lazily created aiohttp session with keep-alive, per-host limits and DNS caching"""
+
+    def __init__(self,
+                 limit: int = 100,
+                 limit_per_host: int = 10,
+                 keepalive_timeout: float = 60.0,
+                 dns_cache_ttl: int = 300,
+                 verify_ssl: bool = True):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.verify_ssl = verify_ssl
+        self.metrics: Dict[str, int] = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+        }
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def get(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    ssl=self._ssl_context(),
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    use_dns_cache=True,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                ),
+                trace_configs=[self._trace_config()],
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _ssl_context(self):
+        if self.verify_ssl:
+            return None  # aiohttp's default: verify certificates and host names
+        # Only for callers that opt out explicitly: accept any certificate
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        return ssl_context
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self.metrics["requests"] += 1
+
+        async def on_connection_create_end(session, context, params):
+            self.metrics["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self.metrics["connections_reused"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def get_metrics(self) -> Dict[str, int]:
+        return dict(self.metrics)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+LLM Cache - Content-addressed cache for chat completion responses
+In-memory LRU tier with an optional on-disk SQLite tier and a shared TTL.
+Coroutines use ``get_async``/``set_async``, which run the SQLite tier in a
+worker thread so disk reads and commits never block the event loop.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+def completion_cache_key(model: str, system_message: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    """Hash every request parameter that affects the completion text"""
+    payload = json.dumps([model, system_message, prompt, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier (memory LRU, optional SQLite) cache of completion text keyed by request hash"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400.0, db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()  # Guards the memory tier
+        self._db_lock = threading.Lock()  # Serializes the SQLite connection
+        self.metrics: Dict[str, int] = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "bypassed": 0,
+        }
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, created_at REAL NOT NULL, content TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        content = self._get_memory(key)
+        if content is None:
+            content = self._get_disk(key)
+        return content
+
+    def set(self, key: str, content: str):
+        created_at = time.time()
+        self._set_memory(key, created_at, content)
+        self._set_disk(key, created_at, content)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """``get`` from a coroutine: memory hits return inline, SQLite lookups run in a thread"""
+        content = self._get_memory(key)
+        if content is None:
+            content = await asyncio.to_thread(self._get_disk, key) if self._db is not None else self._get_disk(key)
+        return content
+
+    async def set_async(self, key: str, content: str):
+        """``set`` from a coroutine: the SQLite write and commit run in a thread"""
+        created_at = time.time()
+        self._set_memory(key, created_at, content)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_disk, key, created_at, content)
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        """Fresh memory-tier entry, counted as a hit; expired entries are dropped"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, content = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.metrics["hits"] += 1
+                    return content
+                del self._memory[key]
+        return None
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        """Fresh SQLite-tier entry, promoted to memory; counts the miss when there is none"""
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute("SELECT created_at, content FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and time.time() - row[0] <= self.ttl_seconds:
+                with self._lock:
+                    self._remember(key, row[0], row[1])
+                    self.metrics["disk_hits"] += 1
+                return row[1]
+        with self._lock:
+            self.metrics["misses"] += 1
+        return None
+
+    def _set_memory(self, key: str, created_at: float, content: str):
+        with self._lock:
+            self._remember(key, created_at, content)
+            self.metrics["stores"] += 1
+
+    def _set_disk(self, key: str, created_at: float, content: str):
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, created_at, content) VALUES (?, ?, ?)",
+                (key, created_at, content),
+            )
+            self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (created_at - self.ttl_seconds,))
+            self._db.commit()
+
+    def _remember(self, key: str, created_at: float, content: str):
+        self._memory[key] = (created_at, content)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.metrics["evictions"] += 1
+
+    def record_bypass(self):
+        self.metrics["bypassed"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {**self.metrics, "entries": len(self._memory)}
+
+
+def create_llm_cache_from_env() -> LLMResponseCache:
+    """Build the cache from LLM_CACHE_* environment variables"""
+    return LLMResponseCache(
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")),
+        db_path=os.getenv("LLM_CACHE_DB") or None,
+    )
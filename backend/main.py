@@ -3,10 +3,11 @@
 FastAPI Backend for World Brain Simulation
 """
 
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Any, Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Any, Optional
 import logging
 import uuid
 from datetime import datetime
@@ -18,12 +19,26 @@ world_brain = get_world_brain()
 from .world_data_service import world_data_service
 from .world_leaders_service import world_leaders_service
 from .historical_news_service import get_historical_news_service
-from .refdata.router import router as ref_router
+from .static_payloads import static_payloads
+from . import simulation_serializer as serializer
+from .tick_stream import tick_broadcaster
+from .ensemble import create_ensemble_runner_from_env
+from .sharding import create_shard_router_from_env
+from .refdata.router import router as ref_router, wb_flight, wb_http, indicator_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Push every tick's diff to stream subscribers
+world_brain.add_tick_listener(tick_broadcaster.publish)
+
+# Owning worker of each simulation when several workers run (see shard_server)
+shard_router = create_shard_router_from_env()
+
+# One process pool for Monte Carlo ensembles, shared by all requests
+ensemble_runner = create_ensemble_runner_from_env()
+
 app = FastAPI(title="World Brain API", version="1.0.0")
 
 # CORS middleware
@@ -35,6 +50,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Forward simulation calls to the worker that holds the simulation in memory
+app.middleware("http")(shard_router.dispatch)
+
 # Reference data router
 app.include_router(ref_router, prefix="/ref", tags=["refdata"])
 
@@ -44,6 +62,15 @@ class SimulationCreateRequest(BaseModel):
     start_month: int
     start_year: int
     use_present: bool = True  # If True, use World Brain, if False use historical news
+    fresh_news: bool = False  # If True, skip the LLM response cache and generate new text
+
+class EnsembleRequest(BaseModel):
+    runs: int = Field(100, ge=1, le=1000)
+    weeks: int = Field(52, ge=1, le=520)
+    seed: int = 0
+    start_month: Optional[int] = None
+    start_year: Optional[int] = None
+    percentiles: List[Annotated[float, Field(ge=0, le=100)]] = Field([5, 25, 50, 75, 95], min_length=1, max_length=20)
 
 class SimulationResponse(BaseModel):
     id: str
@@ -54,6 +81,12 @@ class SimulationResponse(BaseModel):
     map_state: Dict[str, Any]
     global_indicators: Dict[str, Any]
 
+class SimulationStatusResponse(SimulationResponse):
+    delta: bool  # True when only changes after ``since`` are included
+    cursor: int  # Pass as ``since`` on the next poll
+    tick_seq: int  # Sequence number of the latest tick
+    has_more: bool  # More news waiting after ``cursor``
+
 class NewsArticle(BaseModel):
     title: str
     content: str
@@ -109,6 +142,54 @@ async def health_check():
         chatgpt_available=chatgpt_available
     )
 
+@app.on_event("startup")
+async def start_background_tasks():
+    """Load stored World Bank indicators, start their background refresh and the idle simulation sweep"""
+    await indicator_store.start()
+    await world_brain.start()
+
+@app.on_event("shutdown")
+async def close_http_sessions():
+    """Stop background tasks and close pooled outbound HTTP sessions"""
+    await indicator_store.stop()
+    await world_brain.stop()
+    await wb_http.close()
+    await shard_router.close()
+    ensemble_runner.shutdown()
+    try:
+        from chatgpt_service import close_chatgpt_service
+        await close_chatgpt_service()
+        from simple_chatgpt_service import close_simple_chatgpt_service
+        await close_simple_chatgpt_service()
+    except Exception as e:
+        logger.warning(f"Error closing HTTP sessions: {e}")
+
+@app.get("/metrics")
+async def get_metrics():
+    """Runtime counters for outbound API usage"""
+    metrics: Dict[str, Any] = {
+        "worldbank_single_flight": wb_flight.get_metrics(),
+        "worldbank_indicators": indicator_store.get_metrics(),
+        "tick_stream": tick_broadcaster.get_metrics(),
+        "sharding": shard_router.get_metrics(),
+        "tick_scheduler": world_brain.scheduler.get_metrics(),
+        "ensembles": ensemble_runner.get_metrics()
+    }
+    if world_brain.result_cache is not None:
+        metrics["seeded_result_cache"] = world_brain.result_cache.get_metrics()
+    if world_brain.store is not None:
+        metrics["simulation_store"] = world_brain.store.get_metrics()
+        metrics["resident_simulations"] = world_brain.simulations.get_metrics()
+    try:
+        from chatgpt_service import get_chatgpt_service
+        chatgpt_service = await get_chatgpt_service()
+        metrics["chatgpt_http"] = chatgpt_service.http.get_metrics()
+        metrics["llm_cache"] = chatgpt_service.cache.get_metrics()
+        metrics["chatgpt_single_flight"] = chatgpt_service.flight.get_metrics()
+    except Exception as e:
+        logger.warning(f"ChatGPT metrics unavailable: {e}")
+    return metrics
+
 # Game session storage (in-memory for now)
 game_sessions = {}
 
@@ -147,15 +228,10 @@ async def get_game_status(session_id: str):
     return game_sessions[session_id]
 
 @app.post("/worldbrain/create", response_model=SimulationResponse)
-async def create_world_brain_simulation(request: SimulationCreateRequest, response: Response):
+async def create_world_brain_simulation(request: SimulationCreateRequest):
     """Create a new World Brain simulation"""
-    # Add cache-busting headers
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
-    
     try:
-        simulation_id = str(uuid.uuid4())
+        simulation_id = shard_router.new_simulation_id()
         
         # Check if the requested date is in the past
         current_date = datetime.now()
@@ -167,7 +243,8 @@ async def create_world_brain_simulation(request: SimulationCreateRequest, respon
             historical_service = await get_historical_news_service()
             historical_news = await historical_service.get_historical_news(
                 request.start_year,
-                request.start_month
+                request.start_month,
+                bypass_cache=request.fresh_news
             )
             
             # Create a basic map state for historical view using world_brain's MapState
@@ -212,62 +289,14 @@ async def create_world_brain_simulation(request: SimulationCreateRequest, respon
                 simulation_id, 
                 request.seed,
                 request.start_month,
-                request.start_year
+                request.start_year,
+                fresh_news=request.fresh_news
             )
         
-        # Format news for frontend
-        formatted_news = []
-        for news_item in world_state.news:
-            news_data = {
-                "title": news_item.headline,
-                "content": news_item.content,  # Use full content instead of just lede
-                "country": news_item.country,
-                "category": news_item.category,
-                "severity": news_item.severity,
-                "reliability": news_item.reliability,
-                "source": news_item.source,
-                "timestamp": news_item.timestamp.isoformat()
-            }
-            
-            # Add URL if available (for real news articles)
-            if "url" in news_item.stat_changes:
-                news_data["url"] = news_item.stat_changes["url"]
-            
-            formatted_news.append(news_data)
-        
-        # Format countries for frontend
-        formatted_countries = {}
-        for country_id, country_data in world_state.countries.items():
-            formatted_countries[country_id] = {
-                "name": country_data.name,
-                "gdp": country_data.gdp,
-                "population": country_data.population,
-                "military_budget": country_data.military_budget,
-                "nuclear_warheads": country_data.nuclear_warheads,
-                "regime_type": country_data.regime_type,
-                "bloc": country_data.bloc,
-                "alliances": country_data.alliances,
-                "stability": country_data.stability,
-                "morale": country_data.morale,
-                "influence_level": country_data.influence_level
-            }
-        
-        # Format map state for frontend
-        formatted_map_state = {
-            "global_tension": world_state.map_state.global_tension,
-            "bloc_distribution": world_state.map_state.bloc_distribution,
-            "active_conflicts": world_state.map_state.active_conflicts,
-            "country_states": world_state.map_state.country_states
-        }
-        
-        return SimulationResponse(
-            id=simulation_id,
-            status="simulation_active",
-            current_date=world_state.current_date.strftime("%m/%d/%Y"),
-            countries=formatted_countries,
-            news=formatted_news,
-            map_state=formatted_map_state,
-            global_indicators=world_state.global_indicators
+        # Cached per-article and per-country fragments, assembled without pydantic revalidation
+        return serializer.json_response(
+            serializer.render_simulation(simulation_id, world_state, world_state.map_state),
+            headers=serializer.NO_CACHE_HEADERS  # Cache-busting headers
         )
     
     except HTTPException:
@@ -277,44 +306,20 @@ async def create_world_brain_simulation(request: SimulationCreateRequest, respon
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/worldbrain/{simulation_id}/advance-month")
-async def advance_world_brain_month(simulation_id: str, response: Response):
+async def advance_world_brain_month(simulation_id: str):
     """Advance the simulation by one month"""
-    # Add cache-busting headers
-    response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-    response.headers["Pragma"] = "no-cache"
-    response.headers["Expires"] = "0"
-    
     try:
         result = await world_brain.advance_month(simulation_id)
         
-        # Format news for frontend
-        formatted_news = []
-        for news_item in result["news"]:
-            news_data = {
-                "title": news_item.headline,
-                "content": news_item.content,
-                "country": news_item.country,
-                "category": news_item.category,
-                "severity": news_item.severity,
-                "reliability": news_item.reliability,
-                "source": news_item.source,
-                "timestamp": news_item.timestamp.isoformat()
-            }
-            
-            # Add URL if available (for real news articles)
-            if "url" in news_item.stat_changes:
-                news_data["url"] = news_item.stat_changes["url"]
-            
-            formatted_news.append(news_data)
-        
-        return {
-            "simulation_id": simulation_id,
-            "current_date": result["current_date"].strftime("%m/%d/%Y"),
-            "news": formatted_news,
-            "map_state": result["map_state"],
-            "global_indicators": result["global_indicators"],
-            "use_historical_news": result["use_historical_news"]
-        }
+        world_state = await world_brain.get_simulation(simulation_id)
+        return serializer.json_response(serializer.assemble({
+            "simulation_id": serializer.encode(simulation_id),
+            "current_date": serializer.encode(result["current_date"].strftime("%m/%d/%Y")),
+            "news": serializer.news_list(result["news"]),
+            "map_state": serializer.map_state_object(world_state, result["map_state"]),
+            "global_indicators": serializer.encode(result["global_indicators"]),
+            "use_historical_news": serializer.encode(result["use_historical_news"])
+        }), headers=serializer.NO_CACHE_HEADERS)
     
     except HTTPException:
         raise
@@ -322,63 +327,51 @@ async def advance_world_brain_month(simulation_id: str, response: Response):
         logger.error(f"Error advancing month: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/worldbrain/{simulation_id}/status", response_model=SimulationResponse)
-async def get_world_brain_status(simulation_id: str):
-    """Get current status of a simulation"""
+@app.post("/worldbrain/{simulation_id}/advance")
+async def advance_world_brain(simulation_id: str, weeks: int = Query(1, ge=1, le=520),
+                              top_k: Optional[int] = Query(None, ge=0, le=100)):
+    """Advance the simulation several weeks, with news written once for the top-K events"""
     try:
-        if simulation_id not in world_brain.simulations:
+        if await world_brain.get_simulation(simulation_id) is None:
             raise HTTPException(status_code=404, detail="Simulation not found")
         
-        world_state = world_brain.simulations[simulation_id]
+        result = await world_brain.advance(simulation_id, weeks, top_k)
         
-        # Format news for frontend
-        formatted_news = []
-        for news_item in world_state.news:
-            formatted_news.append({
-                "title": news_item.headline,
-                "content": news_item.lede,
-                "country": news_item.country,
-                "category": news_item.category,
-                "severity": news_item.severity,
-                "reliability": news_item.reliability,
-                "source": news_item.source,
-                "timestamp": news_item.timestamp.isoformat()
-            })
-        
-        # Format countries for frontend
-        formatted_countries = {}
-        for country_id, country in world_state.countries.items():
-            formatted_countries[country_id] = {
-                "name": country.name,
-                "gdp": country.gdp,
-                "population": country.population,
-                "military_budget": country.military_budget,
-                "nuclear_warheads": country.nuclear_warheads,
-                "regime_type": country.regime_type,
-                "bloc": country.bloc,
-                "alliances": country.alliances,
-                "stability": country.stability,
-                "morale": country.morale,
-                "influence_level": country.influence_level
-            }
+        # The step may have swapped in a cached state object, so look it up again (a memory hit)
+        world_state = await world_brain.get_simulation(simulation_id)
+        return serializer.json_response(serializer.assemble({
+            "simulation_id": serializer.encode(simulation_id),
+            "current_date": serializer.encode(result["current_date"].strftime("%m/%d/%Y")),
+            "weeks": serializer.encode(result["weeks"]),
+            "news": serializer.news_list(result["news"]),
+            "map_state": serializer.map_state_object(world_state, result["map_state"]),
+            "global_indicators": serializer.encode(result["global_indicators"]),
+            "cursor": serializer.encode(world_state.seq)
+        }), headers=serializer.NO_CACHE_HEADERS)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error advancing simulation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/worldbrain/{simulation_id}/status", response_model=SimulationStatusResponse)
+async def get_world_brain_status(simulation_id: str, since: Optional[int] = Query(None, ge=0),
+                                 limit: Optional[int] = Query(None, ge=1, le=1000)):
+    """Get current status of a simulation
+
+    Pass the ``cursor`` from the previous response as ``since`` to receive only news,
+    countries and map entries that changed after it; ``limit`` pages through news.
+    """
+    try:
+        world_state = await world_brain.get_simulation(simulation_id)
+        if world_state is None:
+            raise HTTPException(status_code=404, detail="Simulation not found")
         
-        # Format map state
         current_map_state = world_state.map_states[-1] if world_state.map_states else None
-        formatted_map_state = {
-            "global_tension": current_map_state.global_tension if current_map_state else 0,
-            "bloc_distribution": current_map_state.bloc_distribution if current_map_state else {},
-            "active_conflicts": current_map_state.active_conflicts if current_map_state else [],
-            "country_states": current_map_state.country_states if current_map_state else {}
-        }
-        
-        return SimulationResponse(
-            id=simulation_id,
-            status="simulation_active",
-            current_date=world_state.current_date.strftime("%m/%d/%Y"),
-            countries=formatted_countries,
-            news=formatted_news,
-            map_state=formatted_map_state,
-            global_indicators=world_state.global_indicators
+        # Status polls only re-encode countries that changed since the last poll
+        return serializer.json_response(
+            serializer.render_status(simulation_id, world_state, current_map_state, since=since, limit=limit)
         )
     
     except HTTPException:
@@ -387,11 +380,102 @@ async def get_world_brain_status(simulation_id: str):
         logger.error(f"Error getting simulation status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/worldbrain/ensemble")
+async def run_world_brain_ensemble(request: EnsembleRequest):
+    """Run seeded headless simulations and return per-week outcome percentiles
+
+    Ensembles share one worker pool and run one at a time (ENSEMBLE_MAX_CONCURRENT);
+    later requests wait for it.
+    """
+    try:
+        result = await ensemble_runner.run(
+            request.runs, request.weeks, request.seed, request.start_month, request.start_year
+        )
+        return result.summary(request.percentiles)
+    except Exception as e:
+        logger.error(f"Error running ensemble: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/worldbrain/{simulation_id}/stream")
+async def stream_world_brain_ticks(simulation_id: str):
+    """Server-sent events with the diff of every tick (news, country states, tension, conflicts)"""
+    world_state = await world_brain.get_simulation(simulation_id)
+    if world_state is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    return StreamingResponse(
+        tick_broadcaster.stream(simulation_id, world_state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/worldbrain/{simulation_id}/history")
+async def get_world_brain_history(simulation_id: str):
+    """Get per-month aggregates of activity rolled out of a simulation's live history"""
+    world_state = await world_brain.get_simulation(simulation_id)
+    if world_state is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    return {
+        "simulation_id": simulation_id,
+        "week_number": world_state.week_number,
+        "retained_actions": len(world_state.actions),
+        "retained_news": len(world_state.news),
+        "monthly_activity": world_state.history.monthly
+    }
+
+@app.get("/worldbrain/{simulation_id}/history/{week_number}")
+async def get_world_brain_history_week(simulation_id: str, week_number: int):
+    """Get the map state of a past simulation week"""
+    try:
+        map_state = await world_brain.get_historical_map_state(simulation_id, week_number)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    if not map_state:
+        raise HTTPException(status_code=404, detail="Week not found in simulation history")
+    
+    return {
+        "simulation_id": simulation_id,
+        "week_number": week_number,
+        "map_state": {
+            "global_tension": map_state.global_tension,
+            "bloc_distribution": map_state.bloc_distribution,
+            "active_conflicts": map_state.active_conflicts,
+            "country_states": map_state.country_states
+        }
+    }
+
+@app.get("/worldbrain/{simulation_id}/map-diff")
+async def get_world_brain_map_diff(simulation_id: str, from_week: int = Query(..., ge=1),
+                                   to_week: Optional[int] = Query(None, ge=1)):
+    """Get what changed on the map between two weeks (default: up to the current week)"""
+    world_state = await world_brain.get_simulation(simulation_id)
+    if world_state is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    
+    delta = await world_brain.get_map_state_diff(simulation_id, from_week, to_week)
+    if delta is None:
+        raise HTTPException(status_code=404, detail="Week not found in simulation history")
+    
+    return {
+        "simulation_id": simulation_id,
+        "from_week": from_week,
+        "to_week": to_week if to_week is not None else world_state.week_number,
+        "diff": {
+            "global_tension": delta.global_tension,
+            "changed_countries": delta.changed_countries,
+            "removed_countries": delta.removed_countries,
+            "bloc_distribution": delta.bloc_distribution,
+            "conflicts_added": delta.conflicts_added,
+            "conflicts_removed": delta.conflicts_removed
+        }
+    }
+
 @app.get("/worlddata/countries")
-async def get_countries():
+async def get_countries(request: Request):
     """Get all country data"""
-    # Return the complete merged dataset (covers ~200+ countries)
-    return world_data_service.get_all_countries()
+    # Return the complete merged dataset (covers ~200+ countries), encoded once
+    return static_payloads.respond("countries", request, world_data_service.get_all_countries)
 
 @app.get("/worlddata/countries/{country_id}")
 async def get_country(country_id: str):
@@ -402,9 +486,9 @@ async def get_country(country_id: str):
     return country_data
 
 @app.get("/worldleaders/leaders")
-async def get_leaders():
+async def get_leaders(request: Request):
     """Get all leader data"""
-    return world_leaders_service.leaders
+    return static_payloads.respond("leaders", request, lambda: world_leaders_service.leaders)
 
 @app.get("/worldleaders/leaders/{leader_id}")
 async def get_leader(leader_id: str):
@@ -415,19 +499,20 @@ async def get_leader(leader_id: str):
     return leader_data
 
 @app.get("/worldleaders/events")
-async def get_recent_events():
+async def get_recent_events(request: Request):
     """Get recent world events"""
-    return world_leaders_service.get_recent_events()
+    # The 30-day window moves with the clock, so rebuild the payload hourly
+    return static_payloads.respond("events", request, world_leaders_service.get_recent_events, ttl=3600)
 
 @app.get("/worldleaders/storylines")
-async def get_ongoing_storylines():
+async def get_ongoing_storylines(request: Request):
     """Get ongoing geopolitical storylines"""
-    return world_leaders_service.get_ongoing_storylines()
+    return static_payloads.respond("storylines", request, world_leaders_service.get_ongoing_storylines)
 
 @app.get("/worldleaders/controversies")
-async def get_controversies():
+async def get_controversies(request: Request):
     """Get current controversies"""
-    return world_leaders_service.get_controversies()
+    return static_payloads.respond("controversies", request, world_leaders_service.get_controversies)
 
 @app.get("/costs")
 async def get_costs():
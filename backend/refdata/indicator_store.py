@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, select
+
+from .models import Base, IndicatorValue, SessionLocal, engine
+
+
+logger = logging.getLogger(__name__)
+
+# fetch(indicator_code) -> {ISO3: {"value": ..., "date": ...}}
+IndicatorFetcher = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class IndicatorSnapshot:
+    data: Dict[str, Any]
+    fetched_at: float
+    encoded: bytes = field(repr=False, default=b"")
+
+    def __post_init__(self):
+        if not self.encoded:
+            self.encoded = json.dumps(self.data, separators=(",", ":")).encode("utf-8")
+
+
+class IndicatorStore:
+    """Local store of latest World Bank indicator values with stale-while-revalidate reads.
+
+    Values live in memory and are persisted to the refdata database so a restart
+    serves the last known data immediately. A background task refreshes every
+    registered indicator on a schedule; reads never wait on the network unless
+    an indicator has no data at all yet.
+    """
+
+    def __init__(self, fetch: IndicatorFetcher, refresh_interval: float = 6 * 3600, stale_after: float = 24 * 3600):
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.stale_after = stale_after
+        self.indicators: Dict[str, str] = {}  # name -> World Bank indicator code
+        self._snapshots: Dict[str, IndicatorSnapshot] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+        self.metrics: Dict[str, int] = {"reads": 0, "stale_reads": 0, "refreshes": 0, "refresh_failures": 0}
+
+    def register(self, name: str, code: str) -> None:
+        self.indicators[name] = code
+
+    async def start(self) -> None:
+        if self._loop_task is not None:
+            return
+        await asyncio.to_thread(self._load_from_db)
+        self._loop_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+
+    async def get(self, name: str) -> Optional[IndicatorSnapshot]:
+        code = self.indicators.get(name)
+        if code is None:
+            return None
+        self.metrics["reads"] += 1
+        snapshot = self._snapshots.get(code)
+        if snapshot is None:
+            # Nothing cached yet: the first reader waits for the fetch
+            return await self.refresh(code)
+        if time.time() - snapshot.fetched_at > self.stale_after:
+            self.metrics["stale_reads"] += 1
+            self._schedule_refresh(code)
+        return snapshot
+
+    async def refresh(self, code: str) -> Optional[IndicatorSnapshot]:
+        """Fetch an indicator now, sharing any refresh already in progress"""
+        self._schedule_refresh(code)
+        try:
+            await asyncio.shield(self._refreshing[code])
+        except Exception:
+            pass
+        return self._snapshots.get(code)
+
+    def _schedule_refresh(self, code: str) -> None:
+        task = self._refreshing.get(code)
+        if task is None or task.done():
+            self._refreshing[code] = asyncio.create_task(self._refresh(code))
+
+    async def _refresh(self, code: str) -> None:
+        self.metrics["refreshes"] += 1
+        try:
+            data = await self.fetch(code)
+        except Exception as e:
+            self.metrics["refresh_failures"] += 1
+            logger.warning("Indicator %s refresh failed: %s", code, e)
+            return
+        if not data:
+            # Keep serving the previous values rather than an empty result
+            self.metrics["refresh_failures"] += 1
+            logger.warning("Indicator %s refresh returned no data", code)
+            return
+        snapshot = IndicatorSnapshot(data=data, fetched_at=time.time())
+        self._snapshots[code] = snapshot
+        await asyncio.to_thread(self._persist, code, snapshot)
+        logger.info("Indicator %s refreshed with %d entries", code, len(data))
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            for code in list(self.indicators.values()):
+                snapshot = self._snapshots.get(code)
+                if snapshot is None or time.time() - snapshot.fetched_at >= self.refresh_interval:
+                    await self.refresh(code)
+            await asyncio.sleep(min(self.refresh_interval, 300))
+
+    def _load_from_db(self) -> None:
+        Base.metadata.create_all(bind=engine, tables=[IndicatorValue.__table__])
+        with SessionLocal() as db:
+            rows = db.execute(select(IndicatorValue)).scalars().all()
+        grouped: Dict[str, List[IndicatorValue]] = {}
+        for row in rows:
+            grouped.setdefault(row.indicator, []).append(row)
+        for code, items in grouped.items():
+            if code in self._snapshots:
+                continue
+            self._snapshots[code] = IndicatorSnapshot(
+                data={row.country_code: {"value": row.value, "date": row.date} for row in items},
+                fetched_at=min(row.fetched_at for row in items),
+            )
+        logger.info("Indicator store loaded %d indicators from database", len(grouped))
+
+    def _persist(self, code: str, snapshot: IndicatorSnapshot) -> None:
+        with SessionLocal() as db:
+            db.execute(delete(IndicatorValue).where(IndicatorValue.indicator == code))
+            db.add_all([
+                IndicatorValue(
+                    indicator=code,
+                    country_code=country_code,
+                    value=entry["value"],
+                    date=entry.get("date"),
+                    fetched_at=snapshot.fetched_at,
+                )
+                for country_code, entry in snapshot.data.items()
+            ])
+            db.commit()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            **self.metrics,
+            "indicators": {
+                name: {
+                    "entries": len(self._snapshots[code].data),
+                    "age_seconds": int(now - self._snapshots[code].fetched_at),
+                } if code in self._snapshots else None
+                for name, code in self.indicators.items()
+            },
+        }
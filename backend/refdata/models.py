@@ -58,6 +58,16 @@ class Leader(Base):
     country: Mapped["Country"] = relationship(back_populates="leaders")
 
 
+class IndicatorValue(Base):
+    __tablename__ = "ref_indicator_values"
+
+    indicator: Mapped[str] = mapped_column(String(32), primary_key=True)  # World Bank indicator code
+    country_code: Mapped[str] = mapped_column(String(3), primary_key=True)  # ISO-3
+    value: Mapped[float] = mapped_column(Float)
+    date: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)  # Observation year
+    fetched_at: Mapped[float] = mapped_column(Float)  # Unix timestamp of the refresh
+
+
 def get_session() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
@@ -4,13 +4,18 @@ from functools import lru_cache
 from typing import List, Optional, Dict, Any
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 import aiohttp
 import asyncio
+import os
 
-from .models import Country, Leader, get_session
+from .indicator_store import IndicatorStore
+from .models import Country, Leader, SessionLocal, get_session
+from ..http_pool import PooledSession
+from ..single_flight import SingleFlight
 from ..world_data_service import world_data_service
 from .schemas import CountryRead, LeaderRead
 
@@ -125,10 +130,18 @@ def invalidate_cache() -> None:
 # World Bank live data helpers
 # -----------------------------
 
-WB_BASE = "https://api.worldbank.org/v2"
+WB_BASE = os.getenv("WORLDBANK_BASE_URL", "https://api.worldbank.org/v2")
+
+# Concurrent fetches of the same indicator and country set share one upstream request
+wb_flight = SingleFlight()
 
 
 async def _wb_fetch_latest(session: aiohttp.ClientSession, indicator: str, iso3_codes: List[str]) -> Dict[str, Any]:
+    key = (indicator, tuple(sorted(iso3_codes)))
+    return await wb_flight.do(key, lambda: _wb_fetch_latest_uncoalesced(session, indicator, iso3_codes))
+
+
+async def _wb_fetch_latest_uncoalesced(session: aiohttp.ClientSession, indicator: str, iso3_codes: List[str]) -> Dict[str, Any]:
     result: Dict[str, Any] = {}
     if not iso3_codes:
         return result
@@ -172,81 +185,84 @@ async def _wb_fetch_latest(session: aiohttp.ClientSession, indicator: str, iso3_
     return result
 
 
-@router.get("/worldbank/gdp")
-async def worldbank_gdp_latest(countries: str = "", db: Session = Depends(get_session)) -> dict:
-    # GDP current USD
-    indicator = "NY.GDP.MKTP.CD"
+# Exclude codes that World Bank doesn't recognize (territories, disputed regions, historical codes, etc.)
+WB_EXCLUDED_CODES = {
+    'ATA', 'ESH', 'ATF', 'SGS', 'BVT', 'HMD', 'IOT', 'UMI', 'PCN', 'TKL',
+    'XAD', 'XCA', 'XKX', 'ALA', 'ASM', 'COK', 'FLK', 'FRO', 'GGY', 'GIB',
+    'GRL', 'GUM', 'IMN', 'JEY', 'MSR', 'MNP', 'NIU', 'NFK', 'PRK', 'PSE',
+    'SHN', 'SPM', 'SXM', 'TCA', 'VGB', 'WLF', 'MAF', 'BLM', 'CXR', 'CCK'
+}
+
+# Shared keep-alive session for every World Bank request. Certificate checks stay
+# off for this session only, as the World Bank client always had them: the API is
+# public and read-only, and these requests carry no credentials.
+wb_http = PooledSession(verify_ssl=False)
+
+
+def _default_iso3_codes() -> List[str]:
+    # Prefer comprehensive baseline from world_data_service; fall back to DB
+    # Pull explicit iso3 if present; otherwise use key when it looks like iso3
     iso3 = []
-    if countries:
-        iso3 = [c.strip().upper() for c in countries.split(",") if c.strip()]
-    else:
-        # Prefer comprehensive baseline from world_data_service; fall back to DB
-        # Pull explicit iso3 if present; otherwise use key when it looks like iso3
-        iso3 = []
-        # Exclude codes that World Bank doesn't recognize (territories, disputed regions, historical codes, etc.)
-        excluded_codes = {
-            'ATA', 'ESH', 'ATF', 'SGS', 'BVT', 'HMD', 'IOT', 'UMI', 'PCN', 'TKL', 
-            'XAD', 'XCA', 'XKX', 'ALA', 'ASM', 'COK', 'FLK', 'FRO', 'GGY', 'GIB',
-            'GRL', 'GUM', 'IMN', 'JEY', 'MSR', 'MNP', 'NIU', 'NFK', 'PRK', 'PSE',
-            'SHN', 'SPM', 'SXM', 'TCA', 'VGB', 'WLF', 'MAF', 'BLM', 'CXR', 'CCK'
-        }
-        for k, v in world_data_service.get_all_countries().items():
-            code = v.get("iso3") or (k if isinstance(k, str) and len(k) == 3 and k.isalpha() else None)
-            if code and len(code) == 3 and code.isalpha() and code.upper() not in excluded_codes:
-                iso3.append(code.upper())
-        if not iso3:
+    for k, v in world_data_service.get_all_countries().items():
+        code = v.get("iso3") or (k if isinstance(k, str) and len(k) == 3 and k.isalpha() else None)
+        if code and len(code) == 3 and code.isalpha() and code.upper() not in WB_EXCLUDED_CODES:
+            iso3.append(code.upper())
+    if not iso3:
+        with SessionLocal() as db:
             rows = db.execute(select(Country.code)).scalars().all()
-            iso3 = [c for c in rows if c]
+        iso3 = [c for c in rows if c]
     # Deduplicate
-    iso3 = list(set(iso3))
-    logger.info("WorldBank GDP: requesting for %d country codes: %s", len(iso3), iso3[:10])
-    # Create SSL context that doesn't verify certificates (World Bank API is public/trusted)
-    import ssl
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
-    async with aiohttp.ClientSession(connector=connector) as session:
-        data = await _wb_fetch_latest(session, indicator, iso3)
-        logger.info("WorldBank GDP fetched entries=%s", len(data))
-        return data
+    return sorted(set(iso3))
+
+
+async def _fetch_indicator(indicator: str, iso3: Optional[List[str]] = None) -> Dict[str, Any]:
+    iso3 = iso3 if iso3 is not None else _default_iso3_codes()
+    logger.info("WorldBank %s: requesting for %d country codes: %s", indicator, len(iso3), iso3[:10])
+    session = await wb_http.get()
+    data = await _wb_fetch_latest(session, indicator, iso3)
+    logger.info("WorldBank %s fetched entries=%s", indicator, len(data))
+    return data
+
+
+indicator_store = IndicatorStore(
+    fetch=_fetch_indicator,
+    refresh_interval=float(os.getenv("WORLDBANK_REFRESH_SECONDS", str(6 * 3600))),
+)
+# Adding an indicator to /worldbank/{name} is one registration
+indicator_store.register("gdp", "NY.GDP.MKTP.CD")  # GDP current USD
+indicator_store.register("population", "SP.POP.TOTL")
+indicator_store.register("military_spend", "MS.MIL.XPND.CD")
+indicator_store.register("inflation", "FP.CPI.TOTL.ZG")
+
+
+async def _serve_indicator(name: str, countries: str) -> Response:
+    if name not in indicator_store.indicators:
+        raise HTTPException(status_code=404, detail="Indicator not found")
+    snapshot = await indicator_store.get(name)
+    if not countries:
+        return Response(content=snapshot.encoded if snapshot else b"{}", media_type="application/json")
+
+    iso3 = list({c.strip().upper() for c in countries.split(",") if c.strip()})
+    cached = snapshot.data if snapshot else {}
+    if all(code in cached for code in iso3):
+        return JSONResponse({code: cached[code] for code in iso3})
+    # Codes outside the stored set are fetched live
+    return JSONResponse(await _fetch_indicator(indicator_store.indicators[name], iso3))
+
+
+@router.get("/worldbank/gdp")
+async def worldbank_gdp_latest(countries: str = "") -> Response:
+    return await _serve_indicator("gdp", countries)
 
 
 @router.get("/worldbank/population")
-async def worldbank_population_latest(countries: str = "", db: Session = Depends(get_session)) -> dict:
-    indicator = "SP.POP.TOTL"
-    iso3 = []
-    if countries:
-        iso3 = [c.strip().upper() for c in countries.split(",") if c.strip()]
-    else:
-        iso3 = []
-        # Exclude codes that World Bank doesn't recognize (territories, disputed regions, historical codes, etc.)
-        excluded_codes = {
-            'ATA', 'ESH', 'ATF', 'SGS', 'BVT', 'HMD', 'IOT', 'UMI', 'PCN', 'TKL', 
-            'XAD', 'XCA', 'XKX', 'ALA', 'ASM', 'COK', 'FLK', 'FRO', 'GGY', 'GIB',
-            'GRL', 'GUM', 'IMN', 'JEY', 'MSR', 'MNP', 'NIU', 'NFK', 'PRK', 'PSE',
-            'SHN', 'SPM', 'SXM', 'TCA', 'VGB', 'WLF', 'MAF', 'BLM', 'CXR', 'CCK'
-        }
-        for k, v in world_data_service.get_all_countries().items():
-            code = v.get("iso3") or (k if isinstance(k, str) and len(k) == 3 and k.isalpha() else None)
-            if code and len(code) == 3 and code.isalpha() and code.upper() not in excluded_codes:
-                iso3.append(code.upper())
-        if not iso3:
-            rows = db.execute(select(Country.code)).scalars().all()
-            iso3 = [c for c in rows if c]
-    # Deduplicate
-    iso3 = list(set(iso3))
-    logger.info("WorldBank Population: requesting for %d country codes: %s", len(iso3), iso3[:10])
-    # Create SSL context that doesn't verify certificates (World Bank API is public/trusted)
-    import ssl
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-    connector = aiohttp.TCPConnector(ssl=ssl_context)
-    async with aiohttp.ClientSession(connector=connector) as session:
-        data = await _wb_fetch_latest(session, indicator, iso3)
-        logger.info("WorldBank Population fetched entries=%s", len(data))
-        return data
+async def worldbank_population_latest(countries: str = "") -> Response:
+    return await _serve_indicator("population", countries)
+
+
+@router.get("/worldbank/{name}")
+async def worldbank_indicator_latest(name: str, countries: str = "") -> Response:
+    return await _serve_indicator(name, countries)
 
 
 @router.get("/health")
@@ -258,7 +274,9 @@ def ref_health(db: Session = Depends(get_session)) -> dict:
         "leaders": leaders_count,
         "worldbank": {
             "gdp_endpoint": "/ref/worldbank/gdp",
-            "population_endpoint": "/ref/worldbank/population"
+            "population_endpoint": "/ref/worldbank/population",
+            "single_flight": wb_flight.get_metrics(),
+            "store": indicator_store.get_metrics()
         }
     }
 
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Relation Matrix - Dense relation store for the World Brain
+Holds pairwise relation fields as symmetric NumPy matrices indexed by country
+"""
+
+import logging
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Trust below this level is treated as an active conflict
+CONFLICT_TRUST_THRESHOLD = -50
+
+
+class RelationView:
+    """Live view of one country pair, shaped like the Relation dataclass"""
+
+    __slots__ = ("_matrix", "_i", "_j")
+
+    def __init__(self, matrix: "RelationMatrix", i: int, j: int):
+        self._matrix = matrix
+        self._i = i
+        self._j = j
+
+    @property
+    def country_a(self) -> str:
+        return self._matrix.country_ids[self._i]
+
+    @property
+    def country_b(self) -> str:
+        return self._matrix.country_ids[self._j]
+
+    @property
+    def trust_level(self) -> int:
+        return int(self._matrix.trust[self._i, self._j])
+
+    @trust_level.setter
+    def trust_level(self, value: int):
+        self._matrix.set_trust(self._i, self._j, value)
+
+    @property
+    def trade_volume(self) -> float:
+        return float(self._matrix.trade_volume[self._i, self._j])
+
+    @trade_volume.setter
+    def trade_volume(self, value: float):
+        self._matrix.set_pair(self._matrix.trade_volume, self._i, self._j, value)
+
+    @property
+    def military_cooperation(self) -> int:
+        return int(self._matrix.military_cooperation[self._i, self._j])
+
+    @military_cooperation.setter
+    def military_cooperation(self, value: int):
+        self._matrix.set_pair(self._matrix.military_cooperation, self._i, self._j, value)
+
+    @property
+    def diplomatic_relations(self) -> int:
+        return int(self._matrix.diplomatic_relations[self._i, self._j])
+
+    @diplomatic_relations.setter
+    def diplomatic_relations(self, value: int):
+        self._matrix.set_pair(self._matrix.diplomatic_relations, self._i, self._j, value)
+
+    @property
+    def cultural_affinity(self) -> int:
+        return int(self._matrix.cultural_affinity[self._i, self._j])
+
+    @cultural_affinity.setter
+    def cultural_affinity(self, value: int):
+        self._matrix.set_pair(self._matrix.cultural_affinity, self._i, self._j, value)
+
+    @property
+    def historical_conflicts(self) -> List[str]:
+        return self._matrix.historical_conflicts.setdefault((self._i, self._j), [])
+
+    def __repr__(self) -> str:
+        return (f"RelationView(country_a={self.country_a!r}, country_b={self.country_b!r}, "
+                f"trust_level={self.trust_level})")
+
+
+class RelationMatrix(Mapping):
+    """Symmetric relation store with a read-compatible Dict[str, Relation] interface
+
+    Keys follow the legacy "{a}_{b}" format where a < b, so existing
+    ``world_state.relations[key]`` reads keep working while aggregate queries
+    run as vectorized reductions over the upper triangle.
+
+    Total tension and the set of conflict pairs are kept as running aggregates,
+    updated on every trust write that goes through the matrix; code that writes
+    ``trust`` directly must call ``refresh_aggregates`` afterwards. Each write
+    bumps ``trust_version`` so derived indexes can tell when they are stale.
+    """
+
+    def __init__(self, country_ids: Sequence[str]):
+        # Sorted ids make i < j equivalent to the legacy "a < b" key ordering
+        self.country_ids: List[str] = sorted(country_ids)
+        self.index: Dict[str, int] = {cid: i for i, cid in enumerate(self.country_ids)}
+        n = len(self.country_ids)
+        self.trust = np.zeros((n, n), dtype=np.int16)
+        self.trade_volume = np.zeros((n, n), dtype=np.float64)
+        self.military_cooperation = np.zeros((n, n), dtype=np.int16)
+        self.diplomatic_relations = np.zeros((n, n), dtype=np.int16)
+        self.cultural_affinity = np.zeros((n, n), dtype=np.int16)
+        # Sparse: almost every pair has no recorded historical conflicts
+        self.historical_conflicts: Dict[Tuple[int, int], List[str]] = {}
+        self._upper = np.triu_indices(n, 1)
+        self.trust_version = 0  # Bumped on every trust write made through the matrix
+        self._tension_total = 0
+        self._conflicts: Set[Tuple[int, int]] = set()
+        self._conflict_keys: Optional[List[str]] = None  # Sorted keys, rebuilt after conflicts change
+
+    @classmethod
+    def from_countries(cls, countries: Dict[str, "Country"]) -> "RelationMatrix":
+        """Initialize relations for every pair, mirroring WorldBrain._initialize_relation"""
+        matrix = cls(list(countries.keys()))
+        ordered = [countries[cid] for cid in matrix.country_ids]
+        n = len(ordered)
+        if n == 0:
+            return matrix
+
+        bloc_codes = _codes([c.bloc for c in ordered])
+        regime_codes = _codes([c.regime_type for c in ordered])
+        same_bloc = bloc_codes[:, None] == bloc_codes[None, :]
+        same_regime = regime_codes[:, None] == regime_codes[None, :]
+
+        # Alliance overlap is the product of a country x alliance incidence matrix
+        alliance_ids: Dict[str, int] = {}
+        for country in ordered:
+            for alliance in set(country.alliances):
+                alliance_ids.setdefault(alliance, len(alliance_ids))
+        incidence = np.zeros((n, max(1, len(alliance_ids))), dtype=np.int32)
+        for row, country in enumerate(ordered):
+            for alliance in set(country.alliances):
+                incidence[row, alliance_ids[alliance]] = 1
+        alliance_overlap = incidence @ incidence.T
+
+        base_trust = np.where(same_bloc, 60, np.where(alliance_overlap > 0, 40, 0))
+        is_democracy = np.array([c.regime_type == "democracy" for c in ordered])
+        is_authoritarian = np.array([c.regime_type == "authoritarian" for c in ordered])
+        opposed = (is_democracy[:, None] & is_authoritarian[None, :]) | \
+                  (is_authoritarian[:, None] & is_democracy[None, :])
+        base_trust = base_trust + np.where(same_regime, 20, np.where(opposed, -30, 0))
+
+        np.fill_diagonal(base_trust, 0)
+        np.fill_diagonal(alliance_overlap, 0)
+        matrix.trust[:] = base_trust
+        matrix.diplomatic_relations[:] = base_trust
+        matrix.military_cooperation[:] = alliance_overlap * 20
+        matrix.refresh_aggregates()
+        return matrix
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Aggregates are derived from trust and rebuilt on load
+        state = dict(self.__dict__)
+        for name in ("_upper", "_tension_total", "_conflicts", "_conflict_keys"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._upper = np.triu_indices(len(self.country_ids), 1)
+        self.refresh_aggregates()
+
+    # --- Mapping interface -------------------------------------------------
+
+    def __getitem__(self, key: str) -> RelationView:
+        pair = self._parse_key(key)
+        if pair is None:
+            raise KeyError(key)
+        return RelationView(self, *pair)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._parse_key(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        ids = self.country_ids
+        for i, j in zip(*self._upper):
+            yield f"{ids[i]}_{ids[j]}"
+
+    def __len__(self) -> int:
+        return len(self._upper[0])
+
+    def _parse_key(self, key: str) -> Optional[Tuple[int, int]]:
+        """Resolve a legacy "{a}_{b}" key to canonical (i, j) with i < j"""
+        start = key.find("_")
+        while start != -1:
+            i = self.index.get(key[:start])
+            j = self.index.get(key[start + 1:])
+            if i is not None and j is not None and i < j:
+                return i, j
+            start = key.find("_", start + 1)
+        return None
+
+    # --- Pair access -------------------------------------------------------
+
+    def pair(self, country_a: str, country_b: str) -> Optional[RelationView]:
+        """Get the relation between two countries regardless of argument order"""
+        i = self.index.get(country_a)
+        j = self.index.get(country_b)
+        if i is None or j is None or i == j:
+            return None
+        return RelationView(self, min(i, j), max(i, j))
+
+    def key_for(self, i: int, j: int) -> str:
+        if i > j:
+            i, j = j, i
+        return f"{self.country_ids[i]}_{self.country_ids[j]}"
+
+    @staticmethod
+    def set_pair(field: np.ndarray, i: int, j: int, value) -> None:
+        field[i, j] = value
+        field[j, i] = value
+
+    def set_trust(self, i: int, j: int, value: int) -> None:
+        """Set one pair's trust, keeping the tension and conflict aggregates current"""
+        if i > j:
+            i, j = j, i
+        old = self.trust[i:i + 1, j].copy()
+        self.set_pair(self.trust, i, j, value)
+        self._track_trust(np.array([i]), np.array([j]), old, self.trust[i:i + 1, j])
+        self.trust_version += 1
+
+    # --- Aggregates --------------------------------------------------------
+
+    def tension_stats(self) -> Tuple[int, int]:
+        """Return (total tension, relation count) over all unordered pairs"""
+        return self._tension_total, len(self._upper[0])
+
+    def global_tension(self) -> int:
+        total, count = self.tension_stats()
+        return total // count if count else 0
+
+    def conflict_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        pairs = sorted(self._conflicts)
+        return (np.array([i for i, _ in pairs], dtype=np.int64),
+                np.array([j for _, j in pairs], dtype=np.int64))
+
+    def conflict_keys(self) -> List[str]:
+        """Keys of pairs in conflict, in upper-triangle order"""
+        if self._conflict_keys is None:
+            self._conflict_keys = [self.key_for(i, j) for i, j in sorted(self._conflicts)]
+        return list(self._conflict_keys)
+
+    def conflict_count(self) -> int:
+        return len(self._conflicts)
+
+    def scan_aggregates(self) -> Tuple[int, Set[Tuple[int, int]]]:
+        """Recompute total tension and the conflict pairs with a full pass over the upper triangle"""
+        upper_trust = self.trust[self._upper]
+        total = int(np.maximum(0, -upper_trust.astype(np.int64)).sum())
+        mask = upper_trust < CONFLICT_TRUST_THRESHOLD
+        return total, set(zip(self._upper[0][mask].tolist(), self._upper[1][mask].tolist()))
+
+    def refresh_aggregates(self) -> None:
+        self._tension_total, self._conflicts = self.scan_aggregates()
+        self._conflict_keys = None
+        self.trust_version += 1
+
+    def verify_aggregates(self) -> bool:
+        """Debug aid: compare the running aggregates against a full recompute"""
+        return self.scan_aggregates() == (self._tension_total, self._conflicts)
+
+    def _track_trust(self, rows: np.ndarray, cols: np.ndarray, old: np.ndarray, new: np.ndarray) -> None:
+        """Fold the trust change of distinct pairs (rows[k], cols[k]), rows < cols, into the aggregates"""
+        old = old.astype(np.int64)
+        new = new.astype(np.int64)
+        self._tension_total += int((np.maximum(0, -new) - np.maximum(0, -old)).sum())
+        was_conflict = old < CONFLICT_TRUST_THRESHOLD
+        is_conflict = new < CONFLICT_TRUST_THRESHOLD
+        flipped = np.flatnonzero(was_conflict != is_conflict)
+        if not len(flipped):
+            return
+        for k in flipped.tolist():
+            pair = (int(rows[k]), int(cols[k]))
+            if is_conflict[k]:
+                self._conflicts.add(pair)
+            else:
+                self._conflicts.discard(pair)
+        self._conflict_keys = None
+
+    def apply_trust_deltas(self, actor_ids: Sequence[str], target_ids: Sequence[str],
+                           deltas: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Apply trust changes for a batch of (actor, target) pairs and clamp to [-100, 100]
+
+        Returns the distinct (i, j) pairs, i < j, that were touched.
+        """
+        rows, cols, values = [], [], []
+        for actor_id, target_id, delta in zip(actor_ids, target_ids, deltas):
+            i = self.index.get(actor_id)
+            j = self.index.get(target_id) if target_id is not None else None
+            if i is None or j is None or i == j or not delta:
+                continue
+            rows.append(min(i, j))
+            cols.append(max(i, j))
+            values.append(delta)
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        n = len(self.country_ids)
+        flat, inverse, counts = np.unique(np.asarray(rows) * n + np.asarray(cols), return_inverse=True,
+                                          return_counts=True)
+        inverse = inverse.reshape(-1)
+        values = np.asarray(values, dtype=np.int32)
+        rows, cols = flat // n, flat % n
+        previous = self.trust[rows, cols]
+        current = previous.astype(np.int32)
+        # Clamp after every change, like Relation objects do, so repeated pairs run in action order
+        single = counts[inverse] == 1
+        current[inverse[single]] = np.clip(current[inverse[single]] + values[single], -100, 100)
+        for k, delta in zip(inverse[~single].tolist(), values[~single].tolist()):
+            current[k] = min(100, max(-100, current[k] + delta))
+        updated = current.astype(self.trust.dtype)
+        self.trust[rows, cols] = updated
+        self.trust[cols, rows] = updated
+        self._track_trust(rows, cols, previous, updated)
+        self.trust_version += 1
+        return rows, cols
+
+    @property
+    def nbytes(self) -> int:
+        return (self.trust.nbytes + self.trade_volume.nbytes + self.military_cooperation.nbytes
+                + self.diplomatic_relations.nbytes + self.cultural_affinity.nbytes)
+
+
+def _codes(values: List[str]) -> np.ndarray:
+    """Map categorical values to integer codes for vectorized comparison"""
+    lookup: Dict[str, int] = {}
+    return np.array([lookup.setdefault(v, len(lookup)) for v in values], dtype=np.int32)
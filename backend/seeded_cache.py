@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Seeded Cache - On-disk memo of seeded simulation results
+Stores world snapshots keyed by seed, start date, week count and the sequence of
+advance calls that produced them, with LRU eviction by total bytes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SeededResultCache:
+    """Directory of snapshot files with an in-memory LRU index bounded by total size"""
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> file size, oldest first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "store_failures": 0}
+        _ensure_private_directory(directory)
+        self._load_index()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._index:
+                self.metrics["misses"] += 1
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                self._drop(key)
+                self.metrics["misses"] += 1
+                return None
+            self._index.move_to_end(key)
+            self.metrics["hits"] += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> bool:
+        """Store a snapshot; returns False (and logs) when it could not be written"""
+        if len(data) > self.max_bytes:
+            return False
+        tmp_path = None
+        try:
+            # Write a uniquely named file then rename, so readers never see a partial snapshot
+            # and processes storing the same key never share a temporary file
+            with tempfile.NamedTemporaryFile(dir=self.directory, prefix=f"{key}.", suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                f.write(data)
+            with self._lock:
+                os.replace(tmp_path, self._path(key))
+                tmp_path = None
+                self._index_stored(key, len(data))
+            return True
+        except OSError as e:
+            logger.warning("Could not store seeded result %s: %s", key, e)
+            self.metrics["store_failures"] += 1
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return False
+
+    def _index_stored(self, key: str, size: int):
+        """Account for a stored file; the caller holds the lock"""
+        if key in self._index:
+            self._total_bytes -= self._index[key]
+        self._index[key] = size
+        self._index.move_to_end(key)
+        self._total_bytes += size
+        self.metrics["stores"] += 1
+        while self._total_bytes > self.max_bytes and self._index:
+            oldest = next(iter(self._index))
+            self._drop(oldest)
+            self.metrics["evictions"] += 1
+
+    def discard(self, key: str):
+        with self._lock:
+            self._drop(key)
+
+    def _drop(self, key: str):
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.snap")
+
+    def _load_index(self):
+        """Rebuild the LRU order from file modification times"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".snap"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append((stat.st_mtime, name[:-len(".snap")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        logger.info("Seeded result cache loaded %d snapshots (%d bytes)", len(self._index), self._total_bytes)
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {**self.metrics, "entries": len(self._index), "bytes": self._total_bytes}
+
+
+def _ensure_private_directory(directory: str):
+    """Create ``directory`` for this user only; refuse one that other users can write
+
+    Cached snapshots are decoded into live objects, so nobody else may plant files here.
+    """
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o022):
+        raise PermissionError(f"{directory} must be owned by this user and not writable by others")
+
+
+def default_cache_directory() -> str:
+    """Per-user cache directory: $XDG_CACHE_HOME/worldbrain/seeded_results (~/.cache by default)"""
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "worldbrain", "seeded_results")
+
+
+def create_seeded_cache_from_env() -> Optional[SeededResultCache]:
+    """Build the cache from SEEDED_CACHE_* environment variables; a zero size disables it"""
+    max_bytes = int(os.getenv("SEEDED_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    if max_bytes <= 0:
+        return None
+    directory = os.getenv("SEEDED_CACHE_DIR") or default_cache_directory()
+    try:
+        return SeededResultCache(directory, max_bytes)
+    except OSError as e:
+        logger.warning("Seeded result cache disabled: %s", e)
+        return None
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Shard Server - Run the World Brain API as several sharded worker processes
+Every worker accepts client connections on one shared port, plus calls that
+other workers forward to it on its own Unix socket.
+
+Run from the repository root:
+    python -m backend.shard_server --workers 4 --port 8000
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import tempfile
+import time
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def worker_sockets(socket_dir: str, workers: int) -> Dict[str, str]:
+    """Worker ids and the Unix socket each one listens on for forwarded calls"""
+    return {f"w{index}": os.path.join(socket_dir, f"w{index}.sock") for index in range(workers)}
+
+
+def _serve(worker_id: str, workers_spec: str, public_socket: socket.socket, socket_path: str, log_level: str):
+    """Worker process entry point: serve the app on the shared port and on this worker's socket"""
+    # The app reads its shard identity when it is imported
+    os.environ["SHARD_WORKER_ID"] = worker_id
+    os.environ["SHARD_WORKERS"] = workers_spec
+    import uvicorn
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    private_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    private_socket.bind(socket_path)
+
+    server = uvicorn.Server(uvicorn.Config("backend.main:app", log_level=log_level))
+    server.run(sockets=[public_socket, private_socket])
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the World Brain API as sharded worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--socket-dir", help="Directory for the workers' Unix sockets (default: a new temp dir)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    socket_dir = args.socket_dir or tempfile.mkdtemp(prefix="worldbrain_shards_")
+    os.makedirs(socket_dir, exist_ok=True)
+    workers = worker_sockets(socket_dir, max(1, args.workers))
+    workers_spec = ",".join(f"{worker_id}={path}" for worker_id, path in workers.items())
+
+    # Bound once here and inherited, so the kernel spreads client connections over the workers
+    public_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    public_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    public_socket.bind((args.host, args.port))
+    public_socket.set_inheritable(True)
+
+    context = multiprocessing.get_context("spawn")
+    processes: Dict[str, multiprocessing.Process] = {}
+
+    def start(worker_id: str):
+        process = context.Process(
+            target=_serve,
+            args=(worker_id, workers_spec, public_socket, workers[worker_id], args.log_level),
+            name=f"worldbrain-{worker_id}",
+        )
+        process.start()
+        processes[worker_id] = process
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for worker_id in workers:
+        start(worker_id)
+    logger.info(f"Serving on http://{args.host}:{args.port} with {len(workers)} shard workers ({socket_dir})")
+
+    # Keep every shard owned by a live process
+    while not stopping:
+        time.sleep(0.5)
+        for worker_id, process in list(processes.items()):
+            if not process.is_alive() and not stopping:
+                logger.warning(f"Shard worker {worker_id} exited with {process.exitcode}; restarting")
+                start(worker_id)
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        process.join(timeout=10)
+    public_socket.close()
+
+
+if __name__ == "__main__":
+    main()
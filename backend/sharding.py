@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Sharding - Sticky routing of World Brain simulations across worker processes
+Each simulation is owned by one worker, picked by consistent hashing of its id.
+The owner keeps the live WorldState in memory; other workers forward calls for
+it over the owner's local Unix socket.
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import re
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Set on forwarded requests so the owner always serves them itself
+FORWARDED_HEADER = "X-WorldBrain-Forwarded-By"
+# Set on every simulation response: the worker that owns the simulation
+SHARD_HEADER = "X-WorldBrain-Shard"
+
+SIMULATION_PATH = re.compile(r"^/worldbrain/([^/]+)/")
+
+# Hop-by-hop and length headers are recomputed by each side of the proxy; bodies pass through undecoded
+_HOP_HEADERS = {"host", "connection", "keep-alive", "transfer-encoding", "content-length"}
+
+
+class HashRing:
+    """Consistent hash ring; adding or removing a worker only moves the keys next to its points"""
+
+    def __init__(self, nodes: Sequence[str], replicas: int = 100):
+        points: List[Tuple[int, str]] = sorted(
+            (self._hash(f"{node}#{replica}"), node) for node in nodes for replica in range(replicas)
+        )
+        self._points = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big")
+
+    def owner(self, key: str) -> str:
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._nodes[index]
+
+
+class ShardRouter:
+    """Decides which worker owns a simulation and proxies requests to it"""
+
+    def __init__(self, worker_id: str, workers: Dict[str, str], replicas: int = 100):
+        self.worker_id = worker_id
+        self.workers = dict(workers)  # worker id -> Unix socket path
+        self.ring = HashRing(sorted(self.workers) or [worker_id], replicas)
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.metrics: Dict[str, int] = {"local": 0, "forwarded": 0, "forward_errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.workers) > 1
+
+    def owner(self, simulation_id: str) -> str:
+        return self.ring.owner(simulation_id) if self.enabled else self.worker_id
+
+    def new_simulation_id(self) -> str:
+        """A fresh simulation id owned by this worker, so a new simulation never needs forwarding"""
+        while True:
+            simulation_id = str(uuid.uuid4())
+            if self.owner(simulation_id) == self.worker_id:
+                return simulation_id
+
+    def target_of(self, request: Request) -> Optional[str]:
+        """Owning worker of a request that should be forwarded, or None to serve it here"""
+        if not self.enabled or FORWARDED_HEADER in request.headers:
+            return None
+        match = SIMULATION_PATH.match(request.url.path)
+        if match is None:
+            return None
+        owner = self.owner(match.group(1))
+        return None if owner == self.worker_id else owner
+
+    def _session(self, worker_id: str) -> aiohttp.ClientSession:
+        session = self._sessions.get(worker_id)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.UnixConnector(path=self.workers[worker_id]),
+                # Simulation steps can wait on LLM calls and streams stay open, so no overall timeout
+                timeout=aiohttp.ClientTimeout(total=None, connect=5),
+                auto_decompress=False,
+            )
+            self._sessions[worker_id] = session
+        return session
+
+    async def forward(self, request: Request, worker_id: str) -> Optional[Response]:
+        """Proxy a request to its owner; None if the owner is unreachable"""
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in _HOP_HEADERS}
+        headers[FORWARDED_HEADER] = self.worker_id
+        url = f"http://{worker_id}{request.url.path}"
+        if request.url.query:
+            url += f"?{request.url.query}"
+        try:
+            upstream = await self._session(worker_id).request(
+                request.method, url, headers=headers, data=await request.body()
+            )
+        except aiohttp.ClientError as e:
+            self.metrics["forward_errors"] += 1
+            logger.warning(f"Shard {worker_id} unreachable for {request.url.path}: {e}")
+            return None
+        self.metrics["forwarded"] += 1
+
+        async def body():
+            try:
+                async for chunk in upstream.content.iter_any():
+                    yield chunk
+            finally:
+                upstream.release()
+
+        response_headers = {name: value for name, value in upstream.headers.items() if name.lower() not in _HOP_HEADERS}
+        return StreamingResponse(body(), status_code=upstream.status, headers=response_headers)
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        """HTTP middleware: serve simulations owned here, forward the rest to their owner"""
+        worker_id = self.target_of(request)
+        if worker_id is not None:
+            response = await self.forward(request, worker_id)
+            if response is not None:
+                return response
+            # The store lets any worker load the simulation, so fall back to serving it here
+        self.metrics["local"] += 1
+        response = await call_next(request)
+        if self.enabled and SIMULATION_PATH.match(request.url.path):
+            response.headers.setdefault(SHARD_HEADER, self.worker_id)
+        return response
+
+    async def close(self):
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+    def get_metrics(self) -> Dict[str, object]:
+        return {**self.metrics, "worker_id": self.worker_id, "workers": len(self.workers)}
+
+
+def parse_workers(spec: str) -> Dict[str, str]:
+    """Parse "w0=/tmp/w0.sock,w1=/tmp/w1.sock" into {worker id: socket path}"""
+    workers = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        worker_id, _, path = entry.partition("=")
+        workers[worker_id] = path
+    return workers
+
+
+def create_shard_router_from_env() -> ShardRouter:
+    """Build the router from SHARD_* environment variables; without them every simulation is local"""
+    workers = parse_workers(os.getenv("SHARD_WORKERS", ""))
+    worker_id = os.getenv("SHARD_WORKER_ID") or "local"
+    if workers and worker_id not in workers:
+        logger.warning(f"Shard worker {worker_id} is not in SHARD_WORKERS; sharding disabled")
+        workers = {}
+    return ShardRouter(worker_id, workers)
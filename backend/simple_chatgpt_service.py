@@ -5,10 +5,10 @@ Simplified ChatGPT service that works around proxy issues
 
 import os
 import json
-import asyncio
-import aiohttp
 from dotenv import load_dotenv
 
+from http_pool import PooledSession
+
 # Load environment variables
 load_dotenv()
 
@@ -17,7 +17,9 @@ class SimpleChatGPTService:
     
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY')
-        self.base_url = "https://api.openai.com/v1"
+        self.base_url = os.getenv('OPENAI_BASE_URL', "https://api.openai.com/v1")
+        # One pooled session for every request so calls reuse TCP+TLS connections
+        self.http = PooledSession(limit_per_host=int(os.getenv('OPENAI_MAX_CONNECTIONS', '10')))
         
     async def generate_response(self, messages, model="gpt-4", max_tokens=500):
         """Generate response using direct API call"""
@@ -39,27 +41,20 @@ class SimpleChatGPTService:
         }
         
         try:
-            # Create SSL context that doesn't verify certificates (for development)
-            import ssl
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=data
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result["choices"][0]["message"]["content"]
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ API Error: {response.status} - {error_text}")
-                        return None
-                        
+            session = await self.http.get()
+            async with session.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json=data
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    return result["choices"][0]["message"]["content"]
+                else:
+                    error_text = await response.text()
+                    print(f"❌ API Error: {response.status} - {error_text}")
+                    return None
+                    
         except Exception as e:
             print(f"❌ Request error: {e}")
             return None
@@ -246,3 +241,8 @@ async def get_simple_chatgpt_service():
     if _simple_chatgpt_service is None:
         _simple_chatgpt_service = SimpleChatGPTService()
     return _simple_chatgpt_service
+
+async def close_simple_chatgpt_service():
+    """Close the global simple service's pooled HTTP session"""
+    if _simple_chatgpt_service is not None:
+        await _simple_chatgpt_service.http.close()
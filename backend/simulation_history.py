@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Simulation History - Bounded retention for World Brain simulations
+Keeps recent map states in full, delta-encodes older ones and rolls old
+actions, outcomes and news into per-month aggregates.
+"""
+
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HistoryPolicy:
+    """Retention limits applied to every simulation after each tick"""
+    full_snapshots: int = 12  # Most recent map states kept in full
+    max_delta_weeks: Optional[int] = 520  # Older deltas folded into the base state; None keeps all
+    recent_action_weeks: int = 8  # Weeks of raw actions/outcomes kept before monthly roll-up
+    max_news: int = 1000  # Most recent news articles kept in full
+
+
+@dataclass
+class MapStateDelta:
+    """Difference between two consecutive map states"""
+    timestamp: datetime
+    global_tension: int
+    changed_countries: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    removed_countries: List[str] = field(default_factory=list)
+    bloc_distribution: Optional[Dict[str, int]] = None  # None when unchanged
+    conflicts_added: List[str] = field(default_factory=list)
+    conflicts_removed: List[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.changed_countries or self.removed_countries or self.bloc_distribution is not None
+                    or self.conflicts_added or self.conflicts_removed)
+
+
+def diff_map_states(old: "MapState", new: "MapState") -> MapStateDelta:
+    """Compute the delta that turns ``old`` into ``new``
+
+    Snapshots share unchanged entries, so identical objects are skipped without
+    comparing their contents.
+    """
+    if old.country_states is new.country_states:
+        changed, removed = {}, []
+    else:
+        changed = {
+            country_id: state
+            for country_id, state in new.country_states.items()
+            if old.country_states.get(country_id) is not state and old.country_states.get(country_id) != state
+        }
+        removed = [country_id for country_id in old.country_states if country_id not in new.country_states]
+    old_conflicts = set(old.active_conflicts)
+    new_conflicts = set(new.active_conflicts)
+    return MapStateDelta(
+        timestamp=new.timestamp,
+        global_tension=new.global_tension,
+        changed_countries=changed,
+        removed_countries=removed,
+        bloc_distribution=None if new.bloc_distribution == old.bloc_distribution else dict(new.bloc_distribution),
+        conflicts_added=[key for key in new.active_conflicts if key not in old_conflicts],
+        conflicts_removed=[key for key in old.active_conflicts if key not in new_conflicts],
+    )
+
+
+def apply_map_state_delta(state: "MapState", delta: MapStateDelta) -> "MapState":
+    """Return a new map state with ``delta`` applied to ``state``"""
+    from .world_brain import MapState
+
+    country_states = dict(state.country_states)
+    for country_id in delta.removed_countries:
+        country_states.pop(country_id, None)
+    country_states.update(delta.changed_countries)
+
+    removed = set(delta.conflicts_removed)
+    active_conflicts = [key for key in state.active_conflicts if key not in removed] + delta.conflicts_added
+
+    return MapState(
+        timestamp=delta.timestamp,
+        country_states=country_states,
+        bloc_distribution=dict(delta.bloc_distribution) if delta.bloc_distribution is not None else state.bloc_distribution,
+        global_tension=delta.global_tension,
+        active_conflicts=active_conflicts,
+    )
+
+
+class MapStateHistory:
+    """List-like map state history with a ring buffer of full snapshots
+
+    States that fall out of the ring buffer are stored as deltas against
+    their predecessor and rebuilt on demand by replaying from the base state.
+    Indexing, ``len`` and iteration behave like the list it replaces.
+    """
+
+    def __init__(self, states: Iterable["MapState"] = (), policy: Optional[HistoryPolicy] = None):
+        self.policy = policy or HistoryPolicy()
+        self._base: Optional["MapState"] = None  # Oldest retained state, kept in full
+        self._tail: Optional["MapState"] = None  # Newest compacted state, kept in full
+        self._deltas: List[MapStateDelta] = []  # Deltas from the base up to the tail
+        self._recent: Deque["MapState"] = deque()
+        self.dropped = 0  # States folded out of the retained history
+        for state in states:
+            self.append(state)
+
+    def append(self, state: "MapState"):
+        self._recent.append(state)
+        while len(self._recent) > max(1, self.policy.full_snapshots):
+            self._compact(self._recent.popleft())
+
+    def _compact(self, state: "MapState"):
+        if self._base is None:
+            self._base = state
+        else:
+            self._deltas.append(diff_map_states(self._tail, state))
+        self._tail = state
+
+        max_deltas = self.policy.max_delta_weeks
+        if max_deltas is not None and len(self._deltas) > max_deltas:
+            self._base = apply_map_state_delta(self._base, self._deltas.pop(0))
+            self.dropped += 1
+            if not self._deltas:
+                self._tail = self._base
+
+    @property
+    def compacted_count(self) -> int:
+        return 0 if self._base is None else len(self._deltas) + 1
+
+    def __len__(self) -> int:
+        return self.compacted_count + len(self._recent)
+
+    def __getitem__(self, index: int) -> "MapState":
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("map state index out of range")
+
+        compacted = self.compacted_count
+        if index >= compacted:
+            return self._recent[index - compacted]
+        if index == compacted - 1:
+            return self._tail
+
+        return self._replay(index)
+
+    def _replay(self, count: int) -> "MapState":
+        """Apply the first ``count`` deltas to the base state, copying the country map only once"""
+        from .world_brain import MapState
+
+        if not count:
+            return self._base
+        base = self._base
+        country_states = dict(base.country_states)
+        active_conflicts = list(base.active_conflicts)
+        bloc_distribution = base.bloc_distribution
+        for delta in self._deltas[:count]:
+            for country_id in delta.removed_countries:
+                country_states.pop(country_id, None)
+            country_states.update(delta.changed_countries)
+            if delta.conflicts_removed:
+                removed = set(delta.conflicts_removed)
+                active_conflicts = [key for key in active_conflicts if key not in removed]
+            active_conflicts.extend(delta.conflicts_added)
+            if delta.bloc_distribution is not None:
+                bloc_distribution = delta.bloc_distribution
+        last = self._deltas[count - 1]
+        return MapState(
+            timestamp=last.timestamp,
+            country_states=country_states,
+            bloc_distribution=dict(bloc_distribution),
+            global_tension=last.global_tension,
+            active_conflicts=active_conflicts,
+        )
+
+    def __iter__(self) -> Iterator["MapState"]:
+        if self._base is not None:
+            state = self._base
+            yield state
+            for delta in self._deltas:
+                state = apply_map_state_delta(state, delta)
+                yield state
+        yield from self._recent
+
+    def state_for_index(self, absolute_index: int) -> Optional["MapState"]:
+        """Look up a state by its index since the simulation started"""
+        index = absolute_index - self.dropped
+        if not 0 <= index < len(self):
+            return None
+        return self[index]
+
+
+@dataclass
+class ActivityHistory:
+    """Per-month aggregates of actions, outcomes and news rolled out of the live lists"""
+    monthly: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    tick_sizes: Deque[Tuple[datetime, int]] = field(default_factory=deque)  # (simulation date, actions) per retained tick
+    actions_rolled: int = 0
+    news_rolled: int = 0
+
+    def _bucket(self, date: datetime) -> Dict[str, Any]:
+        key = date.strftime("%Y-%m")
+        if key not in self.monthly:
+            self.monthly[key] = {
+                "actions": 0,
+                "successes": 0,
+                "escalations": 0,
+                "total_impact": 0,
+                "casualties": 0,
+                "economic_damage": 0.0,
+                "actions_by_type": {},
+                "news": 0,
+                "news_by_category": {},
+            }
+        return self.monthly[key]
+
+    def record_tick(self, date: datetime, action_count: int):
+        self.tick_sizes.append((date, action_count))
+
+    def roll_up_actions(self, date: datetime, actions: List["Action"], outcomes: List["Outcome"]):
+        bucket = self._bucket(date)
+        for action, outcome in zip(actions, outcomes):
+            bucket["actions"] += 1
+            bucket["actions_by_type"][action.action_type] = bucket["actions_by_type"].get(action.action_type, 0) + 1
+            bucket["successes"] += int(outcome.success)
+            bucket["escalations"] += int(outcome.escalation_triggered)
+            bucket["total_impact"] += outcome.impact_magnitude
+            bucket["casualties"] += outcome.casualties
+            bucket["economic_damage"] += outcome.economic_damage
+        self.actions_rolled += len(actions)
+
+    def roll_up_news(self, news: List["GeneratedNews"]):
+        for article in news:
+            bucket = self._bucket(article.timestamp)
+            bucket["news"] += 1
+            bucket["news_by_category"][article.category] = bucket["news_by_category"].get(article.category, 0) + 1
+        self.news_rolled += len(news)
+
+
+def compact_world_state(world_state: "WorldState", policy: HistoryPolicy):
+    """Trim the live action, outcome and news lists of a world state to the policy limits"""
+    history = world_state.history
+    while len(history.tick_sizes) > policy.recent_action_weeks:
+        date, count = history.tick_sizes.popleft()
+        old_actions = world_state.actions[:count]
+        history.roll_up_actions(date, old_actions, world_state.outcomes[:count])
+        for action in old_actions:
+            world_state.action_index.pop(action.id, None)
+        del world_state.actions[:count]
+        del world_state.outcomes[:count]
+
+    overflow = len(world_state.news) - policy.max_news
+    if overflow > 0:
+        history.roll_up_news(world_state.news[:overflow])
+        del world_state.news[:overflow]
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Simulation Serializer - Shared JSON encoding for World Brain simulation responses
+Caches encoded per-country and per-article fragments and assembles responses by
+byte concatenation, without pydantic revalidation
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Response
+
+try:
+    import orjson  # Optional: several times faster than the stdlib encoder
+except ImportError:
+    orjson = None
+
+# Country attributes exposed to the frontend, in response order
+COUNTRY_FIELDS = (
+    "name",
+    "gdp",
+    "population",
+    "military_budget",
+    "nuclear_warheads",
+    "regime_type",
+    "bloc",
+    "alliances",
+    "stability",
+    "morale",
+    "influence_level",
+)
+
+NO_CACHE_HEADERS = {
+    "Cache-Control": "no-cache, no-store, must-revalidate",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
+
+
+def encode(obj: Any) -> bytes:
+    """Encode a JSON-compatible object to UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def news_fragment(news_item, full: bool = True) -> bytes:
+    """Encoded article, cached on the article itself (articles never change after creation).
+
+    ``full`` sends the full content and source URL; otherwise the lede is sent as content.
+    """
+    variant = "full" if full else "summary"
+    fragment = news_item.render_cache.get(variant)
+    if fragment is None:
+        news_data = {
+            "title": news_item.headline,
+            "content": news_item.content if full else news_item.lede,
+            "country": news_item.country,
+            "category": news_item.category,
+            "severity": news_item.severity,
+            "reliability": news_item.reliability,
+            "source": news_item.source,
+            "timestamp": news_item.timestamp.isoformat(),
+        }
+        # Add URL if available (for real news articles)
+        if full and "url" in news_item.stat_changes:
+            news_data["url"] = news_item.stat_changes["url"]
+        fragment = encode(news_data)
+        news_item.render_cache[variant] = fragment
+    return fragment
+
+
+def news_list(news_items: Iterable, full: bool = True) -> bytes:
+    return b"[" + b",".join(news_fragment(news_item, full) for news_item in news_items) + b"]"
+
+
+def countries_object(world_state, since: Optional[int] = None) -> bytes:
+    """Encoded country map; each country is re-encoded only when one of its fields changed.
+
+    A change is stamped with the simulation's sequence number when it is first seen,
+    so ``since`` keeps only countries that changed after that cursor.
+    """
+    cache: Dict[str, Any] = world_state.render_cache.setdefault("countries", {})
+    parts = []
+    for country_id, country in world_state.countries.items():
+        values = tuple(getattr(country, name) for name in COUNTRY_FIELDS)
+        # Lists are compared by value, so the fingerprint needs hashable copies
+        fingerprint = tuple(tuple(value) if isinstance(value, list) else value for value in values)
+        cached = cache.get(country_id)
+        if cached is None or cached[0] != fingerprint:
+            fragment = encode(country_id) + b":" + encode(dict(zip(COUNTRY_FIELDS, values)))
+            cached = (fingerprint, fragment, world_state.seq)
+            cache[country_id] = cached
+        if since is None or cached[2] > since:
+            parts.append(cached[1])
+    if len(cache) > len(world_state.countries):
+        for country_id in set(cache) - set(world_state.countries):
+            del cache[country_id]
+    return b"{" + b",".join(parts) + b"}"
+
+
+def changed_country_ids(world_state, since: int) -> List[str]:
+    """Countries stamped as changed after ``since`` (call after ``countries_object``)"""
+    cache = world_state.render_cache.get("countries", {})
+    return [country_id for country_id, cached in cache.items() if cached[2] > since]
+
+
+def map_state_object(world_state, map_state=None) -> bytes:
+    """Encoded map state, cached for as long as it is the simulation's current map state"""
+    if map_state is None:
+        return encode({"global_tension": 0, "bloc_distribution": {}, "active_conflicts": [], "country_states": {}})
+    cached = world_state.render_cache.get("map_state")
+    if cached is None or cached[0] is not map_state:
+        cached = (map_state, encode({
+            "global_tension": map_state.global_tension,
+            "bloc_distribution": map_state.bloc_distribution,
+            "active_conflicts": map_state.active_conflicts,
+            "country_states": map_state.country_states,
+        }))
+        world_state.render_cache["map_state"] = cached
+    return cached[1]
+
+
+def assemble(fields: Dict[str, bytes]) -> bytes:
+    """Join pre-encoded values into a JSON object"""
+    return b"{" + b",".join(encode(name) + b":" + value for name, value in fields.items()) + b"}"
+
+
+def render_simulation(simulation_id: str, world_state, map_state=None, full_news: bool = True,
+                      status: str = "simulation_active") -> bytes:
+    """Encode a simulation in the ``SimulationResponse`` shape"""
+    return assemble({
+        "id": encode(simulation_id),
+        "status": encode(status),
+        "current_date": encode(world_state.current_date.strftime("%m/%d/%Y")),
+        "countries": countries_object(world_state),
+        "news": news_list(world_state.news, full_news),
+        "map_state": map_state_object(world_state, map_state),
+        "global_indicators": encode(world_state.global_indicators),
+    })
+
+
+def _first_after(news_items: List[Any], seq: int) -> int:
+    """Index of the first article with a sequence number above ``seq`` (articles are in seq order)"""
+    low, high = 0, len(news_items)
+    while low < high:
+        middle = (low + high) // 2
+        if news_items[middle].seq <= seq:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def render_status(simulation_id: str, world_state, map_state=None, since: Optional[int] = None,
+                  limit: Optional[int] = None) -> bytes:
+    """Encode a status poll: the full simulation, or only what changed after the ``since`` cursor.
+
+    News is returned oldest first and capped at ``limit`` articles; ``cursor`` is the
+    value to pass as ``since`` on the next poll and ``has_more`` says whether more
+    articles are waiting behind it.
+    """
+    start = 0 if since is None else _first_after(world_state.news, since)
+    end = len(world_state.news) if limit is None else min(len(world_state.news), start + max(1, limit))
+    has_more = end < len(world_state.news)
+    cursor = world_state.news[end - 1].seq if has_more and end > start else world_state.seq
+
+    countries = countries_object(world_state, since)
+    if since is None:
+        map_state_bytes = map_state_object(world_state, map_state)
+    else:
+        # Country map entries derive from country fields, so they change with the countries
+        changed = changed_country_ids(world_state, since)
+        map_state_bytes = encode({
+            "global_tension": map_state.global_tension if map_state else 0,
+            "bloc_distribution": map_state.bloc_distribution if map_state else {},
+            "active_conflicts": map_state.active_conflicts if map_state else [],
+            "country_states": {
+                country_id: map_state.country_states[country_id]
+                for country_id in changed if map_state and country_id in map_state.country_states
+            },
+        })
+
+    return assemble({
+        "id": encode(simulation_id),
+        "status": encode("simulation_active"),
+        "current_date": encode(world_state.current_date.strftime("%m/%d/%Y")),
+        "countries": countries,
+        "news": news_list(world_state.news[start:end], full=False),
+        "map_state": map_state_bytes,
+        "global_indicators": encode(world_state.global_indicators),
+        "delta": encode(since is not None),
+        "cursor": encode(cursor),
+        "tick_seq": encode(world_state.tick_seq),
+        "has_more": encode(has_more),
+    })
+
+
+def json_response(body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
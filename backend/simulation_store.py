@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Simulation Store - Durable World Brain simulations
+Keeps a periodic world snapshot plus an append-only log of tick records per
+simulation in SQLite, so any worker can load a simulation on first access and
+recovery replays only the log tail written since the last snapshot. Idle
+simulations can then be dropped from memory and reloaded on their next access.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .single_flight import SingleFlight
+from .world_snapshot import SnapshotError, loads_world_state, restricted_loads
+
+logger = logging.getLogger(__name__)
+
+TICK_RECORD_MAGIC = b"WBT2"  # zlib-compressed JSON
+LEGACY_TICK_RECORD_MAGIC = b"WBT1"  # zlib-compressed pickle
+
+
+@dataclass
+class WeekRecord:
+    """Numeric result of one simulated week; relation changes are re-derived from the outcomes"""
+    actions: List[Any]
+    outcomes: List[Any]
+    timestamp: datetime  # Map state timestamp
+
+
+@dataclass
+class TickRecord:
+    """Everything one tick or batched advance changed in a simulation"""
+    seq: int  # Simulation sequence number after the step
+    weeks: List[WeekRecord]
+    news: List[Any]
+    rng_state: Any  # Random streams after the step, so replay needs no redraws
+    np_rng_state: Dict[str, Any]
+    replay_path: Optional[str]
+    timestamp: datetime
+
+
+@dataclass
+class EvictionPolicy:
+    """When resident simulations are written out and dropped from process memory"""
+    idle_ttl: Optional[float] = 1800.0  # Seconds without access before a simulation is evicted; None never expires
+    max_resident: Optional[int] = None  # Most simulations kept in memory; None is unlimited
+    memory_budget: Optional[int] = None  # Estimated bytes of resident simulations; None is unlimited
+    sweep_interval: float = 30.0  # Seconds between idle sweeps
+
+
+class StoreConflict(RuntimeError):
+    """Raised when another worker already logged a step with the same sequence number"""
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not allowed in a tick record")
+
+
+def _json_object(value: Dict[str, Any]):
+    return datetime.fromisoformat(value["$datetime"]) if len(value) == 1 and "$datetime" in value else value
+
+
+def _fields_of(obj) -> Dict[str, Any]:
+    return {field.name: getattr(obj, field.name) for field in fields(obj) if field.init}
+
+
+def dumps_tick_record(record: TickRecord, level: int = 6) -> bytes:
+    """Encode a tick record as compressed JSON, so reading the log never runs pickle"""
+    payload = {
+        "seq": record.seq,
+        "weeks": [
+            {
+                "actions": [_fields_of(action) for action in week.actions],
+                "outcomes": [_fields_of(outcome) for outcome in week.outcomes],
+                "timestamp": week.timestamp,
+            }
+            for week in record.weeks
+        ],
+        "news": [_fields_of(news_item) for news_item in record.news],
+        "rng_state": record.rng_state,
+        "np_rng_state": record.np_rng_state,
+        "replay_path": record.replay_path,
+        "timestamp": record.timestamp,
+    }
+    data = json.dumps(payload, default=_json_default, separators=(",", ":")).encode("utf-8")
+    return TICK_RECORD_MAGIC + zlib.compress(data, level)
+
+
+def loads_tick_record(data: bytes) -> TickRecord:
+    from .world_brain import Action, GeneratedNews, Outcome
+
+    if data.startswith(LEGACY_TICK_RECORD_MAGIC):
+        try:
+            return restricted_loads(zlib.decompress(data[len(LEGACY_TICK_RECORD_MAGIC):]))
+        except (zlib.error, pickle.UnpicklingError, EOFError) as e:
+            raise SnapshotError(f"Corrupt tick record: {e}") from e
+    if not data.startswith(TICK_RECORD_MAGIC):
+        raise SnapshotError("Not a tick record")
+    try:
+        payload = json.loads(zlib.decompress(data[len(TICK_RECORD_MAGIC):]), object_hook=_json_object)
+        version, internal_state, gauss = payload["rng_state"]
+        return TickRecord(
+            seq=payload["seq"],
+            weeks=[
+                WeekRecord(
+                    actions=[Action(**action) for action in week["actions"]],
+                    outcomes=[Outcome(**outcome) for outcome in week["outcomes"]],
+                    timestamp=week["timestamp"],
+                )
+                for week in payload["weeks"]
+            ],
+            news=[GeneratedNews(**news_item) for news_item in payload["news"]],
+            rng_state=(version, tuple(internal_state), gauss),
+            np_rng_state=payload["np_rng_state"],
+            replay_path=payload["replay_path"],
+            timestamp=payload["timestamp"],
+        )
+    except (zlib.error, ValueError, KeyError, TypeError) as e:
+        raise SnapshotError(f"Corrupt tick record: {e}") from e
+
+
+class SimulationStore:
+    """SQLite-backed snapshots and tick logs, safe to share between worker processes"""
+
+    def __init__(self, db_path: str, snapshot_every: int = 26):
+        self.db_path = db_path
+        self.snapshot_every = max(1, snapshot_every)  # Log records kept before the next snapshot
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {
+            "snapshots": 0,
+            "appends": 0,
+            "loads": 0,
+            "records_replayed": 0,
+            "conflicts": 0,
+        }
+        if not os.path.exists(db_path):
+            # Rows are decoded into live objects, so only the server's user may write the file
+            os.close(os.open(db_path, os.O_CREAT | os.O_WRONLY, 0o600))
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30.0)
+        # WAL lets workers read while one writes; NORMAL sync skips an fsync per commit
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots (simulation_id TEXT PRIMARY KEY, seq INTEGER NOT NULL, "
+            "week_number INTEGER NOT NULL, updated_at REAL NOT NULL, data BLOB NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tick_log (simulation_id TEXT NOT NULL, seq INTEGER NOT NULL, "
+            "data BLOB NOT NULL, PRIMARY KEY (simulation_id, seq))"
+        )
+        self._db.commit()
+
+    def save_snapshot(self, simulation_id: str, seq: int, week_number: int, data: bytes):
+        """Store a full snapshot taken at ``seq`` and drop the log records it covers
+
+        A snapshot older than the stored one is ignored, so a slow writer never
+        rolls a simulation back past log records that were already dropped.
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO snapshots (simulation_id, seq, week_number, updated_at, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (simulation_id) DO UPDATE SET seq = excluded.seq, week_number = excluded.week_number, "
+                "updated_at = excluded.updated_at, data = excluded.data WHERE excluded.seq >= snapshots.seq",
+                (simulation_id, seq, week_number, datetime.now().timestamp(), data),
+            )
+            self._db.execute("DELETE FROM tick_log WHERE simulation_id = ? AND seq <= ?", (simulation_id, seq))
+            self._db.commit()
+            self.metrics["snapshots"] += 1
+
+    def append(self, simulation_id: str, seq: int, data: bytes) -> int:
+        """Log one encoded tick record; returns how many records follow the last snapshot"""
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT INTO tick_log (simulation_id, seq, data) VALUES (?, ?, ?)", (simulation_id, seq, data)
+                )
+            except sqlite3.IntegrityError as e:
+                self._db.rollback()
+                self.metrics["conflicts"] += 1
+                raise StoreConflict(f"Simulation {simulation_id} already has a record at seq {seq}") from e
+            self._db.commit()
+            self.metrics["appends"] += 1
+            return self._db.execute(
+                "SELECT COUNT(*) FROM tick_log WHERE simulation_id = ?", (simulation_id,)
+            ).fetchone()[0]
+
+    def snapshot_seq(self, simulation_id: str) -> Optional[int]:
+        """Sequence number of the stored snapshot, or None if there is none"""
+        with self._lock:
+            row = self._db.execute("SELECT seq FROM snapshots WHERE simulation_id = ?", (simulation_id,)).fetchone()
+        return row[0] if row else None
+
+    def head_seq(self, simulation_id: str) -> Optional[int]:
+        """Latest sequence number stored for a simulation, or None if it is unknown"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MAX(seq) FROM (SELECT seq FROM snapshots WHERE simulation_id = ? "
+                "UNION ALL SELECT seq FROM tick_log WHERE simulation_id = ?)",
+                (simulation_id, simulation_id),
+            ).fetchone()
+        return row[0]
+
+    def load(self, simulation_id: str, after_seq: Optional[int] = None) -> Tuple[Optional[Any], List[TickRecord]]:
+        """Return (snapshot, records to replay on top of it).
+
+        With ``after_seq``, a caller already holding the state at that sequence number
+        gets only the newer records and no snapshot, as long as the log still covers them.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT seq, data FROM snapshots WHERE simulation_id = ?", (simulation_id,)
+            ).fetchone()
+            if after_seq is not None and row is not None and row[0] <= after_seq:
+                snapshot_data, start = None, after_seq
+            elif row is not None:
+                snapshot_data, start = row[1], row[0]
+            else:
+                return None, []
+            records = self._db.execute(
+                "SELECT data FROM tick_log WHERE simulation_id = ? AND seq > ? ORDER BY seq",
+                (simulation_id, start),
+            ).fetchall()
+            self.metrics["loads"] += 1
+            self.metrics["records_replayed"] += len(records)
+        snapshot = loads_world_state(snapshot_data) if snapshot_data is not None else None
+        return snapshot, [loads_tick_record(record[0]) for record in records]
+
+    def delete(self, simulation_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM snapshots WHERE simulation_id = ?", (simulation_id,))
+            self._db.execute("DELETE FROM tick_log WHERE simulation_id = ?", (simulation_id,))
+            self._db.commit()
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            simulations = self._db.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+            log_records = self._db.execute("SELECT COUNT(*) FROM tick_log").fetchone()[0]
+        return {**self.metrics, "simulations": simulations, "log_records": log_records}
+
+
+class SimulationRegistry(MutableMapping):
+    """``WorldBrain.simulations`` backed by a store
+
+    Mapping lookups only see resident simulations and never touch the store.
+    ``load()`` also brings in a simulation this process has not seen yet (or
+    has evicted): ``recover(simulation_id)`` reads it from the store in a worker
+    thread, and concurrent loads of one simulation share that read. Callers that
+    find a resident copy behind the store (``WorldBrain.get_simulation`` checks on
+    every access) ``drop`` it so the following load catches up. Deleting an entry only forgets the local copy; the stored simulation stays
+    available.
+
+    Resident simulations are kept in least recently used order. Simulations pinned
+    by a running step are never evicted.
+    """
+
+    def __init__(self, recover: Callable[[str], Optional[Any]]):
+        self._recover = recover
+        self._loads = SingleFlight()
+        self._local: "OrderedDict[str, Any]" = OrderedDict()
+        self._last_access: Dict[str, float] = {}
+        self._pins: Dict[str, int] = {}
+        self.metrics: Dict[str, float] = {
+            "evictions": 0,
+            "rehydrations": 0,
+            "rehydrate_ms_total": 0.0,
+            "rehydrate_ms_max": 0.0,
+        }
+
+    def __getitem__(self, simulation_id: str):
+        world_state = self._local[simulation_id]
+        self._touch(simulation_id)
+        return world_state
+
+    def __contains__(self, simulation_id: object) -> bool:
+        return simulation_id in self._local
+
+    async def load(self, simulation_id: str) -> Optional[Any]:
+        """The simulation, loaded from the store if it is not resident; None if it does not exist"""
+        world_state = self._local.get(simulation_id)
+        if world_state is not None:
+            self._touch(simulation_id)
+            return world_state
+        return await self._loads.do(simulation_id, lambda: self._rehydrate(simulation_id))
+
+    async def _rehydrate(self, simulation_id: str) -> Optional[Any]:
+        started = time.perf_counter()
+        try:
+            world_state = await asyncio.to_thread(self._recover, simulation_id)
+        except (SnapshotError, sqlite3.Error) as e:
+            logger.error(f"Could not load simulation {simulation_id}: {e}")
+            world_state = None
+        # A step or a new world may have made it resident while the store was read
+        resident = self._local.get(simulation_id)
+        if resident is not None:
+            self._touch(simulation_id)
+            return resident
+        if world_state is None:
+            return None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.metrics["rehydrations"] += 1
+        self.metrics["rehydrate_ms_total"] += elapsed_ms
+        self.metrics["rehydrate_ms_max"] = max(self.metrics["rehydrate_ms_max"], elapsed_ms)
+        self[simulation_id] = world_state
+        return world_state
+
+    def _touch(self, simulation_id: str):
+        self._local.move_to_end(simulation_id)
+        self._last_access[simulation_id] = time.monotonic()
+
+    def __setitem__(self, simulation_id: str, world_state):
+        self._local[simulation_id] = world_state
+        self._touch(simulation_id)
+
+    def __delitem__(self, simulation_id: str):
+        del self._local[simulation_id]
+        self._last_access.pop(simulation_id, None)
+
+    def forget(self, simulation_id: str):
+        """Drop the local copy without consulting the store"""
+        self._local.pop(simulation_id, None)
+        self._last_access.pop(simulation_id, None)
+
+    def resident(self, simulation_id: str) -> Optional[Any]:
+        """The local copy, if any, without loading or touching it"""
+        return self._local.get(simulation_id)
+
+    @contextmanager
+    def pinned(self, simulation_id: str):
+        """Keep a simulation resident while a step mutates it"""
+        self._pins[simulation_id] = self._pins.get(simulation_id, 0) + 1
+        try:
+            yield
+        finally:
+            self._pins[simulation_id] -= 1
+            if not self._pins[simulation_id]:
+                del self._pins[simulation_id]
+
+    def eviction_candidates(self, policy: EvictionPolicy, footprint: Callable[[Any], int]) -> List[str]:
+        """Simulations to evict under ``policy``, least recently used first
+
+        Idle simulations go first; then the oldest ones until the count and the
+        estimated memory are within limits. The most recently used simulation
+        always stays resident.
+        """
+        now = time.monotonic()
+        unpinned = [simulation_id for simulation_id in list(self._local)[:-1] if simulation_id not in self._pins]
+        resident = len(self._local)
+        usage = sum(footprint(world_state) for world_state in self._local.values()) if policy.memory_budget else 0
+        candidates = []
+        for simulation_id in unpinned:
+            idle = policy.idle_ttl is not None and now - self._last_access[simulation_id] >= policy.idle_ttl
+            over_count = policy.max_resident is not None and resident > policy.max_resident
+            over_memory = policy.memory_budget is not None and usage > policy.memory_budget
+            if not (idle or over_count or over_memory):
+                continue
+            candidates.append(simulation_id)
+            resident -= 1
+            if policy.memory_budget:
+                usage -= footprint(self._local[simulation_id])
+        return candidates
+
+    def drop(self, simulation_id: str, world_state) -> bool:
+        """Forget a local copy that is still ``world_state`` and not pinned; the store keeps the simulation"""
+        if self._local.get(simulation_id) is not world_state or simulation_id in self._pins:
+            return False
+        self.forget(simulation_id)
+        return True
+
+    def evict(self, simulation_id: str, world_state) -> bool:
+        """``drop`` a cold simulation to free memory"""
+        if not self.drop(simulation_id, world_state):
+            return False
+        self.metrics["evictions"] += 1
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        rehydrations = self.metrics["rehydrations"]
+        return {
+            **self.metrics,
+            "resident": len(self._local),
+            "pinned": len(self._pins),
+            "rehydrate_ms_avg": self.metrics["rehydrate_ms_total"] / rehydrations if rehydrations else 0.0,
+        }
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._local)
+
+    def __len__(self) -> int:
+        return len(self._local)
+
+
+def create_simulation_store_from_env() -> Optional[SimulationStore]:
+    """Build the store from SIMULATION_STORE_* environment variables
+
+    The store is off (simulations stay in process memory) unless SIMULATION_STORE_DB
+    names the database file; keep it in a directory only the server's user can write.
+    """
+    db_path = os.getenv("SIMULATION_STORE_DB", "").strip()
+    if not db_path or db_path.lower() == "off":
+        return None
+    try:
+        return SimulationStore(db_path, snapshot_every=int(os.getenv("SIMULATION_STORE_SNAPSHOT_EVERY", "26")))
+    except sqlite3.Error as e:
+        logger.warning("Simulation store disabled: %s", e)
+        return None
+
+
+def create_eviction_policy_from_env() -> EvictionPolicy:
+    """Build the eviction policy from SIMULATION_IDLE_TTL, SIMULATION_MAX_RESIDENT and SIMULATION_MEMORY_BUDGET_MB"""
+    def optional(name: str, cast):
+        value = os.getenv(name, "").strip()
+        return cast(value) if value and float(value) > 0 else None
+
+    memory_budget_mb = optional("SIMULATION_MEMORY_BUDGET_MB", float)
+    return EvictionPolicy(
+        idle_ttl=optional("SIMULATION_IDLE_TTL", float) if "SIMULATION_IDLE_TTL" in os.environ else 1800.0,
+        max_resident=optional("SIMULATION_MAX_RESIDENT", int),
+        memory_budget=int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None,
+        sweep_interval=float(os.getenv("SIMULATION_EVICTION_SWEEP", "30")),
+    )
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Single Flight - Request coalescing for concurrent identical async calls
+Callers with the same key share one in-flight upstream request
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers await the same result"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.metrics: Dict[str, int] = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,
+        }
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``fn()`` for the first caller of ``key``; later callers join that call"""
+        self.metrics["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.metrics["executions"] += 1
+            # Run as a task so one caller's cancellation doesn't cancel the shared call
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.metrics["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {**self.metrics, "in_flight": self.in_flight}
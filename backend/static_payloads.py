@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Static Payloads - Pre-encoded JSON responses for data that rarely changes
+Serves bytes encoded once, with strong ETags, If-None-Match handling and
+precompressed gzip/brotli variants
+"""
+
+import gzip
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+try:
+    import brotli  # Optional: only used when installed
+except ImportError:
+    brotli = None
+
+
+class StaticPayload:
+    """A JSON document encoded once, with one strong ETag per content encoding"""
+
+    def __init__(self, data: Any):
+        body = json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.built_at = time.time()
+        # Each representation gets its own strong validator
+        self.variants: Dict[str, Tuple[bytes, str]] = {
+            "identity": (body, f'"{digest}"'),
+            "gzip": (gzip.compress(body, compresslevel=9), f'"{digest}-gzip"'),
+        }
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body), f'"{digest}-br"')
+        self.etags = {etag for _, etag in self.variants.values()}
+
+    def respond(self, request: Request) -> Response:
+        encoding = self._negotiate(request.headers.get("accept-encoding", ""))
+        body, etag = self.variants[encoding]
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",  # Clients revalidate; unchanged data costs only headers
+            "Vary": "Accept-Encoding",
+        }
+        if self._matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def _matches(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in candidates or bool(candidates & self.etags)
+
+    def _negotiate(self, accept_encoding: str) -> str:
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0"):
+                continue
+            accepted.add(name)
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return "identity"
+
+
+class StaticPayloadCache:
+    """Named payloads built lazily on first request and optionally rebuilt after a TTL"""
+
+    def __init__(self):
+        self._payloads: Dict[str, StaticPayload] = {}
+
+    def get(self, name: str, build: Callable[[], Any], ttl: Optional[float] = None) -> StaticPayload:
+        payload = self._payloads.get(name)
+        if payload is None or (ttl is not None and time.time() - payload.built_at > ttl):
+            payload = StaticPayload(build())
+            self._payloads[name] = payload
+        return payload
+
+    def respond(self, name: str, request: Request, build: Callable[[], Any], ttl: Optional[float] = None) -> Response:
+        return self.get(name, build, ttl).respond(request)
+
+    def invalidate(self, name: Optional[str] = None):
+        if name is None:
+            self._payloads.clear()
+        else:
+            self._payloads.pop(name, None)
+
+
+static_payloads = StaticPayloadCache()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Target Index - Weighted target selection for World Brain actions
+Keeps one Fenwick tree of target weights per actor, so a weighted target draw
+and a trust-driven weight change both cost O(log n) instead of O(n).
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Every other country stays a possible target
+TARGET_BASE_WEIGHT = 10
+# Countries in a different bloc are likelier targets
+RIVAL_BLOC_WEIGHT = 20
+# Allies deal with each other more than with unrelated countries
+SHARED_ALLIANCE_WEIGHT = 10
+# Distrust (negative trust, 0-100) is added on top, so hostile pairs dominate
+
+
+class TargetIndex:
+    """Per-actor cumulative target weights derived from trust, bloc membership and alliances
+
+    Rows and columns follow ``country_ids``; the diagonal has weight zero so an
+    actor never targets itself.
+    """
+
+    def __init__(self, country_ids: Sequence[str], countries: Dict[str, "Country"], trust: np.ndarray):
+        self.country_ids: List[str] = list(country_ids)
+        self.index: Dict[str, int] = {country_id: i for i, country_id in enumerate(self.country_ids)}
+        n = len(self.country_ids)
+        # Relation rows can outlive countries that left the world; those get no weight
+        ordered = [countries.get(country_id) for country_id in self.country_ids]
+        present = np.array([c is not None for c in ordered], dtype=bool)
+
+        # Trust-independent part of each weight
+        blocs: Dict[str, int] = {}
+        bloc_codes = np.array([blocs.setdefault(c.bloc, len(blocs)) if c else -1 for c in ordered], dtype=np.int32)
+        alliance_ids: Dict[str, int] = {}
+        incidence = np.zeros((n, 1), dtype=np.int32)
+        memberships = [[alliance_ids.setdefault(a, len(alliance_ids)) for a in set(c.alliances)] if c else []
+                       for c in ordered]
+        if alliance_ids:
+            incidence = np.zeros((n, len(alliance_ids)), dtype=np.int32)
+            for row, alliances in enumerate(memberships):
+                incidence[row, alliances] = 1
+        self.structure = (TARGET_BASE_WEIGHT
+                          + RIVAL_BLOC_WEIGHT * (bloc_codes[:, None] != bloc_codes[None, :])
+                          + SHARED_ALLIANCE_WEIGHT * ((incidence @ incidence.T) > 0)).astype(np.int32)
+        self.structure *= present[:, None] & present[None, :]
+        np.fill_diagonal(self.structure, 0)
+
+        self.weights = self._weights(self.structure, trust)
+        self.tree = self._build_tree(self.weights)
+        self.row_totals = self.weights.sum(axis=1, dtype=np.int64)
+        self.trust_version: Optional[int] = None  # Relation store version the weights reflect
+
+    @classmethod
+    def from_relations(cls, countries: Dict[str, "Country"], relations) -> "TargetIndex":
+        """Build from a RelationMatrix, or from a legacy Dict[str, Relation]"""
+        if hasattr(relations, "trust"):
+            target_index = cls(relations.country_ids, countries, relations.trust)
+            target_index.trust_version = relations.trust_version
+            return target_index
+        country_ids = sorted(countries)
+        index = {country_id: i for i, country_id in enumerate(country_ids)}
+        trust = np.zeros((len(country_ids), len(country_ids)), dtype=np.int16)
+        for relation in relations.values():
+            i, j = index.get(relation.country_a), index.get(relation.country_b)
+            if i is not None and j is not None:
+                trust[i, j] = trust[j, i] = relation.trust_level
+        return cls(country_ids, countries, trust)
+
+    @staticmethod
+    def _weights(structure: np.ndarray, trust: np.ndarray) -> np.ndarray:
+        weights = structure + np.maximum(0, -trust.astype(np.int32))
+        return np.where(structure > 0, weights, 0).astype(np.int32)
+
+    @staticmethod
+    def _build_tree(weights: np.ndarray) -> np.ndarray:
+        """Fenwick trees for every row at once: tree[:, k] sums weights (k - lowbit(k), k]
+
+        Rows are padded with zero weights to a power-of-two width so a descent
+        never needs bounds checks.
+        """
+        n = weights.shape[1]
+        width = 1 << max(0, n - 1).bit_length()
+        prefix = np.zeros((weights.shape[0], width + 1), dtype=np.int64)
+        np.cumsum(weights, axis=1, out=prefix[:, 1:n + 1])
+        prefix[:, n + 1:] = prefix[:, n:n + 1]
+        positions = np.arange(width + 1)
+        tree = prefix - prefix[:, positions - (positions & -positions)]
+        tree[:, 0] = 0
+        return tree
+
+    def sample(self, rows: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Draw one weighted target column for each actor row by descending its tree"""
+        rows = np.asarray(rows, dtype=np.int64)
+        remaining = (rng.random(len(rows)) * self.row_totals[rows]).astype(np.int64)
+        flat_tree = self.tree.ravel()
+        offsets = rows * self.tree.shape[1]
+        position = np.zeros(len(rows), dtype=np.int64)
+        step = self.tree.shape[1] - 1
+        while step:
+            subtree = flat_tree[offsets + position + step]
+            below = subtree <= remaining
+            remaining -= subtree * below
+            position += step * below
+            step >>= 1
+        return position
+
+    def update(self, rows: np.ndarray, cols: np.ndarray, trust: np.ndarray):
+        """Refresh the weights of the distinct symmetric pairs (rows[k], cols[k]) after a trust change"""
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        if not len(rows):
+            return
+        # Both directions of each pair: actor i weighs target j by the same trust as j weighs i
+        actors = np.concatenate([rows, cols])
+        targets = np.concatenate([cols, rows])
+        trust = np.concatenate([trust, trust])
+        structure = self.structure[actors, targets]
+        new_weights = np.where(structure > 0, structure + np.maximum(0, -np.asarray(trust, dtype=np.int32)), 0)
+        deltas = new_weights.astype(np.int64) - self.weights[actors, targets]
+        self.weights[actors, targets] = new_weights
+        changed = deltas != 0
+        actors, position, deltas = actors[changed], targets[changed] + 1, deltas[changed]
+        np.add.at(self.row_totals, actors, deltas)
+        width = self.tree.shape[1] - 1
+        while len(position):
+            np.add.at(self.tree, (actors, position), deltas)
+            position = position + (position & -position)
+            keep = position <= width
+            actors, position, deltas = actors[keep], position[keep], deltas[keep]
+
+    def check(self, trust: np.ndarray) -> bool:
+        """Debug aid: compare the incremental trees against a rebuild from ``trust``"""
+        weights = self._weights(self.structure, trust)
+        return bool(np.array_equal(self.tree, self._build_tree(weights))
+                    and np.array_equal(self.row_totals, weights.sum(axis=1, dtype=np.int64)))
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+HTTP Pool Test Script
+Checks that a pooled session verifies certificates unless told otherwise and
+that repeated requests to a local aiohttp server reuse one keep-alive
+connection.
+
+Run from the repository root:
+    python -m backend.test_http_pool
+"""
+
+import asyncio
+import ssl
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from .http_pool import PooledSession
+
+REQUESTS = 5
+
+
+async def _ping(request):
+    return web.json_response({"ok": True})
+
+
+def test_verifies_certificates_by_default():
+    """Sessions verify certificates unless a caller passes verify_ssl=False"""
+    assert PooledSession()._ssl_context() is None
+    unverified = PooledSession(verify_ssl=False)._ssl_context()
+    assert unverified.verify_mode == ssl.CERT_NONE and not unverified.check_hostname
+
+
+def test_connection_reuse():
+    """Sequential requests share one connection and one session"""
+    async def run():
+        app = web.Application()
+        app.router.add_get("/ping", _ping)
+        server = TestServer(app)
+        await server.start_server()
+        pool = PooledSession()
+        try:
+            session = await pool.get()
+            for _ in range(REQUESTS):
+                async with (await pool.get()).get(server.make_url("/ping")) as response:
+                    assert response.status == 200
+                    assert await response.json() == {"ok": True}
+            assert await pool.get() is session
+            return pool.get_metrics()
+        finally:
+            await pool.close()
+            await server.close()
+    metrics = asyncio.run(run())
+    assert metrics == {"requests": REQUESTS, "connections_created": 1, "connections_reused": REQUESTS - 1}, metrics
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Starting HTTP Pool Tests...")
+    failed = 0
+    for test in (test_verifies_certificates_by_default, test_connection_reuse):
+        try:
+            test()
+            print(f"✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e!r}")
+    print("\n✨ Tests completed!" if not failed else f"\n❌ {failed} test(s) failed")
+    return not failed
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Indicator Store Test Script
+Checks stale-while-revalidate reads with a stub fetch: stale values are served
+at once, concurrent stale reads start a single background refresh, and a failed
+or empty refresh keeps the previous values.
+
+Run from the repository root:
+    python -m backend.test_indicator_store
+"""
+
+import asyncio
+import time
+
+from .refdata.indicator_store import IndicatorSnapshot, IndicatorStore
+
+CODE = "NY.GDP.MKTP.CD"
+OLD = {"USA": {"value": 1.0, "date": "2023"}}
+NEW = {"USA": {"value": 2.0, "date": "2024"}}
+
+
+class _StubFetch:
+    """Fetch that counts calls and waits for ``release`` before returning ``result`` (or raising it)"""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, code):
+        assert code == CODE
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _stale_store(fetch):
+    """A store holding a stale OLD snapshot; persistence is skipped so no database is touched"""
+    store = IndicatorStore(fetch, stale_after=60)
+    store.register("gdp", CODE)
+    store._snapshots[CODE] = IndicatorSnapshot(data=OLD, fetched_at=time.time() - 120)
+    store._persist = lambda code, snapshot: None
+    return store
+
+
+def test_stale_served_with_one_refresh():
+    """Stale reads return at once and share one background refresh"""
+    async def run():
+        fetch = _StubFetch(NEW)
+        store = _stale_store(fetch)
+        # The refresh is still blocked, so every read here is served from the stale snapshot
+        snapshots = await asyncio.wait_for(asyncio.gather(*(store.get("gdp") for _ in range(5))), timeout=1)
+        assert all(snapshot.data == OLD for snapshot in snapshots)
+        await asyncio.sleep(0)
+        assert fetch.calls == 1, fetch.calls
+
+        fetch.release.set()
+        await store._refreshing[CODE]
+        fresh = await store.get("gdp")
+        assert fresh.data == NEW
+        return store.metrics, fetch.calls
+    metrics, calls = asyncio.run(run())
+    assert calls == 1
+    assert metrics == {"reads": 6, "stale_reads": 5, "refreshes": 1, "refresh_failures": 0}, metrics
+
+
+def test_failed_refresh_keeps_old_value():
+    """A refresh that raises or returns nothing leaves the previous values in place"""
+    async def run(result):
+        fetch = _StubFetch(result)
+        fetch.release.set()
+        store = _stale_store(fetch)
+        assert (await store.get("gdp")).data == OLD
+        await store._refreshing[CODE]
+        snapshot = await store.get("gdp")
+        return snapshot.data, store.metrics["refresh_failures"]
+    for result in (RuntimeError("World Bank unavailable"), {}):
+        data, failures = asyncio.run(run(result))
+        assert data == OLD, result
+        assert failures >= 1, result
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Starting Indicator Store Tests...")
+    failed = 0
+    for test in (test_stale_served_with_one_refresh, test_failed_refresh_keeps_old_value):
+        try:
+            test()
+            print(f"✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e!r}")
+    print("\n✨ Tests completed!" if not failed else f"\n❌ {failed} test(s) failed")
+    return not failed
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
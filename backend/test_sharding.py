@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Sharding Test Script
+Starts the API as two shard workers and as a single process, each on temporary
+Unix sockets, and checks that every simulation is served by the worker that
+owns it and that forwarded responses match the single-process ones.
+
+Run from the repository root:
+    python -m backend.test_sharding
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from .shard_server import worker_sockets
+from .sharding import SHARD_HEADER, ShardRouter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+START_TIMEOUT = 60.0
+CREATE = {"start_month": 1, "start_year": 2026, "seed": 7}
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@contextlib.contextmanager
+def _shard_server(workers: int):
+    """Run ``backend.shard_server`` with ``workers`` workers; yields {worker id: socket path}"""
+    with tempfile.TemporaryDirectory(prefix="worldbrain_shard_test_") as directory:
+        socket_dir = os.path.join(directory, "sockets")
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT, SEEDED_CACHE_MAX_BYTES="0",
+                   DATABASE_URL=f"sqlite:///{os.path.join(directory, 'ref.db')}")
+        env.pop("SIMULATION_STORE_DB", None)
+        process = subprocess.Popen(
+            [sys.executable, "-m", "backend.shard_server", "--workers", str(workers), "--port", str(_free_port()),
+             "--socket-dir", socket_dir, "--log-level", "warning"],
+            cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            sockets = worker_sockets(socket_dir, workers)
+            asyncio.run(_wait_until_serving(sockets.values(), process))
+            yield sockets
+        finally:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+async def _wait_until_serving(paths, process: subprocess.Popen):
+    deadline = time.monotonic() + START_TIMEOUT
+    for path in paths:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"shard server exited with {process.returncode}")
+            try:
+                if (await _request(path, "GET", "/health"))[0] == 200:
+                    break
+            except (aiohttp.ClientError, OSError):
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"worker on {path} did not start")
+            await asyncio.sleep(0.2)
+
+
+async def _request(path: str, method: str, url: str, body=None):
+    """(status, shard header, decoded JSON body) of one request sent to the worker on ``path``"""
+    async with aiohttp.ClientSession(connector=aiohttp.UnixConnector(path=path)) as session:
+        async with session.request(method, f"http://worker{url}", json=body) as response:
+            return response.status, response.headers.get(SHARD_HEADER), json.loads(await response.read())
+
+
+def _normalized(body, simulation_id: str):
+    """A response body without its simulation id and wall-clock timestamps, so runs of the same seed compare equal"""
+    def drop_timestamp(entry):
+        entry.pop("timestamp", None)
+        return entry
+    return json.loads(json.dumps(body).replace(simulation_id, "<simulation>"), object_hook=drop_timestamp)
+
+
+async def _session_through(create_path: str, read_path: str):
+    """Create a seeded simulation on one worker, then advance it and read its status through another
+
+    Returns the simulation id, the shard header of every call after the create and the normalized responses.
+    """
+    status, _, created = await _request(create_path, "POST", "/worldbrain/create", CREATE)
+    assert status == 200, created
+    simulation_id = created["id"]
+    responses, shards = [("create", status, _normalized(created, simulation_id))], []
+    for name, method, url in (("advance", "POST", f"/worldbrain/{simulation_id}/advance?weeks=2"),
+                              ("tick", "POST", f"/worldbrain/{simulation_id}/advance"),
+                              ("status", "GET", f"/worldbrain/{simulation_id}/status"),
+                              ("bad weeks", "POST", f"/worldbrain/{simulation_id}/advance?weeks=0")):
+        status, shard, body = await _request(read_path, method, url)
+        responses.append((name, status, _normalized(body, simulation_id)))
+        shards.append(shard)
+    return simulation_id, shards, responses
+
+
+def _missing_owned_by(router: ShardRouter, worker_id: str) -> str:
+    """An unknown simulation id that ``worker_id`` owns"""
+    index = 0
+    while router.owner(f"missing-{index}") != worker_id:
+        index += 1
+    return f"missing-{index}"
+
+
+def test_sharded_matches_single_process():
+    """Simulations stick to their owner and forwarded responses match a single process"""
+    with _shard_server(1) as single:
+        path = single["w0"]
+        _, _, expected = asyncio.run(_session_through(path, path))
+        missing_status = asyncio.run(_request(path, "GET", "/worldbrain/missing/status"))
+        missing_advance = asyncio.run(_request(path, "POST", "/worldbrain/missing/advance"))
+    assert [status for _, status, _ in expected] == [200, 200, 200, 200, 422], expected
+    assert missing_status[0] == 404 and missing_advance[0] == 404
+
+    with _shard_server(2) as sharded:
+        router = ShardRouter("test", sharded)
+        for creator, reader in (("w0", "w1"), ("w1", "w0"), ("w0", "w0")):
+            simulation_id, shards, responses = asyncio.run(_session_through(sharded[creator], sharded[reader]))
+            # New simulations are created on the worker that received them, and always served there
+            assert router.owner(simulation_id) == creator
+            assert shards == [creator] * len(shards), (creator, reader, shards)
+            assert responses == expected, (creator, reader)
+
+        for owner, reader in (("w0", "w1"), ("w1", "w0")):
+            missing = _missing_owned_by(router, owner)
+            status = asyncio.run(_request(sharded[reader], "GET", f"/worldbrain/{missing}/status"))
+            advance = asyncio.run(_request(sharded[reader], "POST", f"/worldbrain/{missing}/advance"))
+            assert status == (missing_status[0], owner, missing_status[2]), status
+            assert advance == (missing_advance[0], owner, missing_advance[2]), advance
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Starting Sharding Tests...")
+    failed = 0
+    for test in (test_sharded_matches_single_process,):
+        try:
+            test()
+            print(f"✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e!r}")
+    print("\n✨ Tests completed!" if not failed else f"\n❌ {failed} test(s) failed")
+    return not failed
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+World Snapshot Test Script
+Round-trips WorldState through the binary snapshot format (v2) and the legacy
+compressed pickle (v1), and checks that damaged or newer snapshots are rejected.
+
+Run from the repository root:
+    python -m backend.test_world_snapshot
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+
+from . import world_snapshot
+from .world_brain import WorldBrain
+from .world_snapshot import SnapshotError
+
+WEEKS = 6
+
+
+def _world(simulation_id: str = "snapshot-test", seed: int = 11, weeks: int = WEEKS):
+    """A brain and a seeded world advanced ``weeks`` weeks"""
+    async def build():
+        brain = WorldBrain()
+        with contextlib.redirect_stdout(io.StringIO()):
+            world_state = await brain.initialize_world(simulation_id, seed=seed, start_month=1, start_year=2026)
+            for _ in range(weeks):
+                world_state = await brain.tick(simulation_id)
+        return brain, world_state
+    return asyncio.run(build())
+
+
+def _fingerprint(world_state):
+    """Everything a restored world must reproduce exactly"""
+    relations = world_state.relations
+    return (
+        world_state.seq, world_state.week_number, world_state.current_date, world_state.replay_path,
+        {country_id: vars(country) for country_id, country in world_state.countries.items()},
+        [(action.id, action.actor_id, action.target_id, action.action_type) for action in world_state.actions],
+        sorted(world_state.action_index),
+        [(news.seq, news.headline, news.content) for news in world_state.news],
+        world_state.map_state.country_states, world_state.map_state.active_conflicts,
+        world_state.map_state.global_tension, len(world_state.map_states),
+        world_state.rng.getstate(), world_state.np_rng.bit_generator.state,
+        [getattr(relations, name).tobytes() for name in ("trust", "trade_volume", "military_cooperation",
+                                                         "diplomatic_relations", "cultural_affinity")],
+    )
+
+
+def _continue(brain, simulation_id: str, world_state, weeks: int = 3):
+    """Fingerprint after advancing ``world_state`` a few more weeks in ``brain``"""
+    async def advance():
+        brain.simulations[simulation_id] = world_state
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(weeks):
+                advanced = await brain.tick(simulation_id)
+        return _fingerprint(advanced)
+    return asyncio.run(advance())
+
+
+def _expect_error(load, data, message: str):
+    try:
+        load(data)
+    except SnapshotError as e:
+        assert message in str(e), f"expected {message!r}, got {e!r}"
+        return
+    raise AssertionError(f"{message!r} was not raised")
+
+
+def test_v2_round_trip():
+    """Format 2 bytes restore an identical world that continues exactly like the original"""
+    brain, world_state = _world()
+    data = world_snapshot.dumps_world_state(world_state)
+    assert data[:4] == world_snapshot.SNAPSHOT_MAGIC
+    loaded = world_snapshot.loads_world_state(data)
+    assert _fingerprint(loaded) == _fingerprint(world_state)
+    assert loaded.relations.trust.flags.writeable
+    assert all(loaded.action_index[action.id] is action for action in loaded.actions)
+
+    original = world_snapshot.loads_world_state(data)
+    assert _continue(WorldBrain(), "restored", loaded) == _continue(brain, "snapshot-test", original)
+
+
+def test_v2_file_round_trip():
+    """A saved file loads the same world with and without memory mapping"""
+    _, world_state = _world()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "world.wbs")
+        world_snapshot.save_world_state(world_state, path)
+        mapped = world_snapshot.load_world_state(path)
+        read = world_snapshot.load_world_state(path, use_mmap=False)
+        assert _fingerprint(mapped) == _fingerprint(world_state)
+        assert _fingerprint(read) == _fingerprint(world_state)
+        # Mapped relation arrays are copy-on-write views: writable, and writes never reach the file
+        trust = mapped.relations.trust
+        assert trust.base is not None and trust.flags.writeable
+        trust[0, 1] = 99
+        assert _fingerprint(world_snapshot.load_world_state(path)) == _fingerprint(world_state)
+
+
+def test_v1_legacy_round_trip():
+    """Format 1 (zlib-compressed pickle) snapshots still load from bytes and from files"""
+    _, world_state = _world()
+    data = world_snapshot.LEGACY_SNAPSHOT_MAGIC + zlib.compress(pickle.dumps(world_state, pickle.HIGHEST_PROTOCOL))
+    assert _fingerprint(world_snapshot.loads_world_state(data)) == _fingerprint(world_state)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "legacy.wbs")
+        with open(path, "wb") as f:
+            f.write(data)
+        assert _fingerprint(world_snapshot.load_world_state(path)) == _fingerprint(world_state)
+    _expect_error(world_snapshot.loads_world_state, data[:len(data) // 2], "Corrupt world snapshot")
+
+
+def test_truncated_snapshot():
+    """Cut-off snapshot bytes and files raise SnapshotError instead of loading a partial world"""
+    _, world_state = _world(weeks=1)
+    data = world_snapshot.dumps_world_state(world_state)
+    _expect_error(world_snapshot.loads_world_state, data[:6], "Truncated world snapshot")
+    for length in (len(data) // 4, len(data) // 2, len(data) - 1):
+        _expect_error(world_snapshot.loads_world_state, data[:length], "snapshot")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "world.wbs")
+        world_snapshot.save_world_state(world_state, path)
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 16)
+        _expect_error(world_snapshot.load_world_state, path, "Truncated world snapshot")
+
+
+def test_wrong_version():
+    """Snapshots from a newer format version or with a foreign magic are rejected"""
+    _, world_state = _world(weeks=1)
+    data = bytearray(world_snapshot.dumps_world_state(world_state))
+    struct.pack_into("<H", data, 4, world_snapshot.FORMAT_VERSION + 1)
+    _expect_error(world_snapshot.loads_world_state, bytes(data), "newer than this build supports")
+    _expect_error(world_snapshot.loads_world_state, b"WBS9" + bytes(data[4:]), "Not a world snapshot")
+
+
+def main():
+    """Run all tests"""
+    print("🧪 Starting World Snapshot Tests...")
+    failed = 0
+    for test in (test_v2_round_trip, test_v2_file_round_trip, test_v1_legacy_round_trip,
+                 test_truncated_snapshot, test_wrong_version):
+        try:
+            test()
+            print(f"✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e!r}")
+    print("\n✨ Tests completed!" if not failed else f"\n❌ {failed} test(s) failed")
+    return not failed
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tick Scheduler - Ordered, coalesced simulation steps
+Steps on one simulation run one at a time in arrival order, a step identical
+to the last one still waiting in its queue shares that run, and different
+simulations step concurrently.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _SimulationQueue:
+    """Lock and waiting steps of one simulation"""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.tail: Optional[Tuple[Hashable, asyncio.Future]] = None  # Last queued step and its key, until it starts
+        self.depth = 0  # Steps queued or running
+
+
+class TickScheduler:
+    """Run simulation steps under a per-simulation lock
+
+    A request identical to the last step waiting for the same simulation joins
+    it, so a burst of duplicate clicks runs once and every caller gets the same
+    result. Anything else queues a new step behind the others: a duplicate of an
+    earlier step never jumps ahead of a different step submitted in between, and
+    a duplicate of a step that is already running queues one more run.
+    ``max_concurrent`` caps steps running across all simulations, admitted in
+    arrival order.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        self.max_concurrent = max_concurrent
+        self._slots: Optional[asyncio.Semaphore] = None  # Created on first use, inside the running loop
+        self._queues: Dict[str, _SimulationQueue] = {}
+        self.running = 0
+        self.metrics: Dict[str, float] = {
+            "requests": 0,
+            "runs": 0,
+            "coalesced": 0,
+            "failures": 0,
+            "max_queue_depth": 0,
+            "step_ms_total": 0.0,
+            "step_ms_max": 0.0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+    async def submit(self, simulation_id: str, key: Hashable, step: Callable[[], Awaitable[Any]]) -> Any:
+        """Queue ``step()`` for a simulation; joins the last waiting step if it is identical"""
+        self.metrics["requests"] += 1
+        queue = self._queues.get(simulation_id)
+        if queue is None:
+            queue = self._queues[simulation_id] = _SimulationQueue()
+        if queue.tail is not None and queue.tail[0] == key:
+            task = queue.tail[1]
+            self.metrics["coalesced"] += 1
+        else:
+            # Run as a task so a caller that disconnects never leaves a step half-applied
+            task = asyncio.ensure_future(self._run(simulation_id, queue, step))
+            queue.tail = (key, task)
+            task.add_done_callback(self._retrieve)
+        return await asyncio.shield(task)
+
+    async def _run(self, simulation_id: str, queue: _SimulationQueue, step: Callable[[], Awaitable[Any]]) -> Any:
+        queue.depth += 1
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], queue.depth)
+        queued_at = time.perf_counter()
+        try:
+            async with queue.lock:
+                # Started: identical requests from now on queue a new step
+                if queue.tail is not None and queue.tail[1] is asyncio.current_task():
+                    queue.tail = None
+                if self.max_concurrent:
+                    if self._slots is None:
+                        self._slots = asyncio.Semaphore(self.max_concurrent)
+                    async with self._slots:
+                        return await self._step(queue_wait=time.perf_counter() - queued_at, step=step)
+                return await self._step(queue_wait=time.perf_counter() - queued_at, step=step)
+        finally:
+            queue.depth -= 1
+            if not queue.depth and self._queues.get(simulation_id) is queue:
+                del self._queues[simulation_id]
+
+    async def _step(self, queue_wait: float, step: Callable[[], Awaitable[Any]]) -> Any:
+        self.metrics["runs"] += 1
+        self.metrics["wait_ms_total"] += queue_wait * 1000
+        self.metrics["wait_ms_max"] = max(self.metrics["wait_ms_max"], queue_wait * 1000)
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            return await step()
+        except Exception:
+            self.metrics["failures"] += 1
+            raise
+        finally:
+            self.running -= 1
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.metrics["step_ms_total"] += elapsed_ms
+            self.metrics["step_ms_max"] = max(self.metrics["step_ms_max"], elapsed_ms)
+
+    @staticmethod
+    def _retrieve(task: asyncio.Future):
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
+
+    @property
+    def queued(self) -> int:
+        """Steps waiting for their simulation's lock or a concurrency slot"""
+        return sum(queue.depth for queue in self._queues.values()) - self.running
+
+    def get_metrics(self) -> Dict[str, Any]:
+        runs = self.metrics["runs"]
+        return {
+            **self.metrics,
+            "queued": self.queued,
+            "running": self.running,
+            "active_simulations": len(self._queues),
+            "step_ms_avg": self.metrics["step_ms_total"] / runs if runs else 0.0,
+            "wait_ms_avg": self.metrics["wait_ms_total"] / runs if runs else 0.0,
+        }
+
+
+def create_tick_scheduler_from_env() -> TickScheduler:
+    """Build the scheduler from TICK_SCHEDULER_CONCURRENCY (empty or 0: no global cap)"""
+    max_concurrent = int(os.getenv("TICK_SCHEDULER_CONCURRENCY", "0") or 0)
+    return TickScheduler(max_concurrent=max_concurrent if max_concurrent > 0 else None)
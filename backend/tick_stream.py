@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tick Stream - Server-sent event fan-out of per-tick simulation diffs
+Each tick is diffed and encoded once, then offered to every subscriber's bounded
+queue; subscribers that fall behind get their backlog coalesced into one update
+"""
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+from . import simulation_serializer as serializer
+from .simulation_history import diff_map_states
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TickUpdate:
+    """Everything that changed in one tick (or several, once coalesced)"""
+    seq: int  # Simulation sequence number after the last included tick
+    week_number: int
+    current_date: str
+    news: List[Any]
+    changed_countries: Dict[str, Dict[str, Any]]
+    removed_countries: List[str]
+    global_tension: int
+    bloc_distribution: Optional[Dict[str, int]]  # None when unchanged
+    conflicts_added: List[str]
+    conflicts_removed: List[str]
+    ticks: int = 1
+    news_dropped: int = 0  # Articles left out of a coalesced update; fetch them via status?since=
+    _frame: Optional[bytes] = field(default=None, repr=False)
+
+    def merge(self, newer: "TickUpdate", max_news: int) -> "TickUpdate":
+        """Fold a later update into this one, keeping only the net change"""
+        changed = dict(self.changed_countries)
+        for country_id in newer.removed_countries:
+            changed.pop(country_id, None)
+        changed.update(newer.changed_countries)
+        removed = [country_id for country_id in self.removed_countries if country_id not in newer.changed_countries]
+        removed += newer.removed_countries
+
+        added = [key for key in self.conflicts_added if key not in newer.conflicts_removed]
+        cancelled = set(self.conflicts_added) & set(newer.conflicts_removed)
+        conflicts_removed = self.conflicts_removed + [key for key in newer.conflicts_removed if key not in cancelled]
+        reinstated = set(conflicts_removed) & set(newer.conflicts_added)
+        conflicts_removed = [key for key in conflicts_removed if key not in reinstated]
+        added += [key for key in newer.conflicts_added if key not in reinstated]
+
+        news = self.news + newer.news
+        dropped = self.news_dropped + newer.news_dropped + max(0, len(news) - max_news)
+        return TickUpdate(
+            seq=newer.seq,
+            week_number=newer.week_number,
+            current_date=newer.current_date,
+            news=news[-max_news:] if max_news else [],
+            changed_countries=changed,
+            removed_countries=removed,
+            global_tension=newer.global_tension,
+            bloc_distribution=newer.bloc_distribution if newer.bloc_distribution is not None else self.bloc_distribution,
+            conflicts_added=added,
+            conflicts_removed=conflicts_removed,
+            ticks=self.ticks + newer.ticks,
+            news_dropped=dropped,
+        )
+
+    def frame(self) -> bytes:
+        """SSE frame for this update, encoded once however many subscribers receive it"""
+        if self._frame is None:
+            data = serializer.assemble({
+                "seq": serializer.encode(self.seq),
+                "week_number": serializer.encode(self.week_number),
+                "current_date": serializer.encode(self.current_date),
+                "ticks": serializer.encode(self.ticks),
+                "news": serializer.news_list(self.news),
+                "news_dropped": serializer.encode(self.news_dropped),
+                "changed_countries": serializer.encode(self.changed_countries),
+                "removed_countries": serializer.encode(self.removed_countries),
+                "global_tension": serializer.encode(self.global_tension),
+                "bloc_distribution": serializer.encode(self.bloc_distribution),
+                "conflicts_added": serializer.encode(self.conflicts_added),
+                "conflicts_removed": serializer.encode(self.conflicts_removed),
+            })
+            self._frame = b"id: %d\nevent: tick\ndata: " % self.seq + data + b"\n\n"
+        return self._frame
+
+
+class TickSubscriber:
+    """One stream client: a bounded queue plus a single coalesced overflow update"""
+
+    def __init__(self, max_queue: int, max_news: int):
+        self.max_queue = max_queue
+        self.max_news = max_news
+        self.queue: Deque[TickUpdate] = deque()
+        self.overflow: Optional[TickUpdate] = None
+        self.coalesced = 0
+        self._ready = asyncio.Event()
+
+    def offer(self, update: TickUpdate) -> bool:
+        """Queue an update without blocking the tick; returns False if it had to be coalesced"""
+        queued = self.overflow is None and len(self.queue) < self.max_queue
+        if queued:
+            self.queue.append(update)
+        else:
+            # Merge into the overflow slot so order is kept and memory stays bounded
+            self.overflow = update if self.overflow is None else self.overflow.merge(update, self.max_news)
+            self.coalesced += 1
+        self._ready.set()
+        return queued
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[TickUpdate]:
+        """Next update, or None if nothing arrived within ``timeout`` seconds"""
+        while not self.queue and self.overflow is None:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.queue:
+            return self.queue.popleft()
+        update, self.overflow = self.overflow, None
+        return update
+
+
+class TickBroadcaster:
+    """Fans tick diffs out to every subscriber of a simulation"""
+
+    def __init__(self, max_queue: int = 16, max_news: int = 50, heartbeat_seconds: float = 15.0):
+        self.max_queue = max_queue
+        self.max_news = max_news
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers: Dict[str, Set[TickSubscriber]] = {}
+        self.metrics: Dict[str, int] = {"ticks_published": 0, "frames_offered": 0, "coalesced": 0}
+
+    def subscribe(self, simulation_id: str) -> TickSubscriber:
+        subscriber = TickSubscriber(self.max_queue, self.max_news)
+        self._subscribers.setdefault(simulation_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, simulation_id: str, subscriber: TickSubscriber):
+        subscribers = self._subscribers.get(simulation_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[simulation_id]
+
+    def publish(self, simulation_id: str, world_state, previous_map_state, new_news: List[Any]):
+        """WorldBrain tick listener: diff the tick once and offer it to every subscriber"""
+        subscribers = self._subscribers.get(simulation_id)
+        if not subscribers:
+            return
+        delta = diff_map_states(previous_map_state, world_state.map_state)
+        update = TickUpdate(
+            seq=world_state.seq,
+            week_number=world_state.week_number,
+            current_date=world_state.current_date.strftime("%m/%d/%Y"),
+            news=list(new_news),
+            changed_countries=delta.changed_countries,
+            removed_countries=delta.removed_countries,
+            global_tension=delta.global_tension,
+            bloc_distribution=delta.bloc_distribution,
+            conflicts_added=delta.conflicts_added,
+            conflicts_removed=delta.conflicts_removed,
+        )
+        self.metrics["ticks_published"] += 1
+        for subscriber in list(subscribers):
+            self.metrics["frames_offered"] += 1
+            if not subscriber.offer(update):
+                self.metrics["coalesced"] += 1
+
+    async def stream(self, simulation_id: str, world_state) -> AsyncIterator[bytes]:
+        """SSE byte stream for one client; starts with the cursor to resume status polling from"""
+        subscriber = self.subscribe(simulation_id)
+        try:
+            yield b"event: hello\ndata: " + serializer.assemble({
+                "cursor": serializer.encode(world_state.seq),
+                "week_number": serializer.encode(world_state.week_number),
+            }) + b"\n\n"
+            while True:
+                update = await subscriber.next(self.heartbeat_seconds)
+                # Comment lines keep idle connections (and proxies) alive
+                yield update.frame() if update is not None else b": keepalive\n\n"
+        finally:
+            self.unsubscribe(simulation_id, subscriber)
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            **self.metrics,
+            "simulations": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+        }
+
+
+tick_broadcaster = TickBroadcaster()
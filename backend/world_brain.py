@@ -4,17 +4,54 @@ World Brain - Core Simulation Engine
 Implements the World Brain architecture with rich data integration
 """
 
+import asyncio
+import contextlib
+import heapq
 import logging
+import os
 import random
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from .relation_matrix import RelationMatrix, CONFLICT_TRUST_THRESHOLD
+from .seeded_cache import SeededResultCache, create_seeded_cache_from_env
+from .simulation_store import (EvictionPolicy, SimulationRegistry, SimulationStore, StoreConflict, TickRecord,
+                               WeekRecord, create_eviction_policy_from_env, create_simulation_store_from_env,
+                               dumps_tick_record)
+from .target_index import TargetIndex
+from .tick_scheduler import TickScheduler, create_tick_scheduler_from_env
+from .simulation_history import (ActivityHistory, HistoryPolicy, MapStateDelta, MapStateHistory, compact_world_state,
+                                 diff_map_states)
+from .world_snapshot import SnapshotError, dumps_world_state, loads_world_state
 from .world_data_service import world_data_service
 from .world_leaders_service import world_leaders_service
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever a change alters the results a seed produces, so cached runs are not reused
+ENGINE_VERSION = 4
+
+ACTION_TYPES = ("diplomatic", "military", "economic", "cyber")
+
+# Approximate resident bytes per simulation object, measured on CPython 3.11; used for the memory budget
+COUNTRY_FOOTPRINT = 1500  # Country, doctrine and engine cache rows
+RELATION_FOOTPRINT = 600  # One Relation object (dict relation store)
+ACTION_FOOTPRINT = 700  # Action, outcome and index entry
+NEWS_FOOTPRINT = 800  # Article object, on top of its text
+MAP_ENTRY_FOOTPRINT = 50  # One country in one retained map state
+
+# Description template and verb choices per action type; descriptions are only
+# formatted for actions that become news
+ACTION_DESCRIPTIONS = {
+    "diplomatic": ("{actor} engages in diplomatic {detail} with {target}", ("pressure", "negotiations", "threats", "overtures")),
+    "military": ("{actor} conducts military {detail} near {target}", ("exercises", "deployments", "threats", "operations")),
+    "economic": ("{actor} implements economic {detail} with {target}", ("sanctions", "trade restrictions", "incentives", "agreements")),
+    "cyber": ("{actor} conducts cyber {detail} against {target}", ("operations", "espionage", "attacks", "defense")),
+}
+
 @dataclass
 class Country:
     """Represents a country in the simulation"""
@@ -71,6 +108,7 @@ class Action:
     intensity: int  # 0-100
     timestamp: datetime
     success_probability: float
+    detail: int = 0  # Verb index into ACTION_DESCRIPTIONS for lazy descriptions
 
 @dataclass
 class Outcome:
@@ -98,10 +136,20 @@ class GeneratedNews:
     source: str
     timestamp: datetime
     stat_changes: Dict[str, Any] = field(default_factory=dict)
+    seq: int = 0  # Position in the simulation's update sequence
+    render_cache: Dict[str, bytes] = field(default_factory=dict, init=False, repr=False, compare=False)  # Encoded API fragments
+
+    def __getstate__(self):
+        # Encoded fragments are rebuilt on demand; keep them out of snapshots
+        return {**self.__dict__, "render_cache": {}}
 
 @dataclass
 class MapState:
-    """Represents the current state of the world map"""
+    """Represents the current state of the world map
+
+    Consecutive snapshots share unchanged country entries, country maps and
+    conflict lists, so snapshots must be treated as read-only.
+    """
     timestamp: datetime
     country_states: Dict[str, Dict[str, Any]]
     bloc_distribution: Dict[str, int]
@@ -116,31 +164,100 @@ class WorldState:
     week_number: int
     countries: Dict[str, Country]
     doctrines: Dict[str, Doctrine]
-    relations: Dict[str, Relation]
+    relations: Union[Dict[str, Relation], RelationMatrix]
     actions: List[Action]
     outcomes: List[Outcome]
     news: List[GeneratedNews]
-    map_states: List[MapState]
+    map_states: Union[List[MapState], MapStateHistory]
     map_state: MapState  # Current map state
     global_indicators: Dict[str, Any]
+    action_index: Dict[str, Action] = field(default_factory=dict)  # Action lookup by id
+    action_count: int = 0  # Actions created since the simulation started
+    history: ActivityHistory = field(default_factory=ActivityHistory)  # Rolled-up older activity
+    fresh_news: bool = False  # Bypass the LLM response cache for this simulation
+    seq: int = 0  # Last sequence number issued to a tick or news article
+    tick_seq: int = 0  # Sequence number of the most recent tick
+    seed: Optional[int] = None  # Seed the simulation's random streams were created from
+    start_date: Optional[datetime] = None  # Calendar date the simulation started at
+    rng: random.Random = field(default_factory=random.Random, repr=False, compare=False)  # Engine random stream
+    np_rng: np.random.Generator = field(default_factory=np.random.default_rng, repr=False, compare=False)  # Vectorized draws
+    replay_path: Optional[str] = None  # Advance calls since creation; None when results are not reproducible
+    render_cache: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)  # Encoded API fragments
+    engine_cache: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)  # Derived engine arrays
+
+    def __getstate__(self):
+        return {**self.__dict__, "render_cache": {}, "engine_cache": {}}
 
 class WorldBrain:
     """Core World Brain simulation engine"""
     
-    def __init__(self):
+    def __init__(self, use_relation_matrix: bool = True, history_policy: Optional[HistoryPolicy] = None,
+                 news_concurrency: int = 4, news_batch_size: int = 4, result_cache: Optional[SeededResultCache] = None,
+                 verify_aggregates: bool = False, store: Optional[SimulationStore] = None,
+                 eviction_policy: Optional[EvictionPolicy] = None, scheduler: Optional[TickScheduler] = None):
         # Initialize ChatGPT service only when needed
         self.chatgpt_service = None
-        self.simulations: Dict[str, WorldState] = {}
-        self.current_week = 0
+        # Dense NumPy relation store; False keeps one Relation object per pair
+        self.use_relation_matrix = use_relation_matrix
+        # Retention limits that keep per-simulation memory bounded
+        self.history_policy = history_policy or HistoryPolicy()
+        # LLM news fan-out: events per completion request and concurrent requests
+        self.news_batch_size = max(1, news_batch_size)
+        self.news_concurrency = max(1, news_concurrency)
+        self._news_semaphore: Optional[asyncio.Semaphore] = None  # Created on first use, inside the running loop
+        # Memo of seeded results; only worlds with a replay path are cached
+        self.result_cache = result_cache
+        # Debug mode: check incrementally maintained relation aggregates against a full recompute every tick
+        self.verify_aggregates = verify_aggregates
+        # Durable snapshots and tick logs; with a store, simulations load lazily in any worker
+        self.store = store
+        self.simulations: Union[Dict[str, WorldState], SimulationRegistry] = \
+            SimulationRegistry(self._recover) if store is not None else {}
+        # Cold simulations are dropped from memory and reloaded from the store on access
+        if eviction_policy is not None and store is None:
+            logger.warning("Simulation eviction needs a simulation store; keeping every simulation resident")
+            eviction_policy = None
+        self.eviction_policy = eviction_policy
+        self._eviction_task: Optional[asyncio.Task] = None
+        # Serializes steps per simulation and coalesces duplicate requests
+        self.scheduler = scheduler or TickScheduler()
+        # Called after every tick with (simulation_id, world_state, previous_map_state, new_news)
+        self._tick_listeners: List[Callable[[str, WorldState, MapState, List[GeneratedNews]], None]] = []
         logger.info("World Brain initialized")
     
-    async def initialize_world(self, simulation_id: str, seed: Optional[int] = None, start_month: Optional[int] = None, start_year: Optional[int] = None) -> WorldState:
+    async def initialize_world(self, simulation_id: str, seed: Optional[int] = None, start_month: Optional[int] = None, start_year: Optional[int] = None, fresh_news: bool = False) -> WorldState:
         """Initialize a new world simulation"""
-        if seed:
-            random.seed(seed)
-        
         logger.info(f"Initializing world simulation {simulation_id}")
         
+        world_state = self.create_world_state(start_month, start_year, fresh_news, seed)
+        
+        cached = await self._load_result(world_state)
+        if cached is not None:
+            self.simulations[simulation_id] = cached
+            await self._save_snapshot(simulation_id, cached)
+            await self.evict_idle()
+            logger.info(f"World simulation {simulation_id} restored from seeded result cache")
+            return cached
+        
+        # Generate initial news based on recent events
+        initial_news = await self._generate_initial_psychohistorical_news(world_state)
+        self._publish_news(world_state, initial_news)
+        await self._store_result(world_state)
+        
+        self.simulations[simulation_id] = world_state
+        await self._save_snapshot(simulation_id, world_state)
+        await self.evict_idle()
+        logger.info(f"World simulation {simulation_id} initialized with {len(world_state.countries)} countries")
+        
+        return world_state
+    
+    def create_world_state(self, start_month: Optional[int] = None, start_year: Optional[int] = None, fresh_news: bool = False,
+                           seed: Optional[int] = None) -> WorldState:
+        """Build the initial world from real country and leader data, without news or registration
+
+        The world owns its random streams, so a seeded world replays identically
+        however many other simulations share the process.
+        """
         # Use provided start date or current date
         if start_month and start_year:
             start_date = datetime(year=start_year, month=start_month, day=1)
@@ -184,12 +301,15 @@ class WorldBrain:
                 )
         
         # Initialize relations based on real alliances and conflicts
-        relations = {}
-        for country_a in countries:
-            for country_b in countries:
-                if country_a < country_b:  # Avoid duplicates
-                    relation = self._initialize_relation(countries[country_a], countries[country_b])
-                    relations[f"{country_a}_{country_b}"] = relation
+        if self.use_relation_matrix:
+            relations = RelationMatrix.from_countries(countries)
+        else:
+            relations = {}
+            for country_a in countries:
+                for country_b in countries:
+                    if country_a < country_b:  # Avoid duplicates
+                        relation = self._initialize_relation(countries[country_a], countries[country_b])
+                        relations[f"{country_a}_{country_b}"] = relation
         
         # Create initial map state
         initial_map_state = self._create_map_state(countries, relations)
@@ -205,60 +325,463 @@ class WorldBrain:
             actions=[],
             outcomes=[],
             news=[],
-            map_states=[initial_map_state],
+            map_states=MapStateHistory([initial_map_state], self.history_policy),
             map_state=initial_map_state,  # Set current map state
-            global_indicators=world_data_service.get_global_indicators()
+            global_indicators=world_data_service.get_global_indicators(),
+            fresh_news=fresh_news,
+            seed=seed,
+            start_date=start_date,
+            rng=random.Random(seed),
+            np_rng=np.random.default_rng(seed),
+            # Only seeded runs from a fixed date with cacheable news can be replayed
+            replay_path="" if seed is not None and start_month and start_year and not fresh_news else None
         )
         
-        # Generate initial news based on recent events
-        initial_news = await self._generate_initial_psychohistorical_news(world_state)
-        world_state.news = initial_news
-        
-        
-        self.simulations[simulation_id] = world_state
-        logger.info(f"World simulation {simulation_id} initialized with {len(countries)} countries")
-        
         return world_state
     
     async def tick(self, simulation_id: str) -> WorldState:
         """Advance the simulation by one week"""
-        if simulation_id not in self.simulations:
+        return await self._schedule(simulation_id, ("tick",), lambda: self._tick(simulation_id))
+
+    async def _tick(self, simulation_id: str) -> WorldState:
+        world_state = await self._load_simulation(simulation_id)
+        if world_state is None:
+            raise ValueError(f"Simulation {simulation_id} not found")
+        
+        cached = await self._load_result(world_state, weeks=1, step="t")
+        if cached is not None:
+            return await self._adopt_result(simulation_id, world_state, cached)
+        
+        logger.info(f"Advancing simulation {simulation_id} to week {world_state.week_number + 1} ({(world_state.current_date + timedelta(weeks=1)).strftime('%m/%d/%Y')})")
+        
+        new_actions, new_outcomes, previous_map_state = self._simulate_week(world_state)
+        
+        # Generate news based on actions and outcomes (only important ones)
+        new_news = await self._generate_news(world_state, new_actions, new_outcomes)
+        self._publish_news(world_state, new_news)
+        
+        # Roll old history into aggregates to keep memory bounded
+        compact_world_state(world_state, self.history_policy)
+        
+        self._extend_replay_path(world_state, "t")
+        await self._store_result(world_state)
+        await self._log_step(simulation_id, world_state, [WeekRecord(new_actions, new_outcomes, world_state.map_state.timestamp)], new_news)
+        
+        self._notify_tick(simulation_id, world_state, previous_map_state, new_news)
+        
+        logger.info(f"Simulation {simulation_id} advanced. Generated {len(new_actions)} actions, {len(new_outcomes)} outcomes, {len(new_news)} news articles")
+        
+        return world_state
+
+    async def advance(self, simulation_id: str, weeks: int, top_k: Optional[int] = None) -> Dict[str, Any]:
+        """Advance several weeks in one pass, writing news only for the most impactful outcomes.
+
+        The numeric simulation runs week by week without awaiting; afterwards a single
+        batched news phase covers the ``top_k`` highest-impact reportable outcomes of
+        the whole window.
+        """
+        return await self._schedule(simulation_id, ("advance", weeks, top_k),
+                                    lambda: self._advance(simulation_id, weeks, top_k))
+
+    async def _advance(self, simulation_id: str, weeks: int, top_k: Optional[int]) -> Dict[str, Any]:
+        world_state = await self._load_simulation(simulation_id)
+        if world_state is None:
             raise ValueError(f"Simulation {simulation_id} not found")
+        if top_k is None:
+            top_k = self.news_batch_size * 3
+        
+        step = f"a{weeks}k{top_k}"
+        cached = await self._load_result(world_state, weeks=weeks, step=step)
+        if cached is not None:
+            new_news = [news_item for news_item in cached.news if news_item.seq > world_state.seq]
+            await self._adopt_result(simulation_id, world_state, cached)
+            return {
+                "current_date": cached.current_date,
+                "weeks": weeks,
+                "news": new_news,
+                "map_state": cached.map_state,
+                "global_indicators": cached.global_indicators
+            }
+        start_map_state = world_state.map_state
+        
+        # Min-heap of (impact, order, action, outcome, week date) holding the top_k events
+        candidates: List[Tuple[int, int, Action, Outcome, datetime]] = []
+        order = 0
+        week_records = []
+        for _ in range(weeks):
+            new_actions, new_outcomes, _ = self._simulate_week(world_state)
+            week_records.append(WeekRecord(new_actions, new_outcomes, world_state.map_state.timestamp))
+            for action, outcome in zip(new_actions, new_outcomes):
+                if outcome.impact_magnitude <= 50 or top_k <= 0:  # Only report important events
+                    continue
+                entry = (outcome.impact_magnitude, order, action, outcome, world_state.current_date)
+                order += 1
+                if len(candidates) < top_k:
+                    heapq.heappush(candidates, entry)
+                elif entry[0] > candidates[0][0]:
+                    heapq.heapreplace(candidates, entry)
+            compact_world_state(world_state, self.history_policy)
+        
+        # Report in chronological order
+        reported = sorted(candidates, key=lambda entry: entry[1])
+        new_news = await self._create_psychohistorical_news_articles(
+            [(action, outcome) for _, _, action, outcome, _ in reported],
+            world_state,
+            report_dates=[week_date for _, _, _, _, week_date in reported]
+        )
+        self._publish_news(world_state, new_news)
+        compact_world_state(world_state, self.history_policy)
+        
+        self._extend_replay_path(world_state, step)
+        await self._store_result(world_state)
+        await self._log_step(simulation_id, world_state, week_records, new_news)
         
-        world_state = self.simulations[simulation_id]
-        self.current_week += 1
+        self._notify_tick(simulation_id, world_state, start_map_state, new_news)
         
+        logger.info(f"Simulation {simulation_id} advanced {weeks} weeks. Reported {len(reported)} events in {len(new_news)} news articles")
+        
+        return {
+            "current_date": world_state.current_date,
+            "weeks": weeks,
+            "news": new_news,
+            "map_state": world_state.map_state,
+            "global_indicators": world_state.global_indicators
+        }
+
+    def _result_key(self, world_state: WorldState, weeks: int = 0, step: str = "") -> Optional[str]:
+        """Cache key of the state reached by running ``step`` (covering ``weeks`` weeks) on ``world_state``"""
+        if self.result_cache is None or world_state.replay_path is None:
+            return None
+        return self.result_cache.make_key(
+            ENGINE_VERSION,
+            world_state.seed,
+            world_state.start_date.month,
+            world_state.start_date.year,
+            world_state.week_number - 1 + weeks,
+            world_state.replay_path + step,
+            self.use_relation_matrix,
+            repr(self.history_policy)
+        )
+
+    def _extend_replay_path(self, world_state: WorldState, step: str):
+        if world_state.replay_path is not None:
+            world_state.replay_path += step
+
+    async def _load_result(self, world_state: WorldState, weeks: int = 0, step: str = "") -> Optional[WorldState]:
+        key = self._result_key(world_state, weeks, step)
+        if key is None:
+            return None
+        data = await asyncio.to_thread(self.result_cache.get, key)
+        if data is None:
+            return None
+        try:
+            return loads_world_state(data)
+        except (SnapshotError, AttributeError, TypeError) as e:
+            # Unreadable or from an incompatible build: drop it and simulate instead
+            logger.warning(f"Discarding seeded result cache entry {key}: {e}")
+            self.result_cache.discard(key)
+            return None
+
+    async def _store_result(self, world_state: WorldState):
+        key = self._result_key(world_state)
+        if key is None:
+            return
+        # Serialize now, before later ticks mutate the state; write off the event loop
+        try:
+            data = dumps_world_state(world_state)
+            await asyncio.to_thread(self.result_cache.put, key, data)
+        except Exception as e:
+            # The step already happened; a cache write must never fail it
+            logger.warning(f"Could not store seeded result for week {world_state.week_number}: {e}")
+
+    async def _adopt_result(self, simulation_id: str, world_state: WorldState, cached: WorldState) -> WorldState:
+        """Replace a simulation with a cached later state, as if it had advanced itself"""
+        new_news = [news_item for news_item in cached.news if news_item.seq > world_state.seq]
+        # Encoded fragments are re-checked against their values, so delta polls keep their change stamps
+        cached.render_cache = world_state.render_cache
+        self.simulations[simulation_id] = cached
+        await self._save_snapshot(simulation_id, cached)
+        self._notify_tick(simulation_id, cached, world_state.map_state, new_news)
+        logger.info(f"Simulation {simulation_id} advanced to week {cached.week_number} from seeded result cache")
+        return cached
+
+    def _simulate_week(self, world_state: WorldState) -> Tuple[List[Action], List[Outcome], MapState]:
+        """Run the numeric part of a tick: actions, outcomes, relation updates and map state.
+
+        Returns the new actions and outcomes and the map state that was replaced.
+        """
         # Advance the real date by one week
         world_state.current_date += timedelta(weeks=1)
         world_state.week_number += 1
         
-        logger.info(f"Advancing simulation {simulation_id} to week {self.current_week} ({world_state.current_date.strftime('%m/%d/%Y')})")
-        
-        # Generate actions for each country
+        # Generate actions for each country and resolve them
         new_actions = self._generate_actions(world_state)
-        world_state.actions.extend(new_actions)
-        
-        # Process actions and generate outcomes
         new_outcomes = self._process_actions(new_actions, world_state)
+        
+        previous_map_state = self._apply_week(world_state, new_actions, new_outcomes)
+        return new_actions, new_outcomes, previous_map_state
+
+    def _apply_week(self, world_state: WorldState, new_actions: List[Action], new_outcomes: List[Outcome],
+                    map_timestamp: Optional[datetime] = None) -> MapState:
+        """Record a week's resolved actions and apply their outcomes; shared by live ticks and log replay"""
+        world_state.actions.extend(new_actions)
+        world_state.action_index.update((action.id, action) for action in new_actions)
+        world_state.action_count += len(new_actions)
+        world_state.history.record_tick(world_state.current_date, len(new_actions))
         world_state.outcomes.extend(new_outcomes)
         
         # Update world state based on outcomes
         self._update_world_state(world_state, new_outcomes)
         
-        # Generate news based on actions and outcomes (only important ones)
-        new_news = await self._generate_news(world_state, new_actions, new_outcomes)
-        world_state.news.extend(new_news)
-        
         # Update map state
-        new_map_state = self._create_map_state(world_state)
+        previous_map_state = world_state.map_state
+        new_map_state = self._create_map_state(world_state.countries, world_state.relations, previous_map_state)
+        if map_timestamp is not None:
+            new_map_state.timestamp = map_timestamp
         world_state.map_states.append(new_map_state)
+        world_state.map_state = new_map_state
         
         # Update timestamp
         world_state.timestamp = datetime.now()
+        world_state.seq += 1
+        world_state.tick_seq = world_state.seq
         
-        logger.info(f"Simulation {simulation_id} advanced. Generated {len(new_actions)} actions, {len(new_outcomes)} outcomes, {len(new_news)} news articles")
-        
+        return previous_map_state
+
+    async def _save_snapshot(self, simulation_id: str, world_state: WorldState):
+        if self.store is None:
+            return
+        # Serialize now, before later ticks mutate the state; write off the event loop
+        data = dumps_world_state(world_state)
+        await asyncio.to_thread(self.store.save_snapshot, simulation_id, world_state.seq, world_state.week_number, data)
+
+    async def _log_step(self, simulation_id: str, world_state: WorldState, weeks: List[WeekRecord],
+                        news: List[GeneratedNews]):
+        """Append a tick record, snapshotting once the log since the last snapshot grows long"""
+        if self.store is None:
+            return
+        record = TickRecord(
+            seq=world_state.seq,
+            weeks=weeks,
+            news=news,
+            rng_state=world_state.rng.getstate(),
+            np_rng_state=world_state.np_rng.bit_generator.state,
+            replay_path=world_state.replay_path,
+            timestamp=world_state.timestamp
+        )
+        data = dumps_tick_record(record)
+        try:
+            logged = await asyncio.to_thread(self.store.append, simulation_id, record.seq, data)
+        except StoreConflict as e:
+            # Another worker advanced this simulation first; reload its history on next access
+            logger.warning(f"{e}; dropping the local copy")
+            self.simulations.forget(simulation_id)
+            return
+        if logged >= self.store.snapshot_every:
+            await self._save_snapshot(simulation_id, world_state)
+
+    async def get_simulation(self, simulation_id: str) -> Optional[WorldState]:
+        """A simulation by id, loaded from the store if it is not in memory; None if there is none
+
+        With a store, a resident copy that another worker has stepped past is
+        reloaded first, so reads on any worker see the latest logged step.
+        """
+        await self._drop_if_stale(simulation_id)
+        return await self._load_simulation(simulation_id)
+
+    async def _load_simulation(self, simulation_id: str) -> Optional[WorldState]:
+        """``get_simulation`` without the staleness check, for steps that caught up before they started"""
+        if isinstance(self.simulations, SimulationRegistry):
+            return await self.simulations.load(simulation_id)
+        return self.simulations.get(simulation_id)
+
+    def _recover(self, simulation_id: str) -> Optional[WorldState]:
+        """Load a simulation from the store: latest snapshot plus the log written since (runs in a worker thread)"""
+        world_state, records = self.store.load(simulation_id)
+        if world_state is None:
+            return None
+        for record in records:
+            if record.seq > world_state.seq:
+                self._apply_tick_record(world_state, record)
+        logger.info(f"Simulation {simulation_id} loaded from store at week {world_state.week_number} ({len(records)} log records)")
         return world_state
+
+    async def _schedule(self, simulation_id: str, key: Tuple[Any, ...], step: Callable[[], Any]) -> Any:
+        """Run a step through the scheduler, keeping its simulation resident while it runs"""
+        async def pinned_step():
+            # Catch up before pinning: pinned copies are never dropped
+            await self._drop_if_stale(simulation_id)
+            with self._pinned(simulation_id):
+                return await step()
+        return await self.scheduler.submit(simulation_id, key, pinned_step)
+
+    async def _drop_if_stale(self, simulation_id: str):
+        """Forget a resident copy that another worker has stepped past, so the next load reloads it
+
+        Copies pinned by a running step are left alone; that step's log append
+        detects the conflict instead.
+        """
+        if self.store is None:
+            return
+        world_state = self.simulations.resident(simulation_id)
+        if world_state is None:
+            return
+        head = await asyncio.to_thread(self.store.head_seq, simulation_id)
+        if head is not None and head > world_state.seq and self.simulations.drop(simulation_id, world_state):
+            logger.info(f"Simulation {simulation_id} advanced elsewhere to seq {head}; reloading from store")
+
+    def _pinned(self, simulation_id: str):
+        """Keep a simulation resident while a step runs on it"""
+        if isinstance(self.simulations, SimulationRegistry):
+            return self.simulations.pinned(simulation_id)
+        return contextlib.nullcontext()
+
+    def _footprint(self, world_state: WorldState) -> int:
+        """Estimated resident bytes of a simulation, cached until its next step"""
+        cached = world_state.engine_cache.get("footprint")
+        if cached is not None and cached[0] == world_state.seq:
+            return cached[1]
+        relations = world_state.relations
+        footprint = (
+            (relations.nbytes if isinstance(relations, RelationMatrix) else len(relations) * RELATION_FOOTPRINT)
+            + len(world_state.countries) * COUNTRY_FOOTPRINT
+            + len(world_state.action_index) * ACTION_FOOTPRINT
+            + sum(NEWS_FOOTPRINT + len(n.headline) + len(n.lede) + len(n.content) for n in world_state.news)
+            + len(world_state.map_states) * len(world_state.countries) * MAP_ENTRY_FOOTPRINT
+        )
+        world_state.engine_cache["footprint"] = (world_state.seq, footprint)
+        return footprint
+
+    async def evict_idle(self) -> int:
+        """Write cold simulations to the store and drop them from memory; returns how many were evicted"""
+        if self.eviction_policy is None:
+            return 0
+        evicted = 0
+        for simulation_id in self.simulations.eviction_candidates(self.eviction_policy, self._footprint):
+            world_state = self.simulations.resident(simulation_id)
+            if world_state is None:
+                continue
+            # A fresh snapshot means the next access replays no log records
+            if self.store.snapshot_seq(simulation_id) != world_state.seq:
+                await self._save_snapshot(simulation_id, world_state)
+            if self.simulations.evict(simulation_id, world_state):
+                evicted += 1
+        if evicted:
+            logger.info(f"Evicted {evicted} idle simulations; {len(self.simulations)} resident")
+        return evicted
+
+    async def start(self):
+        """Start the background sweep that evicts idle simulations"""
+        if self.eviction_policy is None or self._eviction_task is not None:
+            return
+        self._eviction_task = asyncio.create_task(self._eviction_loop())
+
+    async def stop(self):
+        if self._eviction_task is not None:
+            self._eviction_task.cancel()
+            try:
+                await self._eviction_task
+            except asyncio.CancelledError:
+                pass
+            self._eviction_task = None
+
+    async def _eviction_loop(self):
+        while True:
+            await asyncio.sleep(self.eviction_policy.sweep_interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.warning(f"Simulation eviction sweep failed: {e}")
+
+    def _apply_tick_record(self, world_state: WorldState, record: TickRecord):
+        """Replay a logged step without drawing from the random streams"""
+        for week in record.weeks:
+            world_state.current_date += timedelta(weeks=1)
+            world_state.week_number += 1
+            self._apply_week(world_state, week.actions, week.outcomes, week.timestamp)
+            compact_world_state(world_state, self.history_policy)
+        world_state.news.extend(record.news)
+        world_state.seq = record.seq
+        compact_world_state(world_state, self.history_policy)
+        world_state.rng.setstate(record.rng_state)
+        world_state.np_rng.bit_generator.state = record.np_rng_state
+        world_state.replay_path = record.replay_path
+        world_state.timestamp = record.timestamp
+
+    async def advance_month(self, simulation_id: str) -> Dict[str, Any]:
+        """Advance the simulation week by week until the calendar month changes"""
+        return await self._schedule(simulation_id, ("month",), lambda: self._advance_month(simulation_id))
+
+    async def _advance_month(self, simulation_id: str) -> Dict[str, Any]:
+        world_state = await self._load_simulation(simulation_id)
+        if world_state is None:
+            raise ValueError(f"Simulation {simulation_id} not found")
+
+        start_month = world_state.current_date.month
+        start_seq = world_state.seq
+        while world_state.current_date.month == start_month:
+            # A cached tick may swap in a different state object, so follow the returned one
+            world_state = await self._tick(simulation_id)
+        new_news = [news_item for news_item in world_state.news if news_item.seq > start_seq]
+
+        return {
+            "current_date": world_state.current_date,
+            "news": new_news,
+            "map_state": world_state.map_state,
+            "global_indicators": world_state.global_indicators,
+            "use_historical_news": False
+        }
+
+    def add_tick_listener(self, listener: Callable[[str, WorldState, MapState, List[GeneratedNews]], None]):
+        """Register a callback run synchronously after every tick of every simulation"""
+        self._tick_listeners.append(listener)
+
+    def _notify_tick(self, simulation_id: str, world_state: WorldState, previous_map_state: MapState,
+                     new_news: List[GeneratedNews]):
+        for listener in list(self._tick_listeners):
+            try:
+                listener(simulation_id, world_state, previous_map_state, new_news)
+            except Exception as e:
+                logger.error(f"Tick listener failed for simulation {simulation_id}: {e}")
+
+    def _spawn_rng(self, world_state: WorldState) -> random.Random:
+        """Child stream for work that draws after an await, seeded from the world's stream"""
+        return random.Random(world_state.rng.getrandbits(64))
+
+    def _publish_news(self, world_state: WorldState, news: List[GeneratedNews]):
+        """Append articles to the feed, stamping each with the next sequence number"""
+        for news_item in news:
+            world_state.seq += 1
+            news_item.seq = world_state.seq
+        world_state.news.extend(news)
+
+    async def get_historical_map_state(self, simulation_id: str, week_number: int) -> Optional[MapState]:
+        """Read back the map state of any retained week, replaying deltas as needed"""
+        world_state = await self.get_simulation(simulation_id)
+        if world_state is None:
+            raise ValueError(f"Simulation {simulation_id} not found")
+        return self._historical_map_state(world_state, week_number)
+    
+    @staticmethod
+    def _historical_map_state(world_state: WorldState, week_number: int) -> Optional[MapState]:
+        map_states = world_state.map_states
+        if isinstance(map_states, MapStateHistory):
+            return map_states.state_for_index(week_number - 1)
+        if 1 <= week_number <= len(map_states):
+            return map_states[week_number - 1]
+        return None
+    
+    async def get_map_state_diff(self, simulation_id: str, from_week: int, to_week: Optional[int] = None) -> Optional[MapStateDelta]:
+        """Changes between two retained weeks (default: up to the current week)"""
+        world_state = await self.get_simulation(simulation_id)
+        if world_state is None:
+            raise ValueError(f"Simulation {simulation_id} not found")
+        
+        old = self._historical_map_state(world_state, from_week)
+        new = world_state.map_state if to_week is None else self._historical_map_state(world_state, to_week)
+        if old is None or new is None:
+            return None
+        return diff_map_states(old, new)
     
     def _calculate_aggression(self, leader_data: Dict[str, Any]) -> int:
         """Calculate aggression level based on leader personality and policies"""
@@ -442,130 +965,204 @@ class WorldBrain:
         return initial_news
     
     def _generate_actions(self, world_state: WorldState) -> List[Action]:
-        """Generate actions for each country based on their doctrines and current situation"""
-        actions = []
-        
-        for country_id, country in world_state.countries.items():
-            doctrine = world_state.doctrines.get(country_id)
-            if not doctrine:
-                continue
-            
-            # Determine if country should take action based on doctrine
-            if random.random() < (doctrine.aggression_level / 100.0):
-                action = self._create_action(country, doctrine, world_state)
-                if action:
-                    actions.append(action)
-        
-        return actions
-    
-    def _create_action(self, country: Country, doctrine: Doctrine, world_state: WorldState) -> Optional[Action]:
-        """Create a specific action for a country"""
-        action_types = ["diplomatic", "military", "economic", "cyber"]
-        action_type = random.choice(action_types)
-        
-        # Find potential targets
-        potential_targets = [
-            c for c in world_state.countries.values()
-            if c.id != country.id
+        """Generate actions for each country based on their doctrines and current situation
+
+        Participation, action types, targets and intensities are drawn for all
+        countries at once from the world's NumPy stream; targets are weighted
+        draws from the world's TargetIndex.
+        """
+        country_ids, actor_positions, aggression = self._actor_arrays(world_state)
+        if not len(actor_positions) or len(country_ids) < 2:
+            return []
+        
+        rng = world_state.np_rng
+        
+        # Determine which countries act based on doctrine
+        acting = rng.random(len(aggression)) < aggression / 100.0
+        actors = actor_positions[acting]
+        aggression = aggression[acting]
+        count = len(actors)
+        
+        action_types = rng.integers(0, len(ACTION_TYPES), count)
+        # Rivals, allies and distrusted countries are likelier targets
+        target_index, actor_rows = self._target_index(world_state)
+        targets = target_index.sample(actor_rows[acting], rng)
+        target_ids = target_index.country_ids
+        # Determine action intensity based on doctrine
+        intensity = np.clip(aggression + rng.integers(-20, 21, count), 0, 100)
+        details = rng.integers(0, 4, count)
+        
+        id_prefix = f"action_{world_state.action_count}_"
+        timestamp = world_state.timestamp
+        return [
+            Action(
+                id=id_prefix + country_ids[actor],
+                actor_id=country_ids[actor],
+                target_id=target_ids[target],
+                action_type=ACTION_TYPES[action_type],
+                description="",  # Filled in by _describe_action if the action is reported
+                intensity=action_intensity,
+                timestamp=timestamp,
+                success_probability=0.7,
+                detail=detail
+            )
+            for actor, target, action_type, action_intensity, detail in zip(
+                actors.tolist(), targets.tolist(), action_types.tolist(), intensity.tolist(), details.tolist()
+            )
         ]
+    
+    def _actor_arrays(self, world_state: WorldState) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Country ids plus the positions and aggression of countries with doctrines, cached per world"""
+        signature = (id(world_state.countries), len(world_state.countries), id(world_state.doctrines), len(world_state.doctrines))
+        cached = world_state.engine_cache.get("actors")
+        if cached is None or cached[0] != signature:
+            country_ids = list(world_state.countries)
+            actor_positions, aggression_levels = [], []
+            for position, country_id in enumerate(country_ids):
+                doctrine = world_state.doctrines.get(country_id)
+                if doctrine:
+                    actor_positions.append(position)
+                    aggression_levels.append(doctrine.aggression_level)
+            cached = (signature, country_ids, np.array(actor_positions, dtype=np.int64), np.array(aggression_levels, dtype=np.int64))
+            world_state.engine_cache["actors"] = cached
+        return cached[1], cached[2], cached[3]
+    
+    def _target_index(self, world_state: WorldState) -> Tuple[TargetIndex, np.ndarray]:
+        """Weighted target index plus each actor's row in it, cached per world and kept current by trust updates"""
+        signature = (id(world_state.countries), len(world_state.countries), id(world_state.relations))
+        cached = world_state.engine_cache.get("targets")
+        # Trust written outside _update_world_state leaves the index behind the matrix
+        if cached is None or cached[0] != signature or \
+                cached[1].trust_version != getattr(world_state.relations, "trust_version", None):
+            country_ids, actor_positions, _ = self._actor_arrays(world_state)
+            target_index = TargetIndex.from_relations(world_state.countries, world_state.relations)
+            actor_rows = np.array([target_index.index[country_ids[position]] for position in actor_positions.tolist()], dtype=np.int64)
+            cached = (signature, target_index, actor_rows)
+            world_state.engine_cache["targets"] = cached
+        return cached[1], cached[2]
+    
+    def _describe_action(self, action: Action, world_state: WorldState) -> str:
+        """Format an action's description on first use"""
+        if not action.description:
+            template, details = ACTION_DESCRIPTIONS[action.action_type]
+            actor = world_state.countries.get(action.actor_id)
+            target = world_state.countries.get(action.target_id)
+            action.description = template.format(
+                actor=actor.name if actor else action.actor_id,
+                detail=details[action.detail],
+                target=target.name if target else action.target_id
+            )
+        return action.description
+    
+    def _process_actions(self, actions: List[Action], world_state: WorldState) -> List[Outcome]:
+        """Process actions and generate outcomes, resolving the whole week at once"""
+        if not actions:
+            return []
         
-        if not potential_targets:
-            return None
+        rng = world_state.np_rng
+        count = len(actions)
+        intensity = np.fromiter((action.intensity for action in actions), dtype=np.int64, count=count)
+        success_probability = np.fromiter((action.success_probability for action in actions), dtype=np.float64, count=count)
         
-        target = random.choice(potential_targets)
+        # Determine success based on probability and random factors
+        success = rng.random(count) < success_probability
         
-        # Determine action intensity based on doctrine
-        intensity = min(100, doctrine.aggression_level + random.randint(-20, 20))
-        intensity = max(0, intensity)
-        
-        # Create action description
-        descriptions = {
-            "diplomatic": f"{country.name} engages in diplomatic {random.choice(['pressure', 'negotiations', 'threats', 'overtures'])} with {target.name}",
-            "military": f"{country.name} conducts military {random.choice(['exercises', 'deployments', 'threats', 'operations'])} near {target.name}",
-            "economic": f"{country.name} implements economic {random.choice(['sanctions', 'trade restrictions', 'incentives', 'agreements'])} with {target.name}",
-            "cyber": f"{country.name} conducts cyber {random.choice(['operations', 'espionage', 'attacks', 'defense'])} against {target.name}"
-        }
+        # Failed actions land at half intensity, plus some randomness
+        impact = np.where(success, intensity, intensity // 2) + rng.integers(-10, 11, count)
+        impact = np.clip(impact, 0, 100)
+        # Drawn for every action so the stream does not depend on the action mix
+        casualty_draws = rng.integers(0, impact * 100 + 1)
         
-        return Action(
-            id=f"action_{len(world_state.actions)}_{country.id}",
-            actor_id=country.id,
-            target_id=target.id,
-            action_type=action_type,
-            description=descriptions[action_type],
-            intensity=intensity,
-            timestamp=world_state.timestamp,
-            success_probability=0.7
-        )
-    
-    def _process_actions(self, actions: List[Action], world_state: WorldState) -> List[Outcome]:
-        """Process actions and generate outcomes"""
         outcomes = []
-        
-        for action in actions:
-            # Determine success based on probability and random factors
-            success = random.random() < action.success_probability
-            
-            # Calculate impact magnitude
-            impact_magnitude = action.intensity
-            if not success:
-                impact_magnitude = impact_magnitude // 2
-            
-            # Add some randomness
-            impact_magnitude += random.randint(-10, 10)
-            impact_magnitude = max(0, min(100, impact_magnitude))
-            
-            outcome = Outcome(
+        for action, succeeded, impact_magnitude, casualties in zip(actions, success.tolist(), impact.tolist(), casualty_draws.tolist()):
+            action_type = action.action_type
+            outcomes.append(Outcome(
                 action_id=action.id,
-                success=success,
+                success=succeeded,
                 impact_magnitude=impact_magnitude,
-                casualties=random.randint(0, impact_magnitude * 100) if action.action_type == "military" else 0,
-                economic_damage=impact_magnitude * 1000000 if action.action_type == "economic" else 0.0,
-                diplomatic_impact=impact_magnitude if action.action_type == "diplomatic" else 0,
+                casualties=casualties if action_type == "military" else 0,
+                economic_damage=impact_magnitude * 1000000 if action_type == "economic" else 0.0,
+                diplomatic_impact=impact_magnitude if action_type == "diplomatic" else 0,
                 escalation_triggered=impact_magnitude > 70
-            )
-            
-            outcomes.append(outcome)
+            ))
         
         return outcomes
     
     def _update_world_state(self, world_state: WorldState, outcomes: List[Outcome]):
         """Update world state based on outcomes"""
+        actor_ids, target_ids, deltas = [], [], []
         for outcome in outcomes:
             # Find the corresponding action
-            action = next((a for a in world_state.actions if a.id == outcome.action_id), None)
+            action = world_state.action_index.get(outcome.action_id)
             if not action:
                 continue
             
-            # Update relations between countries
-            relation_key = f"{action.actor_id}_{action.target_id}"
-            if relation_key in world_state.relations:
-                relation = world_state.relations[relation_key]
-                if outcome.success:
-                    relation.trust_level += outcome.diplomatic_impact
-                else:
-                    relation.trust_level -= outcome.diplomatic_impact
-                relation.trust_level = max(-100, min(100, relation.trust_level))
+            # Successful actions build trust, failed ones erode it
+            actor_ids.append(action.actor_id)
+            target_ids.append(action.target_id)
+            deltas.append(outcome.diplomatic_impact if outcome.success else -outcome.diplomatic_impact)
+        
+        # Update relations between countries
+        cached_targets = world_state.engine_cache.get("targets")
+        target_index = cached_targets[1] if cached_targets else None
+        if isinstance(world_state.relations, RelationMatrix):
+            # The matrix folds each change into its tension total and conflict set
+            rows, cols = world_state.relations.apply_trust_deltas(actor_ids, target_ids, deltas)
+            if target_index is not None and target_index.trust_version == world_state.relations.trust_version - 1:
+                target_index.update(rows, cols, world_state.relations.trust[rows, cols])
+                target_index.trust_version = world_state.relations.trust_version
+            if self.verify_aggregates:
+                self._verify_aggregates(world_state)
+            return
+        
+        changed_pairs = {}
+        for actor_id, target_id, delta in zip(actor_ids, target_ids, deltas):
+            relation = world_state.relations.get(f"{actor_id}_{target_id}") or \
+                world_state.relations.get(f"{target_id}_{actor_id}")
+            if relation:
+                relation.trust_level = max(-100, min(100, relation.trust_level + delta))
+                if target_index is not None:
+                    pair = sorted((target_index.index[actor_id], target_index.index[target_id]))
+                    changed_pairs[tuple(pair)] = relation.trust_level
+        if changed_pairs:
+            rows, cols = zip(*changed_pairs)
+            target_index.update(np.array(rows), np.array(cols), np.array(list(changed_pairs.values())))
+    
+    def _verify_aggregates(self, world_state: WorldState):
+        """Compare running relation aggregates with a full recompute, repairing any drift"""
+        relations = world_state.relations
+        if not relations.verify_aggregates():
+            total, conflicts = relations.scan_aggregates()
+            logger.error(f"Relation aggregates drifted at week {world_state.week_number}: "
+                         f"tracked tension {relations.tension_stats()[0]} with {relations.conflict_count()} conflicts, "
+                         f"recomputed {total} with {len(conflicts)}")
+            relations.refresh_aggregates()
+        cached_targets = world_state.engine_cache.get("targets")
+        if cached_targets and not cached_targets[1].check(relations.trust):
+            logger.error(f"Target index drifted at week {world_state.week_number}; rebuilding")
+            del world_state.engine_cache["targets"]
     
     async def _generate_news(self, world_state: WorldState, actions: List[Action], outcomes: List[Outcome]) -> List[GeneratedNews]:
         """Generate psychohistorically accurate news articles based on actions and outcomes"""
-        news_articles = []
-        
         # Generate news for important actions only (higher threshold)
-        for action, outcome in zip(actions, outcomes):
-            if outcome.impact_magnitude > 50:  # Only report important events
-                news = await self._create_psychohistorical_news_article(action, outcome, world_state)
-                if news:
-                    news_articles.append(news)
+        reported = [
+            (action, outcome) for action, outcome in zip(actions, outcomes)
+            if outcome.impact_magnitude > 50  # Only report important events
+        ]
         
-        # Generate occasional world news (reduced frequency)
-        if random.random() < 0.2:  # 20% chance of additional news
-            additional_news = await self._generate_additional_psychohistorical_news(world_state)
-            news_articles.extend(additional_news)
+        # Generate occasional world news (reduced frequency), concurrently with action news.
+        # Each task gets its own stream drawn up front, so LLM timing cannot reorder draws.
+        tasks = [self._create_psychohistorical_news_articles(reported, world_state, rng=self._spawn_rng(world_state))]
+        if world_state.rng.random() < 0.2:  # 20% chance of additional news
+            tasks.append(self._generate_additional_psychohistorical_news(world_state, self._spawn_rng(world_state)))
         
-        return news_articles
+        results = await asyncio.gather(*tasks)
+        return [news for batch in results for news in batch]
     
-    def _create_news_article(self, action: Action, outcome: Outcome, world_state: WorldState) -> Optional[GeneratedNews]:
+    def _create_news_article(self, action: Action, outcome: Outcome, world_state: WorldState, as_of: Optional[datetime] = None,
+                             rng: Optional[random.Random] = None) -> Optional[GeneratedNews]:
         """Create a news article for a specific action and outcome"""
+        rng = rng or world_state.rng
         actor = world_state.countries.get(action.actor_id)
         target = world_state.countries.get(action.target_id) if action.target_id else None
         
@@ -636,8 +1233,8 @@ class WorldBrain:
             content += f" Impact: {self._format_stat_changes(stat_changes)}"
         
         # Create realistic timestamp within the current week (simulation date)
-        days_ago = random.randint(0, 6)  # Within the past week
-        article_date = world_state.current_date - timedelta(days=days_ago)
+        days_ago = rng.randint(0, 6)  # Within the past week
+        article_date = (as_of or world_state.current_date) - timedelta(days=days_ago)
         
         # Determine reliability based on action type and outcome
         if action.action_type == "cyber":
@@ -654,7 +1251,7 @@ class WorldBrain:
             "The New York Times", "The Guardian", "Le Monde",
             "Der Spiegel", "Asahi Shimbun", "The Times of India"
         ]
-        source = random.choice(sources)
+        source = rng.choice(sources)
         
         return GeneratedNews(
             headline=headline,
@@ -669,12 +1266,13 @@ class WorldBrain:
             stat_changes=stat_changes
         )
     
-    def _generate_additional_news(self, world_state: WorldState) -> List[GeneratedNews]:
+    def _generate_additional_news(self, world_state: WorldState, rng: Optional[random.Random] = None) -> List[GeneratedNews]:
         """Generate additional world news based on current situation"""
+        rng = rng or world_state.rng
         additional_news = []
         
         # Generate occasional world news updates
-        if random.random() < 0.3:  # 30% chance of additional news
+        if rng.random() < 0.3:  # 30% chance of additional news
             world_news_templates = [
                 {
                     "headline": "International Trade Talks Continue",
@@ -702,9 +1300,9 @@ class WorldBrain:
                 }
             ]
             
-            template = random.choice(world_news_templates)
-            days_ago = random.randint(0, 3)
-            article_date = world_state.timestamp - timedelta(days=days_ago)
+            template = rng.choice(world_news_templates)
+            days_ago = rng.randint(0, 3)
+            article_date = world_state.current_date - timedelta(days=days_ago)
             
             news = GeneratedNews(
                 headline=template["headline"],
@@ -781,37 +1379,47 @@ class WorldBrain:
         
         return ", ".join(formatted_changes[:3])  # Limit to 3 most important changes
     
-    def _create_map_state(self, countries: Dict[str, Country], relations: Dict[str, Relation]) -> MapState:
-        """Create current map state"""
+    def _create_map_state(self, countries: Dict[str, Country], relations: Union[Dict[str, Relation], RelationMatrix],
+                          previous: Optional[MapState] = None) -> MapState:
+        """Create current map state
+
+        Entries that did not change since ``previous`` are shared with it rather
+        than copied, so a week's snapshot only adds memory for what changed.
+        """
+        previous_states = previous.country_states if previous else {}
         country_states = {}
+        changed = len(previous_states) != len(countries)
         for country_id, country in countries.items():
-            country_states[country_id] = {
-                "stability": country.stability,
-                "morale": country.morale,
-                "influence": country.influence_level,
-                "bloc": country.bloc
-            }
-        
-        # Calculate bloc distribution
-        bloc_distribution = {}
-        for country in countries.values():
-            bloc_distribution[country.bloc] = bloc_distribution.get(country.bloc, 0) + 1
+            entry = previous_states.get(country_id)
+            if entry is None or entry["stability"] != country.stability or entry["morale"] != country.morale or \
+                    entry["influence"] != country.influence_level or entry["bloc"] != country.bloc:
+                entry = {
+                    "stability": country.stability,
+                    "morale": country.morale,
+                    "influence": country.influence_level,
+                    "bloc": country.bloc
+                }
+                changed = True
+            country_states[country_id] = entry
         
-        # Calculate initial global tension based on relations
-        total_tension = 0
-        relation_count = 0
-        for relation in relations.values():
-            tension = max(0, -relation.trust_level)  # Convert negative trust to tension
-            total_tension += tension
-            relation_count += 1
+        if previous is not None and not changed:
+            # Nothing moved: share the whole country map and bloc counts
+            country_states = previous_states
+            bloc_distribution = previous.bloc_distribution
+        else:
+            # Calculate bloc distribution
+            bloc_distribution = {}
+            for country in countries.values():
+                bloc_distribution[country.bloc] = bloc_distribution.get(country.bloc, 0) + 1
         
+        # Calculate global tension based on relations (running totals for the relation matrix)
+        total_tension, relation_count = self._relation_tension_stats(relations)
         global_tension = min(100, total_tension // (relation_count or 1))
         
         # Identify active conflicts based on relations
-        active_conflicts = []
-        for relation_key, relation in relations.items():
-            if relation.trust_level < -50:  # High distrust indicates potential conflict
-                active_conflicts.append(relation_key)
+        active_conflicts = self._active_conflicts(relations)
+        if previous and active_conflicts == previous.active_conflicts:
+            active_conflicts = previous.active_conflicts
         
         return MapState(
             timestamp=datetime.now(),
@@ -821,203 +1429,216 @@ class WorldBrain:
             active_conflicts=active_conflicts
         )
     
-    async def _create_psychohistorical_news_article(self, action: Action, outcome: Outcome, world_state: WorldState) -> Optional[GeneratedNews]:
-        """Create a psychohistorically accurate news article using ChatGPT"""
-        try:
-            from chatgpt_service import get_chatgpt_service
-            
-            chatgpt_service = await get_chatgpt_service()
-            
-            # Convert world state to dict for ChatGPT
-            world_state_dict = {
-                "global_tension": self._calculate_global_tension(world_state),
-                "active_conflicts": len([r for r in world_state.relations.values() if r.trust_level < -50]),
-                "major_powers": [c.name for c in world_state.countries.values() if c.gdp > 2000000],
-                "economic_indicators": {
-                    "total_gdp": sum(c.gdp for c in world_state.countries.values()),
-                    "average_stability": sum(c.stability for c in world_state.countries.values()) / len(world_state.countries)
-                }
-            }
-            
-            # Get country name for the actor
-            actor_country = world_state.countries.get(action.actor_id)
-            if not actor_country:
-                return None
-            
-            # Generate news using ChatGPT
-            news_data = await chatgpt_service.generate_psychohistorical_news(
-                world_state_dict,
-                actor_country.name,
-                action.action_type,
-                outcome.impact_magnitude
-            )
+    async def _create_psychohistorical_news_articles(self, reported: List[Tuple[Action, Outcome]], world_state: WorldState,
+                                                     report_dates: Optional[List[datetime]] = None,
+                                                     rng: Optional[random.Random] = None) -> List[GeneratedNews]:
+        """Create psychohistorically accurate news articles for several actions using ChatGPT
+
+        ``report_dates`` gives the week each event happened in; by default the current week.
+        """
+        rng = rng or self._spawn_rng(world_state)
+        if report_dates is None:
+            report_dates = [world_state.current_date] * len(reported)
+        kept = [index for index, (action, _) in enumerate(reported) if action.actor_id in world_state.countries]
+        reported = [reported[index] for index in kept]
+        report_dates = [report_dates[index] for index in kept]
+        if not reported:
+            return []
+        for action, _ in reported:
+            self._describe_action(action, world_state)
+        
+        events = [
+            (world_state.countries[action.actor_id].name, action.action_type, outcome.impact_magnitude)
+            for action, outcome in reported
+        ]
+        news_data = await self._request_news(self._build_news_context(world_state), events, world_state.fresh_news)
+        
+        news_articles = []
+        for (action, outcome), (country_name, _, _), data, as_of in zip(reported, events, news_data, report_dates):
+            if data is None:
+                # Fallback to basic news generation
+                news = self._create_news_article(action, outcome, world_state, as_of, rng)
+                if news:
+                    news_articles.append(news)
+                continue
             
-            # Create timestamp within current week
-            days_ago = random.randint(0, 6)
-            article_date = world_state.current_date - timedelta(days=days_ago)
+            # Create timestamp within the event's week
+            days_ago = rng.randint(0, 6)
+            article_date = as_of - timedelta(days=days_ago)
             
-            # Create GeneratedNews object
-            news = GeneratedNews(
-                headline=news_data["headline"],
-                lede=news_data["content"],
-                content=news_data["content"],
-                country=actor_country.name,
+            news_articles.append(GeneratedNews(
+                headline=data["headline"],
+                lede=data["content"],
+                content=data["content"],
+                country=country_name,
                 category=action.action_type,
-                severity=news_data["severity"],
-                reliability=news_data["reliability"],
-                source=news_data["source"],
+                severity=data["severity"],
+                reliability=data["reliability"],
+                source=data["source"],
                 timestamp=article_date,
-                stat_changes=news_data.get("stat_changes", {})
-            )
-            
-            return news
-            
-        except Exception as e:
-            print(f"Error generating psychohistorical news: {e}")
-            # Fallback to basic news generation
-            return self._create_news_article(action, outcome, world_state)
+                stat_changes=data.get("stat_changes", {})
+            ))
+        
+        return news_articles
     
-    async def _generate_additional_psychohistorical_news(self, world_state: WorldState) -> List[GeneratedNews]:
+    async def _generate_additional_psychohistorical_news(self, world_state: WorldState,
+                                                         rng: Optional[random.Random] = None) -> List[GeneratedNews]:
         """Generate additional psychohistorical world news using ChatGPT"""
-        try:
-            from chatgpt_service import get_chatgpt_service
-            
-            chatgpt_service = await get_chatgpt_service()
-            
-            # Convert world state to dict
-            world_state_dict = {
-                "global_tension": self._calculate_global_tension(world_state),
-                "active_conflicts": len([r for r in world_state.relations.values() if r.tension_level > 70]),
-                "major_powers": [c.name for c in world_state.countries.values() if c.gdp > 2000000],
-                "economic_indicators": {
-                    "total_gdp": sum(c.gdp for c in world_state.countries.values()),
-                    "average_stability": sum(c.stability for c in world_state.countries.values()) / len(world_state.countries)
-                }
-            }
-            
-            # Select a random country for world news
-            random_country = random.choice(list(world_state.countries.values()))
-            
-            # Generate world news using ChatGPT
-            news_data = await chatgpt_service.generate_psychohistorical_news(
-                world_state_dict,
-                random_country.name,
-                "world_event",
-                60  # Medium impact for world news
-            )
-            
-            # Create timestamp within current week
-            days_ago = random.randint(0, 6)
-            article_date = world_state.current_date - timedelta(days=days_ago)
-            
-            # Create GeneratedNews object
-            news = GeneratedNews(
-                headline=news_data["headline"],
-                lede=news_data["content"],
-                content=news_data["content"],
-                country="Global",
-                category="world_event",
-                severity=news_data["severity"],
-                reliability=news_data["reliability"],
-                source=news_data["source"],
-                timestamp=article_date,
-                stat_changes=news_data.get("stat_changes", {})
-            )
-            
-            return [news]
-            
-        except Exception as e:
-            print(f"Error generating additional psychohistorical news: {e}")
+        rng = rng or self._spawn_rng(world_state)
+        # Select a random country for world news
+        random_country = rng.choice(list(world_state.countries.values()))
+        
+        # Medium impact for world news
+        news_data = await self._request_news(
+            self._build_news_context(world_state),
+            [(random_country.name, "world_event", 60)],
+            world_state.fresh_news
+        )
+        if news_data[0] is None:
             # Fallback to basic additional news generation
-            return self._generate_additional_news(world_state)
+            return self._generate_additional_news(world_state, rng)
+        
+        data = news_data[0]
+        
+        # Create timestamp within current week
+        days_ago = rng.randint(0, 6)
+        article_date = world_state.current_date - timedelta(days=days_ago)
+        
+        return [GeneratedNews(
+            headline=data["headline"],
+            lede=data["content"],
+            content=data["content"],
+            country="Global",
+            category="world_event",
+            severity=data["severity"],
+            reliability=data["reliability"],
+            source=data["source"],
+            timestamp=article_date,
+            stat_changes=data.get("stat_changes", {})
+        )]
+    
+    async def _request_news(self, world_state_dict: Dict[str, Any], events: List[Tuple[str, str, int]], bypass_cache: bool = False) -> List[Optional[Dict[str, Any]]]:
+        """Request articles for (country, event_type, impact) events from ChatGPT
+        
+        Events are merged into multi-article completions of ``news_batch_size``
+        and the completions run concurrently, bounded by the news semaphore.
+        The result is aligned with ``events``; None marks an event to fall back on.
+        """
+        batches = [events[i:i + self.news_batch_size] for i in range(0, len(events), self.news_batch_size)]
+        results = await asyncio.gather(*(self._request_news_batch(world_state_dict, batch, bypass_cache) for batch in batches))
+        return [data for batch in results for data in batch]
+    
+    async def _request_news_batch(self, world_state_dict: Dict[str, Any], events: List[Tuple[str, str, int]], bypass_cache: bool = False) -> List[Optional[Dict[str, Any]]]:
+        if self._news_semaphore is None:
+            self._news_semaphore = asyncio.Semaphore(self.news_concurrency)
+        async with self._news_semaphore:
+            try:
+                from chatgpt_service import get_chatgpt_service
+                
+                chatgpt_service = await get_chatgpt_service()
+                return await chatgpt_service.generate_psychohistorical_news_batch(world_state_dict, events, bypass_cache=bypass_cache)
+            except Exception as e:
+                print(f"Error generating psychohistorical news: {e}")
+                return [None] * len(events)
+    
+    def _build_news_context(self, world_state: WorldState) -> Dict[str, Any]:
+        """Convert world state to dict for ChatGPT"""
+        return {
+            "global_tension": self._calculate_global_tension(world_state),
+            "active_conflicts": len(self._active_conflicts(world_state.relations)),
+            "major_powers": [c.name for c in world_state.countries.values() if c.gdp > 2000000],
+            "economic_indicators": {
+                "total_gdp": sum(c.gdp for c in world_state.countries.values()),
+                "average_stability": sum(c.stability for c in world_state.countries.values()) / max(1, len(world_state.countries))
+            }
+        }
     
     def _calculate_global_tension(self, world_state: WorldState) -> int:
         """Calculate global tension level"""
-        total_tension = 0
-        relation_count = 0
-        
-        for relation in world_state.relations.values():
-            # Convert trust_level to tension (negative trust = high tension)
-            tension = max(0, -relation.trust_level)
-            total_tension += tension
-            relation_count += 1
+        total_tension, relation_count = self._relation_tension_stats(world_state.relations)
         
         if relation_count == 0:
             return 0
         
         return total_tension // relation_count
     
+    def _relation_tension_stats(self, relations: Union[Dict[str, Relation], RelationMatrix]) -> Tuple[int, int]:
+        """Sum tension (negative trust) over all relations, returning (total, count)"""
+        if isinstance(relations, RelationMatrix):
+            return relations.tension_stats()
+        
+        total_tension = 0
+        for relation in relations.values():
+            # Convert trust_level to tension (negative trust = high tension)
+            total_tension += max(0, -relation.trust_level)
+        return total_tension, len(relations)
+    
+    def _active_conflicts(self, relations: Union[Dict[str, Relation], RelationMatrix]) -> List[str]:
+        """List relation keys whose distrust indicates a potential conflict"""
+        if isinstance(relations, RelationMatrix):
+            return relations.conflict_keys()
+        return [key for key, relation in relations.items() if relation.trust_level < CONFLICT_TRUST_THRESHOLD]
+    
     async def _generate_initial_psychohistorical_news(self, world_state: WorldState) -> List[GeneratedNews]:
         """Generate initial psychohistorical news using ChatGPT"""
-        try:
-            from chatgpt_service import get_chatgpt_service
-            
-            chatgpt_service = await get_chatgpt_service()
-            
-            # Convert world state to dict
-            world_state_dict = {
-                "global_tension": self._calculate_global_tension(world_state),
-                "active_conflicts": len([r for r in world_state.relations.values() if r.trust_level < -50]),
-                "major_powers": [c.name for c in world_state.countries.values() if c.gdp > 2000000],
-                "economic_indicators": {
-                    "total_gdp": sum(c.gdp for c in world_state.countries.values()),
-                    "average_stability": sum(c.stability for c in world_state.countries.values()) / len(world_state.countries)
-                }
-            }
-            
-            initial_news = []
-            
-            # Generate 3-5 initial news articles about recent world events
-            recent_events = [
-                ("United States", "diplomatic", 85),
-                ("Russia", "military", 90),
-                ("China", "economic", 75),
-                ("Ukraine", "military", 80),
-                ("India", "economic", 70)
-            ]
-            
-            for country, event_type, impact in recent_events[:4]:  # Generate 4 articles
-                news_data = await chatgpt_service.generate_psychohistorical_news(
-                    world_state_dict,
-                    country,
-                    event_type,
-                    impact
-                )
-                
-                # Create timestamp for recent past (1-3 months ago)
-                days_ago = random.randint(30, 90)
-                article_date = world_state.current_date - timedelta(days=days_ago)
-                
-                # Create GeneratedNews object
-                news = GeneratedNews(
-                    headline=news_data["headline"],
-                    lede=news_data["content"],
-                    content=news_data["content"],
-                    country=country,
-                    category=event_type,
-                    severity=news_data["severity"],
-                    reliability=news_data["reliability"],
-                    source=news_data["source"],
-                    timestamp=article_date,
-                    stat_changes=news_data.get("stat_changes", {})
-                )
-                
-                initial_news.append(news)
+        # Generate 3-5 initial news articles about recent world events
+        recent_events = [
+            ("United States", "diplomatic", 85),
+            ("Russia", "military", 90),
+            ("China", "economic", 75),
+            ("Ukraine", "military", 80),
+            ("India", "economic", 70)
+        ]
+        events = recent_events[:4]  # Generate 4 articles
+        rng = self._spawn_rng(world_state)
+        
+        news_data = await self._request_news(self._build_news_context(world_state), events, world_state.fresh_news)
+        
+        initial_news = []
+        for (country, event_type, impact), data in zip(events, news_data):
+            if data is None:
+                continue
             
-            return initial_news
+            # Create timestamp for recent past (1-3 months ago)
+            days_ago = rng.randint(30, 90)
+            article_date = world_state.current_date - timedelta(days=days_ago)
             
-        except Exception as e:
-            print(f"Error generating initial psychohistorical news: {e}")
+            initial_news.append(GeneratedNews(
+                headline=data["headline"],
+                lede=data["content"],
+                content=data["content"],
+                country=country,
+                category=event_type,
+                severity=data["severity"],
+                reliability=data["reliability"],
+                source=data["source"],
+                timestamp=article_date,
+                stat_changes=data.get("stat_changes", {})
+            ))
+        
+        if not initial_news:
             # Fallback to basic initial news generation
             return self._generate_initial_news(world_state)
+        
+        return initial_news
 
 # Global instance with singleton pattern
 _world_brain_instance = None
 
 def get_world_brain():
+    """The app's World Brain, built on first call with its store, result cache and scheduler
+
+    Nothing is built at import, so ensemble worker processes that import this
+    module only get the engine.
+    """
     global _world_brain_instance
     if _world_brain_instance is None:
-        _world_brain_instance = WorldBrain()
+        store = create_simulation_store_from_env()
+        _world_brain_instance = WorldBrain(
+            result_cache=create_seeded_cache_from_env(),
+            store=store,
+            eviction_policy=create_eviction_policy_from_env() if store is not None else None,
+            scheduler=create_tick_scheduler_from_env(),
+            verify_aggregates=os.getenv("WORLD_BRAIN_VERIFY_AGGREGATES", "0").lower() in ("1", "true", "yes"),
+        )
     return _world_brain_instance
-
-world_brain = get_world_brain()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+World Snapshot - Compact serialized form of a complete WorldState
+Snapshots include the simulation's random streams, so a restored world
+continues exactly as the original would have.
+
+Format 2 ("WBS2") is a header and section table followed by three 8-byte
+aligned sections: pickled metadata, a string table and one array block.
+Countries, doctrines, actions, outcomes and news are stored as packed columns
+whose strings are interned once in the string table; relation matrices are
+raw arrays in the array block; everything else is in the pickled metadata.
+Format 1 ("WBS1", a compressed pickle of the whole state) still loads.
+Pickled parts may only reference this package's classes and the standard and
+NumPy types a world state is built from, so a tampered snapshot cannot make
+the loader call arbitrary functions.
+
+``save_world_state`` leaves the array block uncompressed so ``load_world_state``
+can map the file copy-on-write. The relation matrices then share the file's
+pages instead of being copied, which saves memory but not time: every other
+object is still rebuilt from its columns, as when loading from bytes. These
+file functions are offline tools for exporting worlds and for the benchmark;
+the server's SimulationStore keeps snapshot bytes in SQLite and restores them
+with ``loads_world_state``, so running simulations never use the mapped path.
+"""
+
+import io
+import mmap
+import os
+import pickle
+import struct
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"WBS2"
+LEGACY_SNAPSHOT_MAGIC = b"WBS1"  # zlib-compressed pickle of the whole state
+FORMAT_VERSION = 2
+
+_HEADER = struct.Struct("<4sHHI")  # Magic, format version, flags, section count
+_SECTION = struct.Struct("<B7xQQQ")  # Codec, offset, stored length, decoded length
+_ALIGN = 8
+
+_META_SECTION = 0
+_STRINGS_SECTION = 1
+_ARRAYS_SECTION = 2
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+
+_NONE = 0xFFFFFFFF  # String column entry for None
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_INT64_RANGE = (-(1 << 63), (1 << 63) - 1)
+
+# World state fields stored as packed tables instead of in the pickled remainder
+_TABLE_FIELDS = ("countries", "doctrines", "actions", "outcomes", "news")
+
+ArrayRef = Tuple[int, str, Tuple[int, ...]]  # Offset in the array block, dtype, shape
+
+
+# Globals pickled snapshot parts may reference besides the classes of this package
+_SAFE_GLOBALS = frozenset({
+    ("builtins", "set"), ("builtins", "frozenset"), ("builtins", "complex"), ("builtins", "bytearray"),
+    ("collections", "deque"), ("collections", "OrderedDict"),
+    ("datetime", "datetime"), ("datetime", "date"), ("datetime", "timedelta"), ("datetime", "timezone"),
+    ("random", "Random"),
+    ("numpy", "dtype"), ("numpy", "ndarray"),
+    ("numpy.core.multiarray", "_reconstruct"), ("numpy._core.multiarray", "_reconstruct"),
+    ("numpy.core.numeric", "_frombuffer"), ("numpy._core.numeric", "_frombuffer"),
+    ("numpy.random._pickle", "__generator_ctor"), ("numpy.random._pickle", "__bit_generator_ctor"),
+    ("numpy.random._pickle", "__randomstate_ctor"), ("numpy.random._pcg64", "PCG64"),
+    ("numpy.random.bit_generator", "SeedSequence"), ("numpy.random.bit_generator", "__pyx_unpickle_SeedSequence"),
+})
+_PACKAGE = __name__.rpartition(".")[0]
+
+
+class SnapshotError(ValueError):
+    """Raised when snapshot bytes are not a readable world snapshot"""
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Resolves only the classes a world state is made of"""
+
+    def find_class(self, module: str, name: str):
+        if (module, name) in _SAFE_GLOBALS:
+            return super().find_class(module, name)
+        if _PACKAGE and (module == _PACKAGE or module.startswith(_PACKAGE + ".")):
+            obj = super().find_class(module, name)
+            if isinstance(obj, type) and obj.__module__ == module:
+                return obj
+        raise pickle.UnpicklingError(f"Snapshot references disallowed global {module}.{name}")
+
+
+def restricted_loads(data) -> Any:
+    """``pickle.loads`` limited to the globals a world state is made of"""
+    return _SnapshotUnpickler(io.BytesIO(data)).load()
+
+
+def _object_state(obj) -> Optional[Dict[str, Any]]:
+    """The attribute dict pickle would store for ``obj``, or None if it has none"""
+    getstate = vars(type(obj)).get("__getstate__")
+    state = getstate(obj) if getstate is not None else getattr(obj, "__dict__", None)
+    return state if isinstance(state, dict) else None
+
+
+def _restore_objects(cls, states) -> List[Any]:
+    """Rebuild objects from attribute dicts the way pickle does"""
+    new = cls.__new__
+    setstate = vars(cls).get("__setstate__")
+    objects = []
+    for state in states:
+        obj = new(cls)
+        if setstate is not None:
+            setstate(obj, state)
+        else:
+            obj.__dict__ = state
+        objects.append(obj)
+    return objects
+
+
+def _column_kind(values: List[Any]) -> str:
+    """Packed column type that round-trips every value exactly, or "obj" to pickle them"""
+    types = {type(value) for value in values}
+    if types == {float}:
+        return "f8"
+    if types == {bool}:
+        return "b1"
+    if types == {int} and _INT64_RANGE[0] <= min(values) and max(values) <= _INT64_RANGE[1]:
+        return "i8"
+    if types <= {str, type(None)}:
+        return "str"
+    if types == {list} and all(type(item) is str for value in values for item in value):
+        return "strs"
+    if types == {datetime} and all(value.tzinfo is None for value in values):
+        return "dt"
+    return "obj"
+
+
+class _SnapshotWriter:
+    def __init__(self, level: int, compress_arrays: bool):
+        self.level = level
+        self.compress_arrays = compress_arrays
+        self.arrays: List[bytes] = []
+        self.array_bytes = 0
+        self.strings: Dict[str, int] = {}
+
+    def intern_all(self, values) -> np.ndarray:
+        """String table indices of ``values``; None maps to a sentinel"""
+        strings = self.strings
+        return np.array([_NONE if value is None else strings.setdefault(value, len(strings)) for value in values],
+                        dtype=np.uint32)
+
+    def encode_section(self, payload: bytes, compress: bool) -> Tuple[int, bytes, int]:
+        if compress and self.level:
+            return CODEC_ZLIB, zlib.compress(payload, self.level), len(payload)
+        return CODEC_RAW, payload, len(payload)
+
+    def add_array(self, array: np.ndarray) -> ArrayRef:
+        array = np.ascontiguousarray(array)
+        padding = -self.array_bytes % _ALIGN
+        offset = self.array_bytes + padding
+        self.arrays.append(b"\0" * padding + array.tobytes())
+        self.array_bytes = offset + array.nbytes
+        return offset, array.dtype.str, array.shape
+
+    def add_table(self, objects: Union[List[Any], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Columnar encoding of same-class objects, or None if they do not share one layout"""
+        keys = list(objects) if isinstance(objects, dict) else None
+        values = list(objects.values()) if isinstance(objects, dict) else list(objects)
+        if keys is not None and not all(type(key) is str for key in keys):
+            return None
+        cls = type(values[0]) if values else None
+        states = [_object_state(value) if type(value) is cls else None for value in values]
+        if any(state is None for state in states):
+            return None
+        names = list(states[0]) if states else []
+        if any(list(state) != names for state in states):
+            return None
+        table: Dict[str, Any] = {"cls": cls, "count": len(values), "columns": [], "keys": None}
+        if keys is not None:
+            table["keys"] = self.add_array(self.intern_all(keys))
+        for name in names:
+            column = [state[name] for state in states]
+            kind = _column_kind(column)
+            if kind == "f8":
+                ref: Any = self.add_array(np.array(column, dtype=np.float64))
+            elif kind == "i8":
+                ref = self.add_array(np.array(column, dtype=np.int64))
+            elif kind == "b1":
+                ref = self.add_array(np.array(column, dtype=np.bool_))
+            elif kind == "str":
+                ref = self.add_array(self.intern_all(column))
+            elif kind == "strs":
+                offsets = np.zeros(len(column) + 1, dtype=np.int64)
+                np.cumsum([len(value) for value in column], out=offsets[1:])
+                ref = (self.add_array(offsets), self.add_array(self.intern_all(item for value in column for item in value)))
+            elif kind == "dt":
+                ref = self.add_array(np.array([(value - _EPOCH) // _MICROSECOND for value in column], dtype=np.int64))
+            else:
+                ref = column  # Pickled with the metadata
+            table["columns"].append((name, kind, ref))
+        return table
+
+    def add_arrays_of(self, obj) -> Optional[Dict[str, Any]]:
+        """Store an object's NumPy attributes as array sections and keep the rest for pickling"""
+        state = _object_state(obj)
+        if state is None or not any(isinstance(value, np.ndarray) for value in state.values()):
+            return None
+        arrays = {name: self.add_array(value) for name, value in state.items()
+                  if isinstance(value, np.ndarray) and value.dtype != object}
+        rest = {name: value for name, value in state.items() if name not in arrays}
+        return {"cls": type(obj), "arrays": arrays, "state": rest}
+
+    def finish(self, meta: Dict[str, Any]) -> bytes:
+        text = "".join(self.strings)
+        offsets = np.zeros(len(self.strings) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in self.strings], out=offsets[1:])
+        meta["string_offsets"] = self.add_array(offsets)
+        sections = [
+            self.encode_section(pickle.dumps(meta, protocol=pickle.HIGHEST_PROTOCOL), True),
+            self.encode_section(text.encode("utf-8"), True),
+            self.encode_section(b"".join(self.arrays), self.compress_arrays),
+        ]
+
+        position = _HEADER.size + _SECTION.size * len(sections)
+        table, payloads = [], []
+        for codec, payload, decoded_length in sections:
+            padding = -position % _ALIGN
+            payloads.append(b"\0" * padding + payload)
+            position += padding
+            table.append(_SECTION.pack(codec, position, len(payload), decoded_length))
+            position += len(payload)
+        return b"".join([_HEADER.pack(SNAPSHOT_MAGIC, FORMAT_VERSION, 0, len(sections)), *table, *payloads])
+
+
+class _SnapshotReader:
+    def __init__(self, buffer, copy_arrays: bool):
+        self.buffer = memoryview(buffer)
+        self.copy_arrays = copy_arrays
+        if bytes(self.buffer[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise SnapshotError("Not a world snapshot")
+        if len(self.buffer) < _HEADER.size:
+            raise SnapshotError("Truncated world snapshot")
+        _, version, _, count = _HEADER.unpack_from(self.buffer, 0)
+        if version > FORMAT_VERSION:
+            raise SnapshotError(f"World snapshot format {version} is newer than this build supports")
+        self.sections = [_SECTION.unpack_from(self.buffer, _HEADER.size + _SECTION.size * index)
+                         for index in range(count)]
+        if len(self.sections) <= _ARRAYS_SECTION or \
+                any(offset + length > len(self.buffer) for _, offset, length, _ in self.sections):
+            raise SnapshotError("Truncated world snapshot")
+        self.strings: List[str] = []
+        self.owned_arrays, self.array_block = self.section(_ARRAYS_SECTION)
+
+    def section(self, index: int) -> Tuple[bool, Any]:
+        """(owned, data): decompressed sections are fresh buffers, raw ones are views"""
+        codec, offset, length, decoded_length = self.sections[index]
+        data = self.buffer[offset:offset + length]
+        if codec == CODEC_RAW:
+            return False, data
+        if codec == CODEC_ZLIB:
+            decoded = bytearray(zlib.decompress(data))
+            if len(decoded) != decoded_length:
+                raise SnapshotError("Corrupt world snapshot section")
+            return True, decoded
+        raise SnapshotError(f"Unknown snapshot codec {codec}")
+
+    def array(self, ref: ArrayRef) -> np.ndarray:
+        offset, dtype, shape = ref
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        if offset + count * dtype.itemsize > len(self.array_block):
+            raise SnapshotError("Corrupt world snapshot array")
+        if not count:
+            return np.empty(shape, dtype=dtype)
+        array = np.frombuffer(self.array_block, dtype=dtype, count=count, offset=offset).reshape(shape)
+        return array.copy() if self.copy_arrays and not self.owned_arrays else array
+
+    def column(self, kind: str, ref: Any) -> List[Any]:
+        if kind == "obj":
+            return ref
+        if kind == "strs":
+            offsets, flat = self.array(ref[0]).tolist(), self.array(ref[1]).tolist()
+            return [[self.strings[item] for item in flat[start:end]] for start, end in zip(offsets, offsets[1:])]
+        values = self.array(ref).tolist()
+        if kind == "str":
+            return [None if value == _NONE else self.strings[value] for value in values]
+        if kind == "dt":
+            return [_EPOCH + value * _MICROSECOND for value in values]
+        return values
+
+    def table(self, table: Optional[Dict[str, Any]]):
+        if table is None:
+            return None
+        cls = table["cls"]
+        if cls is None:
+            objects: List[Any] = []
+        else:
+            names = [name for name, _, _ in table["columns"]]
+            rows = zip(*(self.column(kind, ref) for _, kind, ref in table["columns"]))
+            objects = _restore_objects(cls, (dict(zip(names, row)) for row in rows))
+        if table["keys"] is None:
+            return objects
+        return dict(zip((self.strings[index] for index in self.array(table["keys"]).tolist()), objects))
+
+    def load(self):
+        _, data = self.section(_META_SECTION)
+        try:
+            meta = restricted_loads(data)
+        except (pickle.UnpicklingError, EOFError) as e:
+            raise SnapshotError(f"Corrupt world snapshot: {e}") from e
+        _, text_data = self.section(_STRINGS_SECTION)
+        text = bytes(text_data).decode("utf-8")
+        offsets = self.array(meta["string_offsets"]).tolist()
+        self.strings = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+        state = meta["state"]
+        for name in _TABLE_FIELDS:
+            if meta["tables"].get(name) is not None:
+                state[name] = self.table(meta["tables"][name])
+        packed = meta["relations"]
+        if packed is not None:
+            relation_state = dict(packed["state"])
+            relation_state.update((name, self.array(ref)) for name, ref in packed["arrays"].items())
+            state["relations"] = _restore_objects(packed["cls"], [relation_state])[0]
+        if meta["tables"].get("actions") is not None:
+            state["action_index"] = {action.id: action for action in state["actions"]}
+        return _restore_objects(meta["cls"], [state])[0]
+
+
+def dumps_world_state(world_state, level: int = 6, compress_arrays: bool = True) -> bytes:
+    """Serialize a world state; encoded API fragments are left out and rebuilt on demand
+
+    ``compress_arrays=False`` keeps array sections raw so a saved file can be memory-mapped.
+    """
+    writer = _SnapshotWriter(level, compress_arrays)
+    state = dict(_object_state(world_state))
+    # The action index maps ids to the live actions; rebuild it on load instead of storing the objects twice
+    actions, action_index = state.get("actions"), state.get("action_index")
+    index_derived = (isinstance(actions, list) and isinstance(action_index, dict) and len(action_index) == len(actions)
+                     and all(action_index.get(getattr(action, "id", None)) is action for action in actions))
+    tables = {}
+    for name in _TABLE_FIELDS:
+        if name == "actions" and not index_derived:
+            continue
+        table = writer.add_table(state[name]) if name in state else None
+        if table is not None:
+            tables[name] = table
+            state[name] = None
+    if "actions" in tables:
+        state["action_index"] = None
+    relations = writer.add_arrays_of(state["relations"]) if "relations" in state else None
+    if relations is not None:
+        state["relations"] = None
+    return writer.finish({"cls": type(world_state), "state": state, "tables": tables, "relations": relations})
+
+
+def loads_world_state(data: bytes):
+    if data[:4] == LEGACY_SNAPSHOT_MAGIC:
+        try:
+            return restricted_loads(zlib.decompress(data[len(LEGACY_SNAPSHOT_MAGIC):]))
+        except (zlib.error, pickle.UnpicklingError, EOFError) as e:
+            raise SnapshotError(f"Corrupt world snapshot: {e}") from e
+    try:
+        return _SnapshotReader(data, copy_arrays=True).load()
+    except (zlib.error, struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        raise SnapshotError(f"Corrupt world snapshot: {e}") from e
+
+
+def save_world_state(world_state, path: str, level: int = 6):
+    """Write a snapshot file whose arrays can be memory-mapped by ``load_world_state`` (offline use)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(dumps_world_state(world_state, level, compress_arrays=False))
+    os.replace(tmp_path, path)
+
+
+def load_world_state(path: str, use_mmap: bool = True):
+    """Load a snapshot file; with ``use_mmap`` relation arrays are copy-on-write views of the file pages
+
+    Offline and benchmark use only: the server restores worlds from the
+    SimulationStore's SQLite rows, which are read into memory in full.
+    """
+    with open(path, "rb") as f:
+        if not use_mmap:
+            return loads_world_state(f.read())
+        if f.read(4) == LEGACY_SNAPSHOT_MAGIC:
+            f.seek(0)
+            return loads_world_state(f.read())
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    try:
+        return _SnapshotReader(mapped, copy_arrays=False).load()
+    except (zlib.error, struct.error, IndexError, KeyError, UnicodeDecodeError) as e:
+        raise SnapshotError(f"Corrupt world snapshot: {e}") from e